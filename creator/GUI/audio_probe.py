@@ -0,0 +1,225 @@
+"""
+Audio Duration Probe
+Reads the length of an audio file from its headers (WAV, MP3, M4A, FLAC, AAC),
+without decoding the audio or starting ffprobe
+
+    python audio_probe.py <audio files...>
+"""
+
+import os
+import struct
+import sys
+
+# MPEG audio bitrates in kbps by (MPEG-1?, layer)
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by MPEG version bits (0 = 2.5, 2 = 2, 3 = 1)
+_MP3_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+_ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000,
+                      22050, 16000, 12000, 11025, 8000, 7350)
+
+# How far into an MP3 (after the ID3 tag) to look for the first frame
+_MP3_SYNC_WINDOW = 64 * 1024
+
+
+def _skip_id3(f):
+    """Seek past any ID3v2 tags at the start of the file; return the new offset"""
+    offset = 0
+    while True:
+        f.seek(offset)
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            f.seek(offset)
+            return offset
+        size = (header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 | (header[8] & 0x7F) << 7 | (header[9] & 0x7F)
+        offset += 10 + size + (10 if header[5] & 0x10 else 0)
+
+
+def _wav_duration(f):
+    """data chunk size / byte rate from the fmt chunk (works for any WAV codec)"""
+    header = f.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    byte_rate = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(size + (size & 1))
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            if size == 0xFFFFFFFF:
+                # Unknown length (streamed WAV): the data runs to the end of the file
+                size = os.fstat(f.fileno()).st_size - f.tell()
+            return size / byte_rate
+        else:
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def _flac_duration(f):
+    """Total samples / sample rate from the STREAMINFO block"""
+    if f.read(4) != b"fLaC":
+        return None
+    block = f.read(4)
+    if len(block) < 4 or block[0] & 0x7F != 0:
+        return None
+    info = f.read(34)
+    if len(info) < 34:
+        return None
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _mp4_duration(f):
+    """Duration / timescale of the movie header (moov/mvhd), wherever moov is"""
+    file_size = os.fstat(f.fileno()).st_size
+    start, end = f.tell(), file_size
+    while start + 8 <= end:
+        f.seek(start)
+        header = f.read(8)
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - start
+        if size < header_size:
+            return None
+        if box_type == b"moov":
+            # Descend: mvhd is a direct child of moov
+            start, end = start + header_size, start + size
+            continue
+        if box_type == b"mvhd":
+            version = f.read(4)[0]
+            if version == 1:
+                f.seek(16, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(8, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            return duration / timescale if timescale else None
+        start += size
+    return None
+
+
+def _adts_duration(f):
+    """Count ADTS frames (1024 samples per raw block), reading only their 7-byte headers"""
+    samples = 0
+    sample_rate = None
+    while True:
+        header = f.read(7)
+        if len(header) < 7 or header[0] != 0xFF or header[1] & 0xF6 != 0xF0:
+            break
+        rate_index = (header[2] >> 2) & 0x0F
+        if rate_index >= len(_ADTS_SAMPLE_RATES):
+            break
+        sample_rate = _ADTS_SAMPLE_RATES[rate_index]
+        frame_length = (header[3] & 0x03) << 11 | header[4] << 3 | header[5] >> 5
+        if frame_length < 7:
+            break
+        samples += 1024 * ((header[6] & 0x03) + 1)
+        f.seek(frame_length - 7, os.SEEK_CUR)
+    return samples / sample_rate if sample_rate and samples else None
+
+
+def _mp3_frame(header):
+    """Decode a 4-byte MPEG audio frame header into a dict, or None if it isn't one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 3 and not mpeg1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {"mpeg1": mpeg1, "mono": header[3] >> 6 == 3, "bitrate": bitrate,
+            "sample_rate": sample_rate, "samples": samples, "length": length}
+
+
+def _mp3_duration(f, audio_start):
+    """Frame count from a Xing/Info or VBRI header, else the CBR estimate from the file size"""
+    data = f.read(_MP3_SYNC_WINDOW)
+    position = data.find(b"\xff")
+    while position != -1:
+        frame = _mp3_frame(data[position:position + 4])
+        # A real first frame is followed by another one (or ends the window)
+        if frame and frame["length"] > 4:
+            following = data[position + frame["length"]:position + frame["length"] + 4]
+            if len(following) < 4 or _mp3_frame(following):
+                break
+        position = data.find(b"\xff", position + 1)
+    if position == -1:
+        return None
+
+    xing_offset = 4 + ((32 if not frame["mono"] else 17) if frame["mpeg1"] else (17 if not frame["mono"] else 9))
+    frames = None
+    xing = data[position + xing_offset:position + xing_offset + 12]
+    if xing[:4] in (b"Xing", b"Info") and len(xing) == 12 and struct.unpack(">I", xing[4:8])[0] & 0x01:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    vbri = data[position + 36:position + 54]
+    if frames is None and vbri[:4] == b"VBRI" and len(vbri) == 18:
+        frames = struct.unpack(">I", vbri[14:18])[0]
+    if frames:
+        return frames * frame["samples"] / frame["sample_rate"]
+
+    end = os.fstat(f.fileno()).st_size
+    f.seek(end - 128)
+    if f.read(3) == b"TAG":
+        end -= 128
+    return (end - audio_start - position) * 8 / frame["bitrate"]
+
+
+def duration_seconds(path):
+    """Length of an audio file in seconds, or None when it can't be read from the headers"""
+    try:
+        with open(path, "rb") as f:
+            start = _skip_id3(f)
+            head = f.read(12)
+            f.seek(start)
+            if head[:4] == b"RIFF":
+                duration = _wav_duration(f)
+            elif head[:4] == b"fLaC":
+                duration = _flac_duration(f)
+            elif head[4:8] == b"ftyp":
+                duration = _mp4_duration(f)
+            elif len(head) >= 2 and head[0] == 0xFF and head[1] & 0xF6 == 0xF0:
+                duration = _adts_duration(f)
+            else:
+                duration = _mp3_duration(f, start)
+    except (OSError, struct.error, IndexError, ZeroDivisionError):
+        return None
+    return duration if duration and duration > 0 else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python audio_probe.py <audio files...>")
+        sys.exit(1)
+    for audio_path in sys.argv[1:]:
+        seconds = duration_seconds(audio_path)
+        print(f"{audio_path}: {'unknown' if seconds is None else f'{seconds:.3f}s'}")
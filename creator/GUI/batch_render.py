@@ -0,0 +1,222 @@
+"""
+Headless Batch Renderer
+Renders a manifest of audio + caption + image jobs without the GUI (e.g. from cron)
+
+Manifest formats (relative paths are resolved against the manifest's folder):
+
+JSON - a list of jobs, or an object with "jobs" and optional default "images":
+    {
+      "images": "images/",
+      "jobs": [
+        {"audio": "audio/ep1.mp3", "caption": "captions/ep1.json"},
+        {"audio": "audio/ep2.mp3", "caption": "captions/ep2.json", "images": ["a.png", "b.png"]}
+      ]
+    }
+
+CSV - a header row with audio, caption and images columns:
+    audio,caption,images
+    audio/ep1.mp3,captions/ep1.json,images/
+    audio/ep2.mp3,captions/ep2.json,a.png;b.png
+
+"images" is a list of files, a directory or a glob pattern (";"-separated in CSV).
+Jobs without a caption are transcribed with sub.mjs while other jobs render.
+
+Exit codes: 0 = all videos rendered, 1 = some videos failed, 2 = bad arguments or manifest
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from pipeline import VideoPipeline, expand_images
+
+EXIT_OK = 0
+EXIT_FAILED_JOBS = 1
+EXIT_USAGE = 2
+
+SUMMARY_NAME = "batch_summary.json"
+
+
+class ManifestError(Exception):
+    pass
+
+
+def _resolve(path, base_dir):
+    path = os.path.expanduser(str(path).strip())
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+
+
+def _resolve_images(spec, base_dir):
+    """Turn an images entry (list, directory, glob or ;-separated string) into file paths"""
+    if not spec:
+        return []
+    if isinstance(spec, str):
+        spec = [part for part in spec.split(";") if part.strip()]
+    images = []
+    for item in spec:
+        path = _resolve(item, base_dir)
+        if os.path.isfile(path):
+            images.append(path)
+        else:
+            images.extend(expand_images(path))
+    return images
+
+
+def load_manifest(manifest_path):
+    """
+    Read a JSON or CSV manifest into pipeline jobs
+
+    Returns:
+        list: Job dicts with absolute "audio", "caption" and "images" paths
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    try:
+        if manifest_path.lower().endswith(".csv"):
+            with open(manifest_path, newline="", encoding="utf-8-sig") as f:
+                entries = list(csv.DictReader(f))
+            default_images = None
+        else:
+            with open(manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                entries = data.get("jobs")
+                default_images = data.get("images")
+            else:
+                entries, default_images = data, None
+    except (OSError, json.JSONDecodeError, csv.Error) as e:
+        raise ManifestError(f"could not read manifest: {e}")
+
+    if not isinstance(entries, list) or not entries:
+        raise ManifestError("manifest contains no jobs")
+
+    jobs = []
+    for number, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get("audio"):
+            raise ManifestError(f"job {number} has no audio file")
+        jobs.append({
+            "audio": _resolve(entry["audio"], base_dir),
+            "caption": _resolve(entry["caption"], base_dir) if entry.get("caption") else None,
+            "images": _resolve_images(entry.get("images") or default_images, base_dir),
+        })
+    return jobs
+
+
+def validate_job(job):
+    """Return why a job cannot be rendered, or None"""
+    if not os.path.isfile(job["audio"]):
+        return f"audio not found: {job['audio']}"
+    if job["caption"] and not os.path.isfile(job["caption"]):
+        return f"caption not found: {job['caption']}"
+    if not job["images"]:
+        return "no images"
+    missing = [p for p in job["images"] if not os.path.isfile(p)]
+    if missing:
+        return f"image not found: {missing[0]}"
+    return None
+
+
+def run(manifest_path, output_dir, summary_path=None, concurrent_renders=None):
+    """Render every job in the manifest and write the summary file
+
+    Returns:
+        int: Process exit code
+    """
+    try:
+        jobs = load_manifest(manifest_path)
+    except ManifestError as e:
+        print(f"❌ Error: {e}")
+        return EXIT_USAGE
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = summary_path or os.path.join(output_dir, SUMMARY_NAME)
+
+    pipeline = VideoPipeline()
+    if concurrent_renders:
+        pipeline.max_concurrent_renders = concurrent_renders
+
+    # Invalid jobs are reported in the summary instead of aborting the batch
+    results = [None] * len(jobs)
+    runnable = []
+    for idx, job in enumerate(jobs):
+        error = validate_job(job)
+        if not error and job["caption"]:
+            caption = pipeline.load_caption(job["audio"], job["caption"])
+            if caption["errors"]:
+                error = f"invalid caption file: {caption['errors'][0]}"
+            else:
+                job = dict(job, caption=caption["caption_file"])
+        if error:
+            pipeline.log(f"⚠ Skipping job {idx + 1}: {error}")
+            results[idx] = pipeline.job_result(idx + 1, job)
+            results[idx]["error"] = error
+        else:
+            runnable.append((idx, job))
+
+    started_at = datetime.now().astimezone()
+    start_time = time.perf_counter()
+    if runnable:
+        batch_results = pipeline.run_batch([job for _, job in runnable], output_dir)
+        for (idx, _), result in zip(runnable, batch_results):
+            result["index"] = idx + 1
+            # The manifest's caption rather than its normalized copy; transcripts are kept
+            if jobs[idx]["caption"]:
+                result["caption"] = jobs[idx]["caption"]
+            results[idx] = result
+        pipeline.cleanup_temp_files()
+
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    summary = {
+        "manifest": os.path.abspath(manifest_path),
+        "output_dir": os.path.abspath(output_dir),
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "seconds": round(time.perf_counter() - start_time, 3),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "metrics_file": pipeline.metrics.path if pipeline.metrics else None,
+        "jobs": results,
+    }
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    pipeline.log(f"\n{'='*60}")
+    pipeline.log(f"Rendering complete! {succeeded}/{len(results)} videos successfully generated")
+    pipeline.log(f"Summary written to: {summary_path}")
+    pipeline.log(f"{'='*60}")
+    return EXIT_OK if succeeded == len(results) else EXIT_FAILED_JOBS
+
+
+# ============================================
+# COMMAND LINE USAGE
+# ============================================
+
+def print_usage():
+    print("Usage: python batch_render.py <manifest.json|manifest.csv> <output_directory> "
+          "[--summary FILE] [--jobs N]")
+    print("Example: python batch_render.py batch.json C:/videos/")
+    print("Example: python batch_render.py batch.csv /srv/videos --jobs 4 --summary /srv/logs/batch.json")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    try:
+        for name in ("--summary", "--jobs"):
+            if name in args:
+                i = args.index(name)
+                options[name] = args[i + 1]
+                del args[i:i + 2]
+        concurrent_renders = int(options["--jobs"]) if "--jobs" in options else None
+    except (IndexError, ValueError):
+        print_usage()
+        sys.exit(EXIT_USAGE)
+
+    if len(args) != 2:
+        print_usage()
+        sys.exit(EXIT_USAGE)
+
+    sys.exit(run(args[0], args[1], options.get("--summary"), concurrent_renders))
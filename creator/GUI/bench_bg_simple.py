@@ -0,0 +1,629 @@
+"""
+Benchmarks for bg_simple
+Generates synthetic comic-style masks/images and times the separation stages
+Can be used as a module or standalone script
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import bg_simple
+
+# ============================================
+# SYNTHETIC INPUTS
+# ============================================
+
+def make_component_mask(h, w, region_count, seed=0):
+    """
+    Foreground mask with region_count separate regions, like lettering plus specks
+
+    Half of the regions are 16x16 blocks (kept at the default MIN_SIZE), half are
+    2x2 specks (removed), all laid out on a grid so none of them touch.
+    """
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cell = 20
+    cells = rng.permutation((h // cell) * (w // cell))[:region_count]
+    ys = (cells // (w // cell)) * cell
+    xs = (cells % (w // cell)) * cell
+    for i, (y, x) in enumerate(zip(ys, xs)):
+        size = 16 if i % 2 == 0 else 2
+        mask[y:y + size, x:x + size] = 255
+    return mask
+
+
+# ============================================
+# REFERENCE IMPLEMENTATIONS
+# ============================================
+
+def reference_remove_small_components(mask, min_size):
+    """Original per-label loop, kept to check remove_small_components against"""
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    cleaned = np.zeros_like(mask)
+    removed_count = 0
+    for i in range(1, num_labels):
+        if stats[i, cv2.CC_STAT_AREA] >= min_size:
+            cleaned[labels == i] = 255
+        else:
+            removed_count += 1
+    return cleaned, removed_count
+
+
+def reference_distance_mask(img_rgb, bg_color, tolerance):
+    """Original float64 sqrt distance mask, kept to check compute_foreground_mask against"""
+    diff = np.sqrt(np.sum((img_rgb.astype(float) - bg_color)**2, axis=2))
+    max_diff = np.sqrt(3 * 255**2)
+    diff_percent = (diff / max_diff) * 100
+    return (diff_percent > tolerance).astype(np.uint8) * 255
+
+
+def make_comic_image(h, w, seed=0):
+    """Off-white page with coloured panels, line art and scanner noise (RGB)"""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), (250, 248, 240), dtype=np.uint8)
+    for _ in range(6):
+        x0, y0 = int(rng.integers(0, w * 3 // 4)), int(rng.integers(0, h * 3 // 4))
+        x1, y1 = x0 + int(rng.integers(w // 10, w // 4)), y0 + int(rng.integers(h // 10, h // 4))
+        color = tuple(int(c) for c in rng.integers(0, 200, 3))
+        cv2.rectangle(img, (x0, y0), (x1, y1), color, -1)
+        cv2.rectangle(img, (x0, y0), (x1, y1), (0, 0, 0), max(2, w // 400))
+    noise = rng.integers(-6, 7, img.shape, dtype=np.int16)
+    return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+SIZES = {
+    "720p": (720, 1280),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+    "8k": (4320, 7680),
+}
+
+
+def make_flat_image(h, w, seed=0):
+    """Flat-colour page with a few solid panels and no noise (RGB)"""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), (255, 255, 255), dtype=np.uint8)
+    for _ in range(4):
+        x0, y0 = int(rng.integers(0, w * 3 // 4)), int(rng.integers(0, h * 3 // 4))
+        x1, y1 = x0 + int(rng.integers(w // 8, w // 4)), y0 + int(rng.integers(h // 8, h // 4))
+        cv2.rectangle(img, (x0, y0), (x1, y1), tuple(int(c) for c in rng.integers(0, 200, 3)), -1)
+    return img
+
+
+def make_specks_image(h, w, seed=0):
+    """Comic page plus thousands of dark specks, like a dusty scan (RGB)"""
+    rng = np.random.default_rng(seed)
+    img = make_comic_image(h, w, seed)
+    count = h * w // 2000
+    ys = rng.integers(0, h - 3, count)
+    xs = rng.integers(0, w - 3, count)
+    sizes = rng.integers(1, 4, count)
+    for y, x, size in zip(ys, xs, sizes):
+        img[y:y + size, x:x + size] = 40
+    return img
+
+
+def make_lineart_image(h, w, seed=0):
+    """White page covered in black ink strokes and circles (RGB)"""
+    rng = np.random.default_rng(seed)
+    img = np.full((h, w, 3), 255, dtype=np.uint8)
+    thickness = max(1, w // 640)
+    for _ in range(300):
+        p0 = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        p1 = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        cv2.line(img, p0, p1, (0, 0, 0), thickness, cv2.LINE_AA)
+    for _ in range(60):
+        center = (int(rng.integers(0, w)), int(rng.integers(0, h)))
+        cv2.circle(img, center, int(rng.integers(5, max(6, w // 20))), (0, 0, 0), thickness, cv2.LINE_AA)
+    return img
+
+
+IMAGE_KINDS = {
+    "flat": make_flat_image,
+    "specks": make_specks_image,
+    "lineart": make_lineart_image,
+}
+
+
+def peak_memory(func, *args):
+    """Peak Python/numpy heap allocation (bytes) while running func(*args)"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def best_time(func, *args, repeat=3):
+    """Fastest wall time of func(*args) over repeat runs, plus its last result"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def bench_noise_removal(h=1080, w=1920, region_counts=(10, 100, 1000, 4000), include_reference=True):
+    """
+    Time remove_small_components against growing label counts
+
+    Returns:
+        list: one dict per region count (labels, seconds, reference_seconds, identical)
+    """
+    print(f"🔬 Noise removal on {w}x{h} masks (MIN_SIZE={bg_simple.MIN_SIZE})")
+    rows = []
+    for region_count in region_counts:
+        mask = make_component_mask(h, w, region_count)
+        seconds, (cleaned, removed) = best_time(bg_simple.remove_small_components, mask, bg_simple.MIN_SIZE)
+        row = {"labels": region_count, "seconds": seconds, "reference_seconds": None, "identical": None}
+        line = f"   {row['labels']:>6} labels: {seconds * 1000:8.1f} ms"
+        if include_reference:
+            ref_seconds, (ref_cleaned, ref_removed) = best_time(
+                reference_remove_small_components, mask, bg_simple.MIN_SIZE, repeat=1
+            )
+            row["reference_seconds"] = ref_seconds
+            row["identical"] = bool(np.array_equal(cleaned, ref_cleaned) and removed == ref_removed)
+            line += f" | per-label loop: {ref_seconds * 1000:9.1f} ms"
+            line += " | ✓ identical" if row["identical"] else " | ❌ MISMATCH"
+        print(line)
+        rows.append(row)
+    return rows
+
+
+def bench_distance_mask(sizes=((1080, 1920), (4000, 6000)), include_reference=True):
+    """
+    Time and measure peak memory of compute_foreground_mask
+
+    Returns:
+        list: one dict per size (megapixels, seconds, peak_bytes, reference_*, identical)
+    """
+    bg_color = np.array([250, 248, 240])
+    tolerance = bg_simple.COLOR_TOLERANCE
+    print(f"🔬 Distance mask (tolerance: {tolerance})")
+    rows = []
+    for h, w in sizes:
+        img = make_comic_image(h, w)
+        seconds, mask = best_time(bg_simple.compute_foreground_mask, img, bg_color, tolerance)
+        row = {
+            "megapixels": h * w / 1e6,
+            "seconds": seconds,
+            "peak_bytes": peak_memory(bg_simple.compute_foreground_mask, img, bg_color, tolerance),
+            "reference_seconds": None,
+            "reference_peak_bytes": None,
+            "identical": None,
+        }
+        line = f"   {w}x{h}: {seconds * 1000:7.1f} ms, peak {row['peak_bytes'] / 2**20:6.1f} MB"
+        if include_reference:
+            ref_seconds, ref_mask = best_time(reference_distance_mask, img, bg_color, tolerance, repeat=1)
+            row["reference_seconds"] = ref_seconds
+            row["reference_peak_bytes"] = peak_memory(reference_distance_mask, img, bg_color, tolerance)
+            row["identical"] = bool(np.array_equal(mask, ref_mask))
+            line += (f" | float64: {ref_seconds * 1000:7.1f} ms, peak {row['reference_peak_bytes'] / 2**20:6.1f} MB"
+                     f" ({row['reference_peak_bytes'] / max(row['peak_bytes'], 1):.1f}x)")
+            line += " | ✓ identical" if row["identical"] else " | ❌ MISMATCH"
+        print(line)
+        rows.append(row)
+    return rows
+
+
+def _time_stage(func, *args, repeat=3):
+    """Best wall time, traced peak memory and result of one separation stage"""
+    seconds, result = best_time(func, *args, repeat=repeat)
+    return seconds, peak_memory(func, *args), result
+
+
+def bench_stages(sizes=tuple(SIZES), kinds=tuple(IMAGE_KINDS), repeat=3):
+    """
+    Time process_image and each of its stages on synthetic comic images
+
+    Stages: background detection, distance mask, noise removal, smoothing and
+    PNG encode, plus the whole process_image call (result cache disabled).
+    Peak memory is what tracemalloc sees (numpy and OpenCV output arrays).
+
+    Returns:
+        list: one dict per (size, kind, stage) with megapixels, seconds,
+            mp_per_s, peak_bytes and fg_percent
+    """
+    print(f"🔬 process_image stages ({', '.join(sizes)} x {', '.join(kinds)}, best of {repeat})")
+    rows = []
+    cache_enabled = bg_simple.CACHE_ENABLED
+    bg_simple.CACHE_ENABLED = False
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                h, w = SIZES[size]
+                megapixels = h * w / 1e6
+                for kind in kinds:
+                    img_rgb = IMAGE_KINDS[kind](h, w)
+                    input_path = os.path.join(tmp_dir, f"{kind}_{size}.png")
+                    cv2.imwrite(input_path, cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR))
+                    fg_path, bg_path = bg_simple.output_paths(input_path, tmp_dir)
+
+                    timings = {}
+                    timings["detect"] = _time_stage(bg_simple.detect_background_color, img_rgb, repeat=repeat)
+                    bg_color = timings["detect"][2]
+                    timings["distance"] = _time_stage(
+                        bg_simple.compute_foreground_mask, img_rgb, bg_color, bg_simple.COLOR_TOLERANCE, repeat=repeat)
+                    mask = timings["distance"][2]
+                    timings["noise"] = _time_stage(
+                        bg_simple.remove_small_components, mask, bg_simple.MIN_SIZE, repeat=repeat)
+                    mask = timings["noise"][2][0]
+                    timings["smooth"] = _time_stage(bg_simple.smooth_mask, mask, repeat=repeat)
+                    mask = timings["smooth"][2]
+                    timings["encode"] = _time_stage(
+                        bg_simple.write_outputs, img_rgb, mask, fg_path, bg_path, repeat=repeat)
+                    timings["total"] = _time_stage(
+                        bg_simple.process_image, input_path, tmp_dir, False, repeat=repeat)
+                    fg_percent = round(float(np.count_nonzero(mask > 127)) / (h * w) * 100, 3)
+
+                    parts = []
+                    for stage, (seconds, peak_bytes, _) in timings.items():
+                        rows.append({
+                            "case": f"{size}/{kind}/{stage}",
+                            "megapixels": megapixels,
+                            "seconds": seconds,
+                            "mp_per_s": megapixels / seconds if seconds else float("inf"),
+                            "peak_bytes": peak_bytes,
+                            "fg_percent": fg_percent,
+                        })
+                        parts.append(f"{stage} {megapixels / seconds:7.1f}")
+                    total_peak = timings["total"][1]
+                    print(f"   {size:>5} {kind:<8} MP/s: {' | '.join(parts)} | "
+                          f"peak {total_peak / 2**20:6.1f} MB | fg {fg_percent:.1f}%")
+    finally:
+        bg_simple.CACHE_ENABLED = cache_enabled
+    return rows
+
+
+# Output encodings compared by bench_encoding: (label, bg_simple settings, lossless)
+ENCODINGS = (
+    ("png level 6", {"OUTPUT_FORMAT": "png", "PNG_COMPRESS_LEVEL": 6, "BG_FROM_ORIGINAL": False}, True),
+    ("png level 1", {"OUTPUT_FORMAT": "png", "PNG_COMPRESS_LEVEL": 1, "BG_FROM_ORIGINAL": False}, True),
+    ("png 1 + orig BG", {"OUTPUT_FORMAT": "png", "PNG_COMPRESS_LEVEL": 1, "BG_FROM_ORIGINAL": True}, True),
+    ("webp lossless", {"OUTPUT_FORMAT": "webp", "WEBP_QUALITY": 25, "WEBP_METHOD": 0,
+                       "BG_FROM_ORIGINAL": False}, True),
+    ("webp lossy", {"OUTPUT_FORMAT": "webp_lossy", "BG_FROM_ORIGINAL": False}, False),
+)
+
+
+def bench_encoding(sizes=("1080p", "4k"), kind="lineart", repeat=3):
+    """
+    Time write_outputs with each output encoding and compare file sizes
+
+    Lossless encodings are decoded again and checked against the mask and the
+    visible input pixels (WebP drops the colour under fully transparent pixels).
+
+    Returns:
+        list: one dict per (size, encoding) with seconds, bytes and identical
+    """
+    print(f"🔬 FG/BG encoding ({', '.join(sizes)}, {kind}, best of {repeat})")
+    rows = []
+    saved = {name: getattr(bg_simple, name) for _, settings, _ in ENCODINGS for name in settings}
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                h, w = SIZES[size]
+                img_rgb = IMAGE_KINDS[kind](h, w)
+                input_path = os.path.join(tmp_dir, f"{kind}_{size}.jpg")
+                cv2.imwrite(input_path, cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR))
+                mask = bg_simple.compute_foreground_mask(
+                    img_rgb, bg_simple.detect_background_color(img_rgb), bg_simple.COLOR_TOLERANCE)
+                for label, settings, lossless in ENCODINGS:
+                    for name, value in settings.items():
+                        setattr(bg_simple, name, value)
+                    fg_path, bg_path = bg_simple.output_paths(input_path, tmp_dir)
+                    seconds, _ = best_time(bg_simple.write_outputs, img_rgb, mask, fg_path, bg_path,
+                                           input_path, repeat=repeat)
+                    size_bytes = os.path.getsize(fg_path) + os.path.getsize(bg_path)
+                    identical = None
+                    if lossless:
+                        fg = np.asarray(Image.open(fg_path))
+                        visible = mask > 0
+                        identical = bool(np.array_equal(fg[:, :, 3], mask)
+                                         and np.array_equal(fg[:, :, :3][visible], img_rgb[visible]))
+                    rows.append({"case": f"{size}/{label}", "seconds": seconds,
+                                 "bytes": size_bytes, "identical": identical})
+                    line = f"   {size:>5} {label:<16} {seconds * 1000:8.1f} ms  {size_bytes / 2**20:7.2f} MB"
+                    if identical is not None:
+                        line += " | ✓ lossless" if identical else " | ❌ MISMATCH"
+                    print(line)
+    finally:
+        for name, value in saved.items():
+            setattr(bg_simple, name, value)
+    return rows
+
+
+# Smallest IoU between pyramid and full-resolution masks that passes bench_pyramid
+PYRAMID_MIN_IOU = 0.98
+
+
+def mask_iou(a, b):
+    """Intersection over union of the foreground (> 127) of two masks"""
+    a, b = a > 127, b > 127
+    union = np.count_nonzero(a | b)
+    return np.count_nonzero(a & b) / union if union else 1.0
+
+
+def bench_pyramid(sizes=("1080p", "4k"), kinds=tuple(IMAGE_KINDS), scales=None, repeat=3):
+    """
+    Compare coarse-to-fine masks (MASK_SCALE) with full-resolution ones
+
+    Both paths run distance, noise removal and smoothing; the final masks must
+    overlap by at least PYRAMID_MIN_IOU. scales defaults to the configured
+    MASK_SCALE (2 when it is off).
+
+    Returns:
+        list: one dict per (size, kind, scale) with full/pyramid seconds,
+            speedup, iou and identical (IoU within the threshold)
+    """
+    if scales is None:
+        scales = (bg_simple.MASK_SCALE if bg_simple.MASK_SCALE > 1 else 2,)
+    print(f"🔬 Coarse-to-fine masks ({', '.join(sizes)}, scale {', '.join(map(str, scales))}, best of {repeat}, "
+          f"IoU >= {PYRAMID_MIN_IOU})")
+    tolerance, min_size = bg_simple.COLOR_TOLERANCE, bg_simple.MIN_SIZE
+
+    def full_mask(img_rgb, bg_color):
+        mask = bg_simple.compute_foreground_mask(img_rgb, bg_color, tolerance)
+        return bg_simple.smooth_mask(bg_simple.remove_small_components(mask, min_size)[0])
+
+    def pyramid_mask(img_rgb, bg_color, scale):
+        mask = bg_simple.pyramid_foreground_mask(img_rgb, bg_color, tolerance, scale, min_size)[0]
+        return bg_simple.smooth_mask(mask)
+
+    rows = []
+    for size in sizes:
+        h, w = SIZES[size]
+        megapixels = h * w / 1e6
+        for kind in kinds:
+            img_rgb = IMAGE_KINDS[kind](h, w)
+            bg_color = bg_simple.detect_background_color(img_rgb)
+            full_seconds, reference = best_time(full_mask, img_rgb, bg_color, repeat=repeat)
+            for scale in scales:
+                seconds, mask = best_time(pyramid_mask, img_rgb, bg_color, scale, repeat=repeat)
+                iou = mask_iou(reference, mask)
+                rows.append({"case": f"{size}/{kind}/x{scale}", "megapixels": megapixels,
+                             "full_seconds": full_seconds, "seconds": seconds,
+                             "speedup": full_seconds / seconds if seconds else float("inf"),
+                             "iou": iou, "identical": iou >= PYRAMID_MIN_IOU})
+                print(f"   {size:>5} {kind:<8} 1/{scale}: {megapixels / full_seconds:7.1f} -> "
+                      f"{megapixels / seconds:7.1f} MP/s ({full_seconds / seconds:4.1f}x) | IoU {iou:.4f} "
+                      + ("✓" if iou >= PYRAMID_MIN_IOU else "❌ below threshold"))
+    return rows
+
+
+# MEMORY_BUDGET_MB used by bench_strips; lowered for images that would fit in it
+STRIP_BUDGET_MB = 16
+STRIP_MIN_COUNT = 4  # Strips each benchmarked image is split into at least
+
+
+def strip_budget_mb(h, w, budget_mb=STRIP_BUDGET_MB):
+    """budget_mb, or a budget small enough to split an h x w image into STRIP_MIN_COUNT strips"""
+    return min(budget_mb, h * w * bg_simple._STRIP_BYTES_PER_PIXEL / STRIP_MIN_COUNT / 2**20)
+
+
+def bench_strips(sizes=("1080p", "4k"), kinds=tuple(IMAGE_KINDS), budget_mb=STRIP_BUDGET_MB, repeat=3):
+    """
+    Compare strip mode (MEMORY_BUDGET_MB) with whole-image process_image
+
+    Both outputs are decoded again and must be pixel-identical, and every image
+    must really be split (smaller images get a smaller budget, see
+    strip_budget_mb). Peak memory is what tracemalloc sees, including the
+    decoded input image.
+
+    Returns:
+        list: one dict per (size, kind) with whole/strip seconds and peak bytes,
+            budget_mb, strips and identical
+    """
+    print(f"🔬 Strip mode ({', '.join(sizes)}, MEMORY_BUDGET_MB <= {budget_mb}, best of {repeat})")
+    rows = []
+    saved = {name: getattr(bg_simple, name) for name in ("CACHE_ENABLED", "MEMORY_BUDGET_MB", "OUTPUT_FORMAT")}
+    bg_simple.CACHE_ENABLED = False
+    bg_simple.OUTPUT_FORMAT = "png"
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                h, w = SIZES[size]
+                size_budget = strip_budget_mb(h, w, budget_mb)
+                bg_simple.MEMORY_BUDGET_MB = size_budget
+                rows_per_strip = bg_simple.strip_rows(h, w)
+                strips = -(-h // rows_per_strip) if rows_per_strip else 1
+                for kind in kinds:
+                    input_path = os.path.join(tmp_dir, f"{kind}_{size}.png")
+                    cv2.imwrite(input_path, cv2.cvtColor(IMAGE_KINDS[kind](h, w), cv2.COLOR_RGB2BGR))
+                    result = {}
+                    for mode, budget in (("whole", 0), ("strip", size_budget)):
+                        bg_simple.MEMORY_BUDGET_MB = budget
+                        out_dir = os.path.join(tmp_dir, mode)
+                        os.makedirs(out_dir, exist_ok=True)
+                        seconds, (fg_path, bg_path) = best_time(
+                            bg_simple.process_image, input_path, out_dir, False, repeat=repeat)
+                        peak_bytes = peak_memory(bg_simple.process_image, input_path, out_dir, False)
+                        result[mode] = (seconds, peak_bytes,
+                                        [np.asarray(Image.open(path)) for path in (fg_path, bg_path)])
+                    identical = all(np.array_equal(a, b) for a, b in zip(result["whole"][2], result["strip"][2]))
+                    rows.append({"case": f"{size}/{kind}", "whole_seconds": result["whole"][0],
+                                 "seconds": result["strip"][0], "whole_peak_bytes": result["whole"][1],
+                                 "peak_bytes": result["strip"][1], "budget_mb": size_budget,
+                                 "strips": strips,
+                                 # A whole-image fallback would compare the same path twice
+                                 "identical": identical and strips > 1})
+                    print(f"   {size:>5} {kind:<8} {strips:>3} strips ({size_budget:5.1f} MB) "
+                          f"{result['whole'][0]:6.2f}s -> {result['strip'][0]:6.2f}s | "
+                          f"peak {result['whole'][1] / 2**20:6.1f} -> {result['strip'][1] / 2**20:6.1f} MB | "
+                          + ("❌ NOT SPLIT" if strips <= 1 else "✓ identical" if identical else "❌ MISMATCH"))
+    finally:
+        for name, value in saved.items():
+            setattr(bg_simple, name, value)
+    return rows
+
+
+# ============================================
+# BASELINE COMPARISON
+# ============================================
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+MAX_REGRESSION = 0.25  # Allowed throughput drop / memory growth against the baseline
+
+
+def save_baseline(rows, path):
+    """Store throughput, peak memory and foreground share per case"""
+    baseline = {row["case"]: {"mp_per_s": row["mp_per_s"], "peak_bytes": row["peak_bytes"],
+                              "fg_percent": row["fg_percent"]} for row in rows}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"💾 Baseline saved: {path} ({len(baseline)} cases)")
+
+
+def compare_baseline(rows, path, max_regression=MAX_REGRESSION):
+    """
+    Check results against a stored baseline
+
+    A case fails when throughput drops or peak memory grows by more than
+    max_regression, or when the foreground share changes (different output).
+
+    Returns:
+        list: Failure messages (empty = within the baseline)
+    """
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    failures = []
+    for row in rows:
+        base = baseline.get(row["case"])
+        if base is None:
+            continue
+        if row["mp_per_s"] < base["mp_per_s"] * (1 - max_regression):
+            failures.append(f"{row['case']}: {row['mp_per_s']:.1f} MP/s vs baseline {base['mp_per_s']:.1f}")
+        if row["peak_bytes"] > base["peak_bytes"] * (1 + max_regression):
+            failures.append(f"{row['case']}: peak {row['peak_bytes'] / 2**20:.1f} MB "
+                            f"vs baseline {base['peak_bytes'] / 2**20:.1f} MB")
+        if abs(row["fg_percent"] - base["fg_percent"]) > 0.01:
+            failures.append(f"{row['case']}: foreground {row['fg_percent']:.3f}% "
+                            f"vs baseline {base['fg_percent']:.3f}%")
+    return failures
+
+
+# ============================================
+# COMMAND LINE USAGE
+# ============================================
+
+BENCHMARKS = {
+    "noise": bench_noise_removal,
+    "distance": bench_distance_mask,
+    "stages": bench_stages,
+    "encoding": bench_encoding,
+    "pyramid": bench_pyramid,
+    "strips": bench_strips,
+}
+
+# --sizes applies to every benchmark; --kinds only to these (noise and distance
+# use their own test images) and the baseline options only to stages
+KINDS_BENCHMARKS = ("stages", "encoding", "pyramid", "strips")
+BASELINE_OPTIONS = ("--save-baseline", "--check", "--baseline", "--max-regression")
+
+EXIT_NO_BASELINE = 2
+
+
+def run_benchmark(name, sizes=None, kinds=None):
+    """Run one benchmark with the --sizes / --kinds given (None = its own defaults)"""
+    if name == "noise":
+        return [row for size in sizes or ("1080p",) for row in bench_noise_removal(*SIZES[size])]
+    if name == "distance":
+        return bench_distance_mask(tuple(SIZES[size] for size in sizes)) if sizes else bench_distance_mask()
+    size_options = {"sizes": sizes} if sizes else {}
+    if name == "encoding":
+        if not kinds:
+            return bench_encoding(**size_options)
+        return [row for kind in kinds for row in bench_encoding(kind=kind, **size_options)]
+    return BENCHMARKS[name](**size_options, **({"kinds": kinds} if kinds else {}))
+
+
+def print_usage():
+    print(f"Usage: python bench_bg_simple.py [{'|'.join(BENCHMARKS)}] ... "
+          "[--sizes 720p,1080p,4k,8k] [--kinds flat,specks,lineart]")
+    print("                                 [--save-baseline | --check] [--baseline FILE] "
+          "[--max-regression 0.25]")
+    print("--kinds applies to stages, encoding, pyramid and strips; --sizes to all; "
+          "the baseline options to stages only")
+    print("Example: python bench_bg_simple.py stages --sizes 720p,1080p --save-baseline")
+    print("Example: python bench_bg_simple.py stages --sizes 720p,1080p --check")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {}
+    flags = set()
+    try:
+        for name in ("--sizes", "--kinds", "--baseline", "--max-regression"):
+            if name in args:
+                i = args.index(name)
+                options[name] = args[i + 1]
+                del args[i:i + 2]
+        for name in ("--save-baseline", "--check"):
+            if name in args:
+                args.remove(name)
+                flags.add(name)
+        max_regression = float(options.get("--max-regression", MAX_REGRESSION))
+    except (IndexError, ValueError):
+        print_usage()
+        sys.exit(1)
+
+    sizes = tuple(options["--sizes"].split(",")) if "--sizes" in options else None
+    kinds = tuple(options["--kinds"].split(",")) if "--kinds" in options else None
+    names = args or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown or any(s not in SIZES for s in sizes or ()) or any(k not in IMAGE_KINDS for k in kinds or ()):
+        print_usage()
+        sys.exit(1)
+    # Options a selected benchmark would ignore are rejected rather than dropped silently
+    ignoring_kinds = [name for name in names if name not in KINDS_BENCHMARKS]
+    if kinds and ignoring_kinds:
+        print(f"❌ --kinds is not supported by: {', '.join(ignoring_kinds)}")
+        print_usage()
+        sys.exit(1)
+    baseline_options = [name for name in BASELINE_OPTIONS if name in options or name in flags]
+    if baseline_options and "stages" not in names:
+        print(f"❌ Baseline options are for the stages benchmark only: {', '.join(baseline_options)}")
+        print_usage()
+        sys.exit(1)
+    baseline_path = options.get("--baseline", DEFAULT_BASELINE)
+    if "--check" in flags and not os.path.isfile(baseline_path):
+        print(f"❌ No baseline to check against: {baseline_path}")
+        print("   Save one first with --save-baseline (or point --baseline at an existing file)")
+        sys.exit(EXIT_NO_BASELINE)
+
+    all_identical = True
+    stage_rows = []
+    for name in names:
+        results = run_benchmark(name, sizes, kinds)
+        if name == "stages":
+            stage_rows = results
+        else:
+            all_identical = all_identical and all(r["identical"] is not False for r in results)
+        print()
+
+    if stage_rows and "--save-baseline" in flags:
+        save_baseline(stage_rows, baseline_path)
+    if stage_rows and "--check" in flags:
+        failures = compare_baseline(stage_rows, baseline_path, max_regression)
+        if failures:
+            print(f"❌ {len(failures)} result(s) drifted past the baseline ({baseline_path}):")
+            for failure in failures:
+                print(f"   {failure}")
+            sys.exit(1)
+        print(f"✅ Within {max_regression:.0%} of the baseline")
+    sys.exit(0 if all_identical else 1)
@@ -0,0 +1,204 @@
+"""
+Persistent Cache for FG/BG Separation Results
+Stores the _FG/_BG files produced by bg_simple, keyed by image content + settings
+Can be used as a module or standalone script (inspect / prune the cache)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tiktok-faceless", "bg_cache")
+DEFAULT_MAX_MB = 2048
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(content_hash, settings):
+    """Combine an image content hash with the effective separation settings"""
+    settings_blob = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{content_hash}|{settings_blob}".encode("utf-8")).hexdigest()
+
+
+def link_or_copy(src, dest):
+    """Hardlink src to dest, falling back to a copy across filesystems"""
+    if os.path.exists(dest):
+        os.unlink(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+class SeparationCache:
+    """Content-addressed, size-capped (LRU) store of FG/BG result files"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "index.sqlite")
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, files TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _entry_path(self, key, name):
+        return os.path.join(self.objects_dir, key[:2], f"{key}_{name}")
+
+    def _bump(self, db, name):
+        db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key, dest_paths):
+        """
+        Link cached files for key to dest_paths
+
+        Args:
+            key: Cache key from make_key()
+            dest_paths: dict mapping stored file name (e.g. "FG.png") to destination path
+
+        Returns:
+            bool: True on a cache hit
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT files FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or sorted(json.loads(row[0])) != sorted(dest_paths):
+                self._bump(db, "misses")
+                return False
+            try:
+                for name, dest in dest_paths.items():
+                    link_or_copy(self._entry_path(key, name), dest)
+            except OSError:
+                # Files vanished from under the index - treat as a miss
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump(db, "misses")
+                return False
+            db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._bump(db, "hits")
+        return True
+
+    def put(self, key, src_paths):
+        """
+        Store result files under key and evict old entries above the size cap
+
+        Args:
+            key: Cache key from make_key()
+            src_paths: dict mapping stored file name (e.g. "FG.png") to source path
+        """
+        os.makedirs(os.path.dirname(self._entry_path(key, "")), exist_ok=True)
+        size = 0
+        for name, src in src_paths.items():
+            link_or_copy(src, self._entry_path(key, name))
+            size += os.path.getsize(src)
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, files, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(sorted(src_paths)), size, now, now),
+            )
+        self.prune(self.max_bytes)
+
+    def prune(self, max_bytes):
+        """Evict least recently used entries until the cache fits in max_bytes"""
+        removed = 0
+        with self._connect() as db:
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            for key, files, size in db.execute(
+                "SELECT key, files, size FROM entries ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= max_bytes:
+                    break
+                for name in json.loads(files):
+                    try:
+                        os.unlink(self._entry_path(key, name))
+                    except OSError:
+                        pass
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+            for _ in range(removed):
+                self._bump(db, "evictions")
+        return removed
+
+    def clear(self):
+        """Remove every cached entry (counters are kept)"""
+        return self.prune(0)
+
+    def stats(self):
+        """Return entry count, total size and hit/miss/eviction counters"""
+        with self._connect() as db:
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+
+# ============================================
+# COMMAND LINE USAGE
+# ============================================
+
+def print_usage():
+    print("Usage: python bg_cache.py stats")
+    print("       python bg_cache.py prune [max_mb]")
+    print("       python bg_cache.py clear")
+    print("Example: python bg_cache.py prune 500")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("stats", "prune", "clear"):
+        print_usage()
+        sys.exit(1)
+
+    # Use the same cache location and cap as bg_simple
+    import bg_simple
+    cache = SeparationCache(bg_simple.CACHE_DIR, bg_simple.CACHE_MAX_MB)
+    command = sys.argv[1]
+
+    if command == "prune":
+        max_mb = float(sys.argv[2]) if len(sys.argv) > 2 else bg_simple.CACHE_MAX_MB
+        removed = cache.prune(int(max_mb * 1024 * 1024))
+        print(f"🧹 Evicted {removed} entries (cap: {max_mb:g} MB)")
+    elif command == "clear":
+        removed = cache.clear()
+        print(f"🧹 Removed {removed} entries")
+
+    s = cache.stats()
+    lookups = s["hits"] + s["misses"]
+    hit_rate = (s["hits"] / lookups * 100) if lookups else 0.0
+    print(f"📦 Cache: {cache.cache_dir}")
+    print(f"   Entries: {s['entries']}")
+    print(f"   Size: {s['size_bytes'] / 1024 / 1024:.1f} MB / {s['max_bytes'] / 1024 / 1024:.0f} MB")
+    print(f"   Hits: {s['hits']} | Misses: {s['misses']} | Hit rate: {hit_rate:.1f}%")
+    print(f"   Evictions: {s['evictions']}")
@@ -7,8 +7,15 @@ Can be used as a module or standalone script
 import cv2
 import numpy as np
 from PIL import Image 
+import contextlib
+import functools
+import glob
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import bg_cache
+from png_stream import PngStreamWriter
 
 # ============================================
 # QUICK SETTINGS - ADJUST THESE
@@ -17,192 +24,1046 @@ import os
 # Background color detection
 # True = auto-detect (recommended), False = use manual color below
 AUTO_DETECT = True
-MANUAL_BG_COLOR = [255, 255, 255]  # White background [R, G, B]
+MANUAL_BG_COLOR = [255, 255, 255]  # White background [R, G, B], also the fallback for unclear borders
+BG_BORDER_FRACTION = 0.01  # Width of the border strip sampled for detection (fraction of the shorter side)
+BG_MIN_CONFIDENCE = 0.6    # Share of the strip the detected colour must cover, else MANUAL_BG_COLOR is used
 
 # How much color variation to treat as background (10-80)
 # Lower = stricter (only exact color), Higher = more flexible
 COLOR_TOLERANCE = 12  # Lower value = MORE foreground (background must be closer to exact color)
 
+# Automatic tolerance, chosen per image from one histogram of colour distances
+# None = always use COLOR_TOLERANCE
+# "band" = nearest tolerance to COLOR_TOLERANCE that gives AUTO_FG_BAND % foreground
+# "otsu" = tolerance that best splits the distances into background and foreground
+AUTO_TOLERANCE = None
+AUTO_FG_BAND = (20, 80)         # Target foreground % range for "band"
+AUTO_TOLERANCE_RANGE = (2, 60)  # Tolerances the automatic modes may pick
+
 # Advanced options
 SMOOTH_EDGES = True
 BLUR_AMOUNT = 3        # Edge smoothing (1-7)
 REMOVE_NOISE = True
 MIN_SIZE = 200         # Remove regions smaller than this
+# Coarse-to-fine masks: 1 = full resolution, 2-4 = find the mask on a copy shrunk by
+# this factor, then recompute only a narrow band around its edges at full resolution
+MASK_SCALE = 1
+
+# Output encoding (encoding is often the slowest step on large images)
+# "png" = lossless PNG, "webp" = lossless WebP, "webp_lossy" = lossy WebP (alpha kept)
+OUTPUT_FORMAT = "png"
+PNG_COMPRESS_LEVEL = 6 # 0-9, lower = faster and bigger files (1 is much faster than 6)
+WEBP_QUALITY = 90      # Lossy quality, or compression effort for lossless WebP (0-100, ~25 is fast)
+WEBP_METHOD = 4        # 0-6, lower = faster encoding
+# True = use the original file as the BG layer (linked, not decoded or re-encoded)
+BG_FROM_ORIGINAL = False
+
+# Bounded memory: images whose working set would exceed this many MB are processed
+# in horizontal strips and streamed to PNG (same output), 0 = always whole images.
+# Only the decoded image itself (3 bytes per pixel) is held in full.
+MEMORY_BUDGET_MB = 0
+
+# Result cache - repeated images are linked from disk instead of reprocessed
+CACHE_ENABLED = True
+CACHE_DIR = bg_cache.DEFAULT_CACHE_DIR
+CACHE_MAX_MB = 2048    # Least recently used results are evicted above this size
+
+# Bump when the processing below changes output for the same settings
+CACHE_VERSION = 3
+
+# Batch mode (process_images / directory input)
+WORKERS = 0            # Parallel worker processes, 0 = all CPU cores
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Settings copied into batch worker processes so they match the caller's
+_SETTING_NAMES = (
+    "AUTO_DETECT", "MANUAL_BG_COLOR", "BG_BORDER_FRACTION", "BG_MIN_CONFIDENCE", "COLOR_TOLERANCE", "AUTO_TOLERANCE", "AUTO_FG_BAND",
+    "AUTO_TOLERANCE_RANGE", "SMOOTH_EDGES", "BLUR_AMOUNT",
+    "REMOVE_NOISE", "MIN_SIZE", "MASK_SCALE", "OUTPUT_FORMAT", "PNG_COMPRESS_LEVEL", "WEBP_QUALITY",
+    "WEBP_METHOD", "BG_FROM_ORIGINAL", "MEMORY_BUDGET_MB", "CACHE_ENABLED", "CACHE_DIR", "CACHE_MAX_MB",
+)
+
+OUTPUT_FORMATS = {"png": ".png", "webp": ".webp", "webp_lossy": ".webp"}
+AUTO_TOLERANCE_MODES = (None, "band", "otsu")
 
 # ============================================
 # PROCESSING FUNCTION
 # ============================================
 
-def process_image(input_path, output_dir=None, verbose=True):
+_cache = None
+
+
+def get_cache():
+    """Return the shared result cache, or None when caching is disabled"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None or _cache.cache_dir != CACHE_DIR:
+        _cache = bg_cache.SeparationCache(CACHE_DIR, CACHE_MAX_MB)
+    return _cache
+
+
+def settings_fingerprint():
+    """Effective settings that influence the FG/BG output (part of the cache key)"""
+    return {
+        "version": CACHE_VERSION,
+        "auto_detect": AUTO_DETECT,
+        "manual_bg_color": [int(c) for c in MANUAL_BG_COLOR],
+        "bg_border_fraction": BG_BORDER_FRACTION if AUTO_DETECT else None,
+        "bg_min_confidence": BG_MIN_CONFIDENCE if AUTO_DETECT else None,
+        "color_tolerance": COLOR_TOLERANCE if AUTO_TOLERANCE != "otsu" else None,
+        "auto_tolerance": AUTO_TOLERANCE,
+        "auto_fg_band": list(AUTO_FG_BAND) if AUTO_TOLERANCE == "band" else None,
+        "auto_tolerance_range": list(AUTO_TOLERANCE_RANGE) if AUTO_TOLERANCE else None,
+        "smooth_edges": SMOOTH_EDGES,
+        "blur_amount": BLUR_AMOUNT if SMOOTH_EDGES else None,
+        "remove_noise": REMOVE_NOISE,
+        "min_size": MIN_SIZE if REMOVE_NOISE else None,
+        "mask_scale": MASK_SCALE if MASK_SCALE > 1 else None,
+        "output_format": OUTPUT_FORMAT,
+        "png_compress_level": PNG_COMPRESS_LEVEL if OUTPUT_FORMAT == "png" else None,
+        "webp_quality": WEBP_QUALITY if OUTPUT_FORMAT != "png" else None,
+        "webp_method": WEBP_METHOD if OUTPUT_FORMAT != "png" else None,
+        "bg_from_original": BG_FROM_ORIGINAL,
+    }
+
+
+def cache_key_for(source_path, extra=None):
     """
-    Process an image to separate foreground and background
+    Cache key of the result for source_path: its content hash plus the settings
+    (and extra, e.g. how the file fed to process_image was derived from it)
+    """
+    settings = settings_fingerprint()
+    if extra:
+        settings["extra"] = extra
+    return bg_cache.make_key(bg_cache.hash_file(source_path), settings)
+
+
+def lookup_cached(input_path, output_dir, cache_key):
+    """
+    Link the cached result for cache_key to the outputs of input_path (which
+    need not exist yet)
+
+    Returns:
+        tuple: (fg_filename, bg_filename), or None on a miss
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    fg_filename, bg_filename = output_paths(input_path, output_dir)
+    if cache.get(cache_key, cache_files(fg_filename, bg_filename)):
+        return fg_filename, bg_filename
+    return None
+
+
+def bg_is_original(input_path):
+    """True when the BG layer is the original file rather than a re-encoded copy"""
+    return BG_FROM_ORIGINAL and input_path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def output_paths(input_path, output_dir=None):
+    """Return the (fg_filename, bg_filename) process_image writes for input_path"""
+    base_name, input_ext = os.path.splitext(os.path.basename(input_path))
+    if output_dir is None:
+        output_dir = os.path.dirname(input_path)
+    if OUTPUT_FORMAT not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown OUTPUT_FORMAT: {OUTPUT_FORMAT} (use one of {', '.join(OUTPUT_FORMATS)})")
+    fg_ext = OUTPUT_FORMATS[OUTPUT_FORMAT]
+    bg_ext = input_ext if bg_is_original(input_path) else fg_ext
+    return (os.path.join(output_dir, f"{base_name}_FG{fg_ext}"),
+            os.path.join(output_dir, f"{base_name}_BG{bg_ext}"))
+
+
+def cache_files(fg_filename, bg_filename):
+    """Cache entry names for the two outputs (e.g. "FG.png", "BG.jpg")"""
+    return {"FG" + os.path.splitext(fg_filename)[1].lower(): fg_filename,
+            "BG" + os.path.splitext(bg_filename)[1].lower(): bg_filename}
+
+
+MAX_SQ_DIFF = 3 * 255**2
+_SQUARES = np.arange(256, dtype=np.int32) ** 2
+
+
+@functools.lru_cache(maxsize=None)
+def tolerance_to_sq_threshold(tolerance):
+    """
+    Smallest squared RGB distance counted as foreground at this tolerance
     
-    Args:
-        input_path: Path to input image
-        output_dir: Directory to save outputs (default: same as input)
-        verbose: Print progress messages
+    Evaluates the percentage formula (sqrt(d2) / sqrt(3*255^2) * 100 > tolerance)
+    for every possible integer squared distance, so comparing d2 against the
+    result gives exactly the same mask as the float formula.
+    """
+    d2 = np.arange(MAX_SQ_DIFF + 1, dtype=float)
+    passing = np.flatnonzero((np.sqrt(d2) / np.sqrt(MAX_SQ_DIFF)) * 100 > tolerance)
+    return int(passing[0]) if passing.size else MAX_SQ_DIFF + 1
+
+
+def is_byte_color(bg_color):
+    """True for whole-number colours in 0-255 (the fast integer distance path)"""
+    bg = np.asarray(bg_color)
+    return bool(np.all(bg == np.round(bg)) and np.all((bg >= 0) & (bg <= 255)))
+
+
+def color_distance_sq(img_rgb, bg_color):
+    """Squared RGB distance of every pixel from a byte colour (int32 array)"""
+    bg = np.asarray(bg_color)
+    absdiff = cv2.absdiff(img_rgb, (float(bg[0]), float(bg[1]), float(bg[2]), 0.0))
+    dist_sq = _SQUARES[absdiff[:, :, 0]]
+    dist_sq += _SQUARES[absdiff[:, :, 1]]
+    dist_sq += _SQUARES[absdiff[:, :, 2]]
+    return dist_sq
+
+
+def compute_foreground_mask(img_rgb, bg_color, tolerance, dist_sq=None):
+    """
+    Mark pixels whose colour distance from bg_color exceeds tolerance (0-100%)
+    
+    Works on uint8 absolute differences and int32 squared distances, so no
+    image-sized float64 arrays are allocated. Pass dist_sq from
+    color_distance_sq to reuse distances that were already computed.
     
     Returns:
-        tuple: (fg_filename, bg_filename) paths to generated files
+        numpy.ndarray: uint8 mask, 255 = foreground
     """
-    if verbose:
-        print("="*60)
-        print("🎨 Simple Background Removal for Comics")
-        print("="*60)
+    if not is_byte_color(bg_color):
+        # Fractional or out-of-range colours need the float formula
+        diff = np.sqrt(np.sum((img_rgb.astype(float) - np.asarray(bg_color))**2, axis=2))
+        diff_percent = (diff / np.sqrt(MAX_SQ_DIFF)) * 100
+        return (diff_percent > tolerance).astype(np.uint8) * 255
     
-    # Load image
+    if dist_sq is None:
+        dist_sq = color_distance_sq(img_rgb, bg_color)
+    return cv2.compare(dist_sq, tolerance_to_sq_threshold(tolerance), cv2.CMP_GE)
+
+
+def foreground_counts(dist_sq):
+    """
+    Foreground pixel count at every integer tolerance 0-100, and the pixel count
+    
+    One histogram of the squared distances gives the mask size for every
+    tolerance, so candidates are compared without building their masks.
+    
+    Returns:
+        tuple: (counts per tolerance, total pixels including exact background matches)
+    """
+    return histogram_foreground_counts(np.bincount(dist_sq.ravel(), minlength=MAX_SQ_DIFF + 1))
+
+
+def histogram_foreground_counts(counts):
+    """foreground_counts from a histogram of squared distances (e.g. summed over strips)"""
+    # at_least[d] = pixels with dist_sq >= d
+    at_least = np.append(np.cumsum(counts[::-1])[::-1], 0)
+    thresholds = [min(tolerance_to_sq_threshold(t), MAX_SQ_DIFF + 1) for t in range(101)]
+    return at_least[thresholds], int(at_least[0])
+
+
+def choose_tolerance(fg_counts, total, mode=None):
+    """
+    Pick a tolerance from foreground_counts (mode: "band" or "otsu", default AUTO_TOLERANCE)
+    
+    Shares are of all total pixels, including those that match the background
+    colour exactly (below every tolerance).
+    
+    "band" keeps COLOR_TOLERANCE when its foreground share is inside AUTO_FG_BAND,
+    otherwise moves to the nearest tolerance that is. "otsu" treats the pixels
+    in each 1% distance step as a histogram and splits it where the variance
+    between the background and foreground classes is largest. The result is
+    limited to AUTO_TOLERANCE_RANGE.
+    """
+    mode = mode or AUTO_TOLERANCE
+    low, high = AUTO_TOLERANCE_RANGE
+    candidates = np.arange(low, high + 1)
+    total = total or 1
+    if mode == "band":
+        share = fg_counts[candidates] / total * 100
+        inside = candidates[(share >= AUTO_FG_BAND[0]) & (share <= AUTO_FG_BAND[1])]
+        if inside.size:
+            return int(inside[np.argmin(np.abs(inside - COLOR_TOLERANCE))])
+        # Band unreachable: the tolerance that comes closest to it
+        miss = np.maximum(AUTO_FG_BAND[0] - share, share - AUTO_FG_BAND[1])
+        return int(candidates[np.argmin(miss)])
+    if mode == "otsu":
+        # Pixels whose distance is in (t, t+1] percent (level t), exact matches at
+        # level -1, and the class statistics of splitting at each t:
+        # background = levels below t, foreground = t and above
+        bins = np.append(total - fg_counts[0], fg_counts - np.append(fg_counts[1:], 0)).astype(float)
+        levels = np.arange(-1, bins.size - 1)
+        bg_weight = np.cumsum(bins) - bins
+        bg_sum = np.cumsum(bins * levels) - bins * levels
+        fg_weight = total - bg_weight
+        fg_sum = (bins * levels).sum() - bg_sum
+        with np.errstate(divide="ignore", invalid="ignore"):
+            between = bg_weight * fg_weight * (bg_sum / bg_weight - fg_sum / fg_weight) ** 2
+        between = np.nan_to_num(between[candidates + 1])
+        return int(candidates[np.argmax(between)])
+    raise ValueError(f"Unknown AUTO_TOLERANCE: {mode} (use one of {', '.join(str(m) for m in AUTO_TOLERANCE_MODES)})")
+
+
+# Coarse-to-fine needs this many proxy pixels on the short side to be worth it
+_MIN_PROXY_SIDE = 64
+
+
+def mask_scale(img_rgb, bg_color):
+    """Effective MASK_SCALE for an image (1 = full-resolution mask)"""
+    scale = int(MASK_SCALE)
+    if scale <= 1 or not is_byte_color(bg_color) or min(img_rgb.shape[:2]) // scale < _MIN_PROXY_SIDE:
+        return 1
+    return scale
+
+
+def downscale(img_rgb, scale):
+    """Area-averaged 1/scale proxy of an image"""
+    h, w = img_rgb.shape[:2]
+    return cv2.resize(img_rgb, (w // scale, h // scale), interpolation=cv2.INTER_AREA)
+
+
+# Edge refinement recomputes the full-resolution mask in tiles of this many proxy pixels
+_REFINE_TILE = 64
+
+
+def refine_mask_edges(img_rgb, coarse_mask, bg_color, tolerance):
+    """
+    Upsample a proxy mask to img_rgb's size, recomputing pixels near its edges
+    
+    Proxy pixels on either side of a mask boundary (one proxy pixel of
+    dilation/erosion) are thresholded again from the real colours, tile by
+    tile, so areas without edges are never looked at in full resolution.
+    
+    Returns:
+        tuple: (full-size uint8 mask, number of refined pixels)
+    """
+    h, w = img_rgb.shape[:2]
+    ph, pw = coarse_mask.shape
+    kernel = np.ones((3, 3), np.uint8)
+    band = cv2.compare(cv2.dilate(coarse_mask, kernel), cv2.erode(coarse_mask, kernel), cv2.CMP_NE)
+    mask = cv2.resize(coarse_mask, (w, h), interpolation=cv2.INTER_NEAREST)
+    refined = 0
+    for py in range(0, ph, _REFINE_TILE):
+        for px in range(0, pw, _REFINE_TILE):
+            band_tile = band[py:py + _REFINE_TILE, px:px + _REFINE_TILE]
+            if not cv2.countNonZero(band_tile):
+                continue
+            # Full-resolution extent of the tile (the last row/column also covers the
+            # pixels lost when the proxy size was rounded down)
+            y0, x0 = py * h // ph, px * w // pw
+            y1 = h if py + _REFINE_TILE >= ph else (py + _REFINE_TILE) * h // ph
+            x1 = w if px + _REFINE_TILE >= pw else (px + _REFINE_TILE) * w // pw
+            band_full = cv2.resize(band_tile, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST)
+            fine = compute_foreground_mask(img_rgb[y0:y1, x0:x1], bg_color, tolerance)
+            np.copyto(mask[y0:y1, x0:x1], fine, where=band_full > 0)
+            refined += cv2.countNonZero(band_full)
+    return mask, refined
+
+
+def pyramid_foreground_mask(img_rgb, bg_color, tolerance, scale, min_size=None):
+    """
+    Coarse-to-fine counterpart of compute_foreground_mask + remove_small_components
+    
+    Distance, threshold and noise removal (min_size scaled down with the area)
+    run on the 1/scale proxy; only the edge band is refined at full resolution.
+    
+    Returns:
+        tuple: (uint8 mask, removed_count, refined_count)
+    """
+    coarse = compute_foreground_mask(downscale(img_rgb, scale), bg_color, tolerance)
+    removed_count = 0
+    if min_size:
+        coarse, removed_count = remove_small_components(coarse, max(1, round(min_size / scale**2)))
+    mask, refined_count = refine_mask_edges(img_rgb, coarse, bg_color, tolerance)
+    return mask, removed_count, refined_count
+
+
+def remove_small_components(mask, min_size):
+    """
+    Drop 8-connected foreground regions smaller than min_size pixels
+    
+    Uses one area lookup table indexed by the label image, so the cost is a
+    single pass regardless of how many regions the mask contains.
+    
+    Returns:
+        tuple: (cleaned_mask, removed_count)
+    """
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_size
+    keep[0] = False  # Label 0 is the background
+    lut = keep.astype(np.uint8) * 255
+    removed_count = (num_labels - 1) - int(np.count_nonzero(keep))
+    return lut[labels], removed_count
+
+
+# Border pixels looked at by background detection at most (the strip is strided above this)
+_BG_MAX_SAMPLES = 100_000
+_BG_QUANT_SHIFT = 3  # 5 bits per channel -> 32768 histogram bins
+
+
+def border_strip_pixels(img_rgb):
+    """Pixels of a thin strip along all four edges, as an (n, 3) array"""
+    h, w = img_rgb.shape[:2]
+    width = max(1, min(int(round(min(h, w) * BG_BORDER_FRACTION)), min(h, w) // 2))
+    # A stride keeps the sample count (and the time taken) flat on huge images
+    step = max(1, int(np.ceil(np.sqrt(2 * (h + w) * width / _BG_MAX_SAMPLES))))
+    strips = [
+        img_rgb[:width:step, ::step],
+        img_rgb[h-width::step, ::step],
+        img_rgb[width:h-width:step, :width:step],
+        img_rgb[width:h-width:step, w-width::step],
+    ]
+    return np.concatenate([strip.reshape(-1, 3) for strip in strips])
+
+
+def estimate_background_color(img_rgb):
+    """
+    Dominant colour of the image border and how much of the border it covers
+    
+    Border pixels are quantized to 5 bits per channel and counted with one
+    bincount; the fullest bin and its direct neighbours (so a colour on a bin
+    boundary isn't split) form the background. A dark panel touching one
+    corner only lowers the confidence instead of shifting the colour.
+    
+    Returns:
+        tuple: (colour as int array [R, G, B], confidence 0-1)
+    """
+    samples = border_strip_pixels(img_rgb)
+    quantized = samples >> _BG_QUANT_SHIFT
+    bits = 8 - _BG_QUANT_SHIFT
+    index = (quantized[:, 0].astype(np.int32) << (2 * bits)) | (quantized[:, 1].astype(np.int32) << bits) | quantized[:, 2]
+    mode = int(np.argmax(np.bincount(index, minlength=1 << (3 * bits))))
+    mode_rgb = np.array([mode >> (2 * bits), (mode >> bits) & ((1 << bits) - 1), mode & ((1 << bits) - 1)], dtype=np.int16)
+    near = np.all(np.abs(quantized.astype(np.int16) - mode_rgb) <= 1, axis=1)
+    color = np.round(samples[near].mean(axis=0)).astype(int)
+    return color, float(near.mean())
+
+
+def detect_background_color(img_rgb):
+    """Background colour from the border strip, MANUAL_BG_COLOR when the border has no clear colour"""
+    color, confidence = estimate_background_color(img_rgb)
+    return color if confidence >= BG_MIN_CONFIDENCE else np.array(MANUAL_BG_COLOR)
+
+
+def smooth_mask(mask):
+    """Close small gaps and blur the mask edges (SMOOTH_EDGES / BLUR_AMOUNT)"""
+    # Slight morphological closing to fill gaps
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    
+    # Gaussian blur for smooth edges
+    return cv2.GaussianBlur(mask, (BLUR_AMOUNT, BLUR_AMOUNT), 0)
+
+
+def save_layer(array, filename):
+    """Encode one layer in OUTPUT_FORMAT"""
+    image = Image.fromarray(array)
+    if OUTPUT_FORMAT == "webp":
+        image.save(filename, "WEBP", lossless=True, quality=WEBP_QUALITY, method=WEBP_METHOD)
+    elif OUTPUT_FORMAT == "webp_lossy":
+        image.save(filename, "WEBP", quality=WEBP_QUALITY, method=WEBP_METHOD)
+    else:
+        image.save(filename, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+def write_outputs(img_rgb, mask, fg_filename, bg_filename, input_path=None):
+    """
+    Save the FG (image + mask as alpha) and BG (original image) files
+    
+    With BG_FROM_ORIGINAL and input_path given, the BG file is a link to (or
+    copy of) the original file instead of a re-encoded image.
+    """
+    # Outputs may be hardlinks into the cache - never write through them
+    for filename in (fg_filename, bg_filename):
+        if os.path.lexists(filename):
+            os.unlink(filename)
+    
+    # Foreground with transparency
+    fg_rgba = np.dstack((img_rgb, mask))
+    save_layer(fg_rgba, fg_filename)
+    
+    # Keep original image as background (no alpha channel modification)
+    if input_path is not None and bg_is_original(input_path):
+        bg_cache.link_or_copy(input_path, bg_filename)
+    else:
+        save_layer(img_rgb, bg_filename)
+
+
+# ============================================
+# BOUNDED-MEMORY (STRIP) MODE
+# ============================================
+
+# Measured peak bytes per pixel on top of the decoded image: whole image / one strip
+_IN_MEMORY_BYTES_PER_PIXEL = 14
+_STRIP_BYTES_PER_PIXEL = 40
+_MIN_STRIP_ROWS = 16
+
+
+def smooth_halo():
+    """Rows above and below a strip that smooth_mask reads (two closings, then the blur)"""
+    return 4 + BLUR_AMOUNT // 2 + 2
+
+
+def strip_rows(h, w):
+    """Rows per strip within MEMORY_BUDGET_MB, or None when the whole image fits in it"""
+    if not MEMORY_BUDGET_MB:
+        return None
+    budget = MEMORY_BUDGET_MB * 1024**2
+    if h * w * _IN_MEMORY_BYTES_PER_PIXEL <= budget:
+        return None
+    return int(max(budget // (w * _STRIP_BYTES_PER_PIXEL), _MIN_STRIP_ROWS, smooth_halo()))
+
+
+def iter_strips(img_bgr, rows):
+    """(y0, RGB strip) for consecutive strips of rows, converted one at a time"""
+    for y0 in range(0, img_bgr.shape[0], rows):
+        yield y0, cv2.cvtColor(img_bgr[y0:y0 + rows], cv2.COLOR_BGR2RGB)
+
+
+def strip_foreground_counts(img_bgr, bg_color, rows):
+    """foreground_counts of the whole image (counts, total), from a distance histogram summed over strips"""
+    counts = np.zeros(MAX_SQ_DIFF + 1, dtype=np.int64)
+    for _, rgb in iter_strips(img_bgr, rows):
+        counts += np.bincount(color_distance_sq(rgb, bg_color).ravel(), minlength=MAX_SQ_DIFF + 1)
+    return histogram_foreground_counts(counts)
+
+
+def _boundary_pairs(above, below):
+    """Component ids that touch (8-connected) across two adjacent label rows, as (n, 2); -1 = background"""
+    pairs = []
+    for a, b in ((above, below), (above[1:], below[:-1]), (above[:-1], below[1:])):
+        touching = (a >= 0) & (b >= 0)
+        pairs.append(np.stack((a[touching], b[touching]), axis=1))
+    # A region crossing the boundary touches along many pixels, but is one pair
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def merge_components(count, pairs):
+    """
+    Union-find over components joined by pairs; returns the root id of each of count components
+    
+    Only components touching a strip boundary take part, so the Python loop
+    runs over boundary pairs, not pixels.
+    """
+    roots = np.arange(count)
+    if not len(pairs):
+        return roots
+    nodes, compact = np.unique(pairs, return_inverse=True)
+    parent = list(range(nodes.size))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for a, b in compact.reshape(-1, 2).tolist():
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    roots[nodes] = nodes[[find(i) for i in range(nodes.size)]]
+    return roots
+
+
+def _strip_labels(rgb, bg_color, tolerance):
+    """Foreground mask of one strip and its 8-connected labels and stats"""
+    mask = compute_foreground_mask(rgb, bg_color, tolerance)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    return mask, count, labels, stats
+
+
+def strip_component_filter(img_bgr, bg_color, tolerance, rows, min_size):
+    """
+    First pass of noise removal in strip mode: which components of the whole mask to keep
+    
+    Every strip is labelled on its own and components that touch across a
+    strip boundary are merged, so a region spanning several strips is measured
+    at its full size, exactly as remove_small_components would.
+    
+    Returns:
+        tuple: ((keep per component, first component id per strip), initial foreground
+            pixels, removed_count)
+    """
+    sizes, offsets, pairs = [], [], []
+    total = initial = 0
+    last_row = None
+    for _, rgb in iter_strips(img_bgr, rows):
+        mask, count, labels, stats = _strip_labels(rgb, bg_color, tolerance)
+        initial += cv2.countNonZero(mask)
+        first_row = np.where(labels[0] > 0, labels[0].astype(np.int64) + (total - 1), -1)
+        if last_row is not None:
+            pairs.append(_boundary_pairs(last_row, first_row))
+        last_row = np.where(labels[-1] > 0, labels[-1].astype(np.int64) + (total - 1), -1)
+        offsets.append(total)
+        sizes.append(stats[1:, cv2.CC_STAT_AREA].astype(np.int64))
+        total += count - 1
+    
+    sizes = np.concatenate(sizes)
+    roots = merge_components(total, np.concatenate(pairs) if pairs else [])
+    area = np.bincount(roots, weights=sizes, minlength=total)
+    keep = area[roots] >= min_size
+    removed_count = int(np.count_nonzero((roots == np.arange(total)) & (area < min_size)))
+    return (keep, offsets), initial, removed_count
+
+
+def strip_masks(img_bgr, bg_color, tolerance, rows, components=None):
+    """(y0, RGB strip, mask) per strip, with small regions removed when components are given"""
+    for index, (y0, rgb) in enumerate(iter_strips(img_bgr, rows)):
+        if components is None:
+            yield y0, rgb, compute_foreground_mask(rgb, bg_color, tolerance)
+            continue
+        # Same strips, so the labels match the first pass
+        keep, offsets = components
+        _, count, labels, _ = _strip_labels(rgb, bg_color, tolerance)
+        lut = np.zeros(count, dtype=np.uint8)
+        lut[1:] = keep[offsets[index]:offsets[index] + count - 1] * 255
+        yield y0, rgb, lut[labels]
+
+
+def smooth_strips(strips):
+    """
+    smooth_mask over a stream of strips, with the same result as on the whole mask
+    
+    Each strip is smoothed together with smooth_halo() rows of its neighbours,
+    so only the next strip is read ahead.
+    """
+    halo = smooth_halo()
+    above = None
+    pending = None
+    for strip in strips:
+        if pending is not None:
+            yield _smooth_strip(pending, above, strip[2][:halo])
+            above = pending[2][-halo:]
+        pending = strip
+    if pending is not None:
+        yield _smooth_strip(pending, above, None)
+
+
+def _smooth_strip(strip, above, below):
+    y0, rgb, mask = strip
+    parts = [part for part in (above, mask, below) if part is not None]
+    top = 0 if above is None else above.shape[0]
+    return y0, rgb, smooth_mask(np.vstack(parts))[top:top + mask.shape[0]]
+
+
+def write_strips(strips, width, height, fg_filename, bg_filename, input_path=None):
+    """
+    Stream (y0, RGB, mask) strips into the FG and BG PNGs (write_outputs for strip mode)
+    
+    Returns:
+        int: Foreground pixels (mask > 127)
+    """
+    for filename in (fg_filename, bg_filename):
+        if os.path.lexists(filename):
+            os.unlink(filename)
+    bg_original = input_path is not None and bg_is_original(input_path)
+    if bg_original:
+        bg_cache.link_or_copy(input_path, bg_filename)
+    
+    fg_count = 0
+    with contextlib.ExitStack() as stack:
+        fg_png = stack.enter_context(PngStreamWriter(fg_filename, width, height, 4, PNG_COMPRESS_LEVEL))
+        bg_png = None if bg_original else stack.enter_context(
+            PngStreamWriter(bg_filename, width, height, 3, PNG_COMPRESS_LEVEL))
+        for _, rgb, mask in strips:
+            fg_png.write(np.dstack((rgb, mask)))
+            if bg_png is not None:
+                bg_png.write(rgb)
+            fg_count += cv2.countNonZero(cv2.compare(mask, 127, cv2.CMP_GT))
+    return fg_count
+
+
+def separate_in_strips(img_bgr, bg_color, rows, fg_filename, bg_filename, input_path=None, verbose=True):
+    """
+    Separation for images over MEMORY_BUDGET_MB, one strip of rows at a time
+    
+    Produces the same FG/BG pixels as the whole-image path (MASK_SCALE is not
+    used). Strips are thresholded twice when noise is removed (and once more
+    for AUTO_TOLERANCE) instead of keeping image-sized arrays around.
+    
+    Returns:
+        tuple: (tolerance, auto, foreground pixel count)
+    """
+    h, w = img_bgr.shape[:2]
     if verbose:
-        print(f"\n📥 Loading: {os.path.basename(input_path)}")
+        print(f"\n🧩 Strip mode: {-(-h // rows)} strips of {rows} rows (MEMORY_BUDGET_MB = {MEMORY_BUDGET_MB})"
+              + (", MASK_SCALE not used" if MASK_SCALE > 1 else ""))
     
-    img = cv2.imread(input_path)
-    if img is None:
+    tolerance = COLOR_TOLERANCE
+    auto = bool(AUTO_TOLERANCE) and is_byte_color(bg_color)
+    if auto:
+        fg_counts, total = strip_foreground_counts(img_bgr, bg_color, rows)
+        tolerance = choose_tolerance(fg_counts, total)
         if verbose:
-            print(f"❌ Error: Could not load image: {input_path}")
-        return None, None
+            print(f"\n🎯 Auto tolerance ({AUTO_TOLERANCE}): {tolerance} "
+                  f"({fg_counts[tolerance] / total * 100:.1f}% foreground before cleanup)")
     
-    h, w = img.shape[:2]
     if verbose:
-        print(f"   ✓ Size: {w}x{h} pixels")
-    
-    # Convert to RGB for PIL
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        print(f"\n🔍 Separating foreground (tolerance: {tolerance})...")
     
-    # Detect background color
-    if AUTO_DETECT:
-        # Sample corners - background is usually at edges
-        margin = min(h, w) // 10
-        corners = [
-            img_rgb[0:margin, 0:margin],
-            img_rgb[0:margin, w-margin:w],
-            img_rgb[h-margin:h, 0:margin],
-            img_rgb[h-margin:h, w-margin:w]
-        ]
-        bg_color = np.mean([np.mean(c, axis=(0,1)) for c in corners], axis=0).astype(int)
+    components = None
+    if REMOVE_NOISE:
+        components, initial, removed_count = strip_component_filter(img_bgr, bg_color, tolerance, rows, MIN_SIZE)
         if verbose:
-            print(f"\n🎨 Auto-detected background: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
-    else:
-        bg_color = np.array(MANUAL_BG_COLOR)
+            print(f"   Initial: {initial / (h*w) * 100:.1f}% foreground")
+            if removed_count > 0:
+                print(f"   Removed {removed_count} noise regions")
+    
+    strips = strip_masks(img_bgr, bg_color, tolerance, rows, components)
+    if SMOOTH_EDGES:
+        strips = smooth_strips(strips)
         if verbose:
-            print(f"\n🎨 Using manual background: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
+            print(f"   Edge smoothing applied while saving")
     
-    # Calculate color difference from background
     if verbose:
-        print(f"\n🔍 Separating foreground (tolerance: {COLOR_TOLERANCE})...")
+        print(f"\n💾 Saving outputs (streamed strip by strip)...")
+    fg_count = write_strips(strips, w, h, fg_filename, bg_filename, input_path)
+    if verbose:
+        final_fg = fg_count / (h*w) * 100
+        print(f"   Final: {final_fg:.1f}% foreground / {100-final_fg:.1f}% background")
+    return tolerance, auto, fg_count
+
+
+def _separate_whole(img_rgb, bg_color, fg_filename, bg_filename, input_path=None, verbose=True):
+    """
+    Separation with the whole image in memory (see process_image)
     
-    diff = np.sqrt(np.sum((img_rgb.astype(float) - bg_color)**2, axis=2))
+    Returns:
+        tuple: (tolerance, auto, foreground pixel count)
+    """
+    h, w = img_rgb.shape[:2]
     
-    # Normalize to 0-100 range
-    max_diff = np.sqrt(3 * 255**2)
-    diff_percent = (diff / max_diff) * 100
+    # Calculate color difference from background (once, also for the tolerance choice).
+    # In coarse-to-fine mode (MASK_SCALE) this and noise removal run on a shrunk proxy.
+    scale = mask_scale(img_rgb, bg_color)
+    work_rgb = img_rgb if scale == 1 else downscale(img_rgb, scale)
+    tolerance = COLOR_TOLERANCE
+    dist_sq = None
+    auto = bool(AUTO_TOLERANCE) and is_byte_color(bg_color)
+    if auto:
+        dist_sq = color_distance_sq(work_rgb, bg_color)
+        fg_counts, total = foreground_counts(dist_sq)
+        tolerance = choose_tolerance(fg_counts, total)
+        if verbose:
+            print(f"\n🎯 Auto tolerance ({AUTO_TOLERANCE}): {tolerance} "
+                  f"({fg_counts[tolerance] / total * 100:.1f}% foreground before cleanup)")
+    
+    if verbose:
+        print(f"\n🔍 Separating foreground (tolerance: {tolerance})..."
+              + (f" on a 1/{scale} proxy" if scale > 1 else ""))
     
     # Create mask: pixels different from background = foreground
-    foreground_mask = (diff_percent > COLOR_TOLERANCE).astype(np.uint8) * 255
+    foreground_mask = compute_foreground_mask(work_rgb, bg_color, tolerance, dist_sq)
+    del dist_sq
     
     if verbose:
-        initial_fg = (np.sum(foreground_mask > 0) / (h*w)) * 100
+        initial_fg = (np.count_nonzero(foreground_mask) / foreground_mask.size) * 100
         print(f"   Initial: {initial_fg:.1f}% foreground")
     
-    # Remove noise
+    # Remove noise (minimum size scaled with the proxy's area)
     if REMOVE_NOISE:
-        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(foreground_mask, connectivity=8)
-        cleaned = np.zeros_like(foreground_mask)
-        removed_count = 0
-        for i in range(1, num_labels):
-            if stats[i, cv2.CC_STAT_AREA] >= MIN_SIZE:
-                cleaned[labels == i] = 255
-            else:
-                removed_count += 1
-        foreground_mask = cleaned
+        foreground_mask, removed_count = remove_small_components(foreground_mask, max(1, round(MIN_SIZE / scale**2)))
         if verbose and removed_count > 0:
             print(f"   Removed {removed_count} noise regions")
     
+    # Back to full resolution, recomputing only the pixels along the mask edges
+    if scale > 1:
+        foreground_mask, refined_count = refine_mask_edges(img_rgb, foreground_mask, bg_color, tolerance)
+        del work_rgb
+        if verbose:
+            print(f"   Refined {refined_count / (h*w) * 100:.1f}% of pixels (mask edges) at full resolution")
+    
     # Smooth edges
     if SMOOTH_EDGES:
-        # Slight morphological closing to fill gaps
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        foreground_mask = cv2.morphologyEx(foreground_mask, cv2.MORPH_CLOSE, kernel)
-    # Smooth edges
-    if SMOOTH_EDGES:
-        # Slight morphological closing to fill gaps
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        foreground_mask = cv2.morphologyEx(foreground_mask, cv2.MORPH_CLOSE, kernel)
-        
-        # Gaussian blur for smooth edges
-        foreground_mask = cv2.GaussianBlur(foreground_mask, (BLUR_AMOUNT, BLUR_AMOUNT), 0)
+        foreground_mask = smooth_mask(foreground_mask)
         if verbose:
             print(f"   Applied edge smoothing")
     
+    fg_count = int(np.count_nonzero(foreground_mask > 127))
     if verbose:
-        final_fg = (np.sum(foreground_mask > 127) / (h*w)) * 100
+        final_fg = fg_count / (h*w) * 100
         print(f"   Final: {final_fg:.1f}% foreground / {100-final_fg:.1f}% background")
     
-    # Get base filename and output directory
-    base_name = os.path.splitext(os.path.basename(input_path))[0]
-    if output_dir is None:
-        output_dir = os.path.dirname(input_path)
-    
     # Create outputs
     if verbose:
         print(f"\n💾 Saving outputs...")
     
-    # Foreground with transparency
-    fg_rgba = np.dstack((img_rgb, foreground_mask))
-    fg_filename = os.path.join(output_dir, f"{base_name}_FG.png")
-    Image.fromarray(fg_rgba).save(fg_filename)
+    write_outputs(img_rgb, foreground_mask, fg_filename, bg_filename, input_path)
+    return tolerance, auto, fg_count
+
+
+def process_image(input_path, output_dir=None, verbose=True, stats=None, cache_key=None):
+    """
+    Process an image to separate foreground and background
+    
+    Results are looked up in the on-disk cache first (see CACHE_ENABLED).
+    
+    Args:
+        input_path: Path to input image
+        output_dir: Directory to save outputs (default: same as input)
+        verbose: Print progress messages
+        stats: Optional dict filled with "tolerance", "auto" (tolerance chosen
+            by AUTO_TOLERANCE), "foreground" (final %), "bg_confidence",
+            "bg_fallback" (MANUAL_BG_COLOR used) and "cached"
+        cache_key: Key the caller already looked up (see cache_key_for); the
+            result is stored under it without a second lookup
+    
+    Returns:
+        tuple: (fg_filename, bg_filename) paths to generated files
+    """
     if verbose:
-        print(f"   ✓ {os.path.basename(fg_filename)}")
+        print("="*60)
+        print("🎨 Simple Background Removal for Comics")
+        print("="*60)
     
-    # Keep original image as background (no alpha channel modification)
-    bg_filename = os.path.join(output_dir, f"{base_name}_BG.png")
-    Image.fromarray(img_rgb).save(bg_filename)
+    fg_filename, bg_filename = output_paths(input_path, output_dir)
+    cache = None
+    try:
+        cache = get_cache()
+        if cache is None:
+            cache_key = None
+        elif cache_key is None and os.path.isfile(input_path):
+            cache_key = cache_key_for(input_path)
+            if cache.get(cache_key, cache_files(fg_filename, bg_filename)):
+                if stats is not None:
+                    stats["cached"] = True
+                if verbose:
+                    print(f"\n⚡ Cache hit: {os.path.basename(input_path)}")
+                    print(f"   ✓ {os.path.basename(fg_filename)} (cached)")
+                    print(f"   ✓ {os.path.basename(bg_filename)} (cached)")
+                return fg_filename, bg_filename
+    except (OSError, bg_cache.sqlite3.Error) as e:
+        # A broken cache must never stop processing
+        if verbose:
+            print(f"\n⚠ Cache unavailable: {e}")
+        cache_key = None
+    
+    # Load image
+    if verbose:
+        print(f"\n📥 Loading: {os.path.basename(input_path)}")
+    
+    img = cv2.imread(input_path)
+    if img is None:
+        if verbose:
+            print(f"❌ Error: Could not load image: {input_path}")
+        return None, None
+    
+    h, w = img.shape[:2]
+    if verbose:
+        print(f"   ✓ Size: {w}x{h} pixels")
+    
+    # Very large images are separated in strips (MEMORY_BUDGET_MB); the rest as a whole
+    rows = strip_rows(h, w)
+    if rows is not None and OUTPUT_FORMAT != "png":
+        if verbose:
+            print(f"\n⚠ Strip mode streams PNG only; processing the whole image ({OUTPUT_FORMAT})")
+        rows = None
+    
+    # Convert to RGB for PIL (strip mode converts one strip at a time)
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB) if rows is None else None
+    border_rgb = img_rgb if rows is None else img[:, :, ::-1]
+    
+    # Detect background color
+    bg_fallback = False
+    if AUTO_DETECT:
+        bg_color, confidence = estimate_background_color(border_rgb)
+        if confidence >= BG_MIN_CONFIDENCE:
+            if verbose:
+                print(f"\n🎨 Auto-detected background: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]}) "
+                      f"({confidence * 100:.0f}% of the border)")
+        else:
+            bg_fallback = True
+            if verbose:
+                print(f"\n⚠ Border has no clear background colour (best: RGB({bg_color[0]}, {bg_color[1]}, "
+                      f"{bg_color[2]}) on {confidence * 100:.0f}%), using MANUAL_BG_COLOR")
+            bg_color = np.array(MANUAL_BG_COLOR)
+        if stats is not None:
+            stats["bg_confidence"] = round(confidence, 2)
+    else:
+        bg_color = np.array(MANUAL_BG_COLOR)
+        if verbose:
+            print(f"\n🎨 Using manual background: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
+    
+    if rows is not None:
+        tolerance, auto, fg_count = separate_in_strips(img, bg_color, rows, fg_filename, bg_filename,
+                                                       input_path, verbose)
+    else:
+        tolerance, auto, fg_count = _separate_whole(img_rgb, bg_color, fg_filename, bg_filename,
+                                                    input_path, verbose)
+    final_fg = fg_count / (h*w) * 100
     if verbose:
-        print(f"   ✓ {os.path.basename(bg_filename)} (original)")
+        print(f"   ✓ {os.path.basename(fg_filename)}")
+        print(f"   ✓ {os.path.basename(bg_filename)}" + (" (original)" if bg_is_original(input_path) else ""))
+    
+    if stats is not None:
+        stats.update(tolerance=tolerance, auto=auto, cached=False, bg_fallback=bg_fallback,
+                     foreground=round(final_fg, 1))
+    
+    if cache_key is not None:
+        try:
+            cache.put(cache_key, cache_files(fg_filename, bg_filename))
+        except (OSError, bg_cache.sqlite3.Error) as e:
+            if verbose:
+                print(f"   ⚠ Could not store result in cache: {e}")
     
     if verbose:
         print("\n" + "="*60)
         print("✅ DONE!")
         print("="*60)
-        final_fg = (np.sum(foreground_mask > 127) / (h*w)) * 100
         print(f"\n📊 Result: {final_fg:.1f}% foreground extracted")
         print(f"Background: Original image preserved")
         
         if final_fg < 20:
             print(f"\n⚠️  LOW FOREGROUND ({final_fg:.1f}%) - Try:")
-            print(f"   • Decrease COLOR_TOLERANCE to {COLOR_TOLERANCE - 5}")
+            print(f"   • Decrease COLOR_TOLERANCE to {max(0, tolerance - 5)}")
         elif final_fg > 80:
             print(f"\n⚠️  HIGH FOREGROUND ({final_fg:.1f}%) - Try:")
-            print(f"   • Increase COLOR_TOLERANCE to {COLOR_TOLERANCE + 5}")
+            print(f"   • Increase COLOR_TOLERANCE to {tolerance + 5}")
         else:
             print(f"\n✅ Good balance!")
         
-        print(f"\n💡 To adjust split: Edit COLOR_TOLERANCE (current: {COLOR_TOLERANCE})")
-        print(f"   Lower = more foreground | Higher = less foreground")
+        if auto:
+            print(f"\n💡 Tolerance {tolerance} was chosen automatically ({AUTO_TOLERANCE}); "
+                  f"adjust AUTO_FG_BAND or AUTO_TOLERANCE_RANGE")
+        else:
+            print(f"\n💡 To adjust split: Edit COLOR_TOLERANCE (current: {tolerance})")
+            print(f"   Lower = more foreground | Higher = less foreground")
+            print(f"   Or set AUTO_TOLERANCE = \"band\" to pick it per image")
         print("="*60)
     
     return fg_filename, bg_filename
 
 
+# ============================================
+# BATCH PROCESSING
+# ============================================
+
+def _init_worker(settings):
+    """Apply the parent's settings inside a batch worker process"""
+    globals().update(settings)
+
+
+def _process_one(input_path, output_dir, cache_key=None):
+    """Run process_image, returning (result, error, stats) instead of raising"""
+    stats = {}
+    try:
+        fg_file, bg_file = process_image(input_path, output_dir, verbose=False, stats=stats,
+                                         cache_key=cache_key)
+        if fg_file and bg_file:
+            return (fg_file, bg_file), None, stats
+        return (None, None), "could not load image", stats
+    except Exception as e:
+        return (None, None), str(e), stats
+
+
+def process_images(paths, output_dir=None, workers=None, progress_callback=None, cache_keys=None):
+    """
+    Process many images in parallel across worker processes
+    
+    A failing image does not stop the batch; its result is (None, None).
+    
+    Args:
+        paths: Input image paths
+        output_dir: Directory to save outputs (default: next to each input)
+        workers: Number of processes (default: WORKERS, 0 = all CPU cores)
+        progress_callback: Called as progress_callback(done, total, input_path, result, error, stats)
+            in the calling thread after each image finishes (stats: see process_image)
+        cache_keys: Optional cache key per path, already looked up (see process_image)
+    
+    Returns:
+        list: (fg_filename, bg_filename) per input path, in input order
+    """
+    paths = [str(p) for p in paths]
+    total = len(paths)
+    results = [(None, None)] * total
+    if cache_keys is None:
+        cache_keys = [None] * total
+    if workers is None:
+        workers = WORKERS
+    workers = min(workers or os.cpu_count() or 1, total)
+    
+    if workers <= 1:
+        for done, path in enumerate(paths, start=1):
+            results[done - 1], error, stats = _process_one(path, output_dir, cache_keys[done - 1])
+            if progress_callback:
+                progress_callback(done, total, path, results[done - 1], error, stats)
+        return results
+    
+    settings = {name: globals()[name] for name in _SETTING_NAMES}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings,)) as pool:
+        futures = {pool.submit(_process_one, path, output_dir, cache_keys[idx]): idx
+                   for idx, path in enumerate(paths)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            idx = futures[future]
+            try:
+                results[idx], error, stats = future.result()
+            except Exception as e:
+                # Worker process died (e.g. out of memory)
+                results[idx], error, stats = (None, None), str(e), {}
+            if progress_callback:
+                progress_callback(done, total, paths[idx], results[idx], error, stats)
+    return results
+
+
+def find_images(pattern):
+    """Expand a directory or glob pattern into a sorted list of image paths"""
+    if os.path.isdir(pattern):
+        candidates = [os.path.join(pattern, f) for f in os.listdir(pattern)]
+    else:
+        candidates = glob.glob(pattern)
+    return sorted(p for p in candidates
+                  if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS)
+                  and not os.path.splitext(p)[0].endswith(("_FG", "_BG")))
+
+
 # ============================================
 # COMMAND LINE USAGE
 # ============================================
 
+def describe_stats(stats):
+    """Short per-image summary for progress lines, e.g. "tolerance 18 (auto), 42.0% FG" """
+    if stats.get("cached"):
+        return "cached"
+    if "tolerance" not in stats:
+        return ""
+    return (f"tolerance {stats['tolerance']}{' (auto)' if stats.get('auto') else ''}, "
+            f"{stats['foreground']:.1f}% FG"
+            + (f", manual BG (border {stats['bg_confidence'] * 100:.0f}% one colour)" if stats.get("bg_fallback") else ""))
+
+
+def print_progress(done, total, input_path, result, error, stats):
+    status = f"❌ {error}" if error else f"✓ {describe_stats(stats)}"
+    print(f"   [{done}/{total}] {os.path.basename(input_path)} {status}")
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python bg_simple.py <input_image> [output_directory]")
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    
+    if len(args) < 1:
+        print("Usage: python bg_simple.py <input_image|directory|glob> [output_directory] [--workers N]")
         print("Example: python bg_simple.py image.jpg")
         print("Example: python bg_simple.py image.jpg C:/output/")
+        print("Example: python bg_simple.py C:/comics/ C:/output/ --workers 8")
+        print('Example: python bg_simple.py "pages/*.png"')
         sys.exit(1)
     
-    input_image = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    input_image = args[0]
+    output_dir = args[1] if len(args) > 1 else None
     
-    if not os.path.exists(input_image):
-        print(f"❌ Error: File not found: {input_image}")
-        sys.exit(1)
-    
-    fg_file, bg_file = process_image(input_image, output_dir, verbose=True)
+    if os.path.isfile(input_image):
+        fg_file, bg_file = process_image(input_image, output_dir, verbose=True)
+        sys.exit(0 if fg_file and bg_file else 1)
     
-    if fg_file and bg_file:
-        sys.exit(0)
-    else:
+    images = find_images(input_image)
+    if not images:
+        print(f"❌ Error: No images found: {input_image}")
         sys.exit(1)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    print(f"🎨 Processing {len(images)} images...")
+    results = process_images(images, output_dir, workers=workers, progress_callback=print_progress)
+    failed = sum(1 for fg_file, bg_file in results if not (fg_file and bg_file))
+    print(f"✅ Done: {len(images) - failed}/{len(images)} images separated")
+    sys.exit(1 if failed else 0)
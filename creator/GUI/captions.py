@@ -0,0 +1,203 @@
+"""
+Caption Loading and Validation
+Checks every entry of a caption JSON file (Remotion caption format), converts
+"start"/"end" seconds to "startMs"/"endMs" and caches the normalized result by
+file hash, so the same file is only parsed once
+"""
+
+import json
+import math
+import os
+import threading
+
+from bg_cache import hash_file
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tiktok-faceless", "captions")
+
+# Bump when normalization or validation changes for the same file
+NORMALIZE_VERSION = 1
+
+# Captions may end this far past the end of the audio (Whisper's last token often does)
+END_SLACK_MS = 500
+
+# Only the first few problems of a file are listed
+MAX_REPORTED_ERRORS = 10
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def normalize_captions(data):
+    """
+    Validate caption entries and bring them into startMs/endMs form
+
+    Returns:
+        tuple: (captions, converted_count, errors) - errors lists the problems
+            found; captions is only usable when errors is empty
+    """
+    errors = []
+
+    def error(message):
+        errors.append(message)
+
+    if not isinstance(data, list):
+        return [], 0, ["caption file must be a JSON array of captions, not an object"]
+
+    captions = []
+    converted = 0
+    previous_start = None
+    for number, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict):
+            error(f"caption {number}: not an object")
+            continue
+        caption = dict(entry)
+
+        if not isinstance(caption.get("text"), str):
+            error(f"caption {number}: missing 'text'")
+
+        if "startMs" not in caption and "endMs" not in caption and ("start" in caption or "end" in caption):
+            # Seconds (e.g. from other subtitle tools) -> milliseconds
+            start, end = caption.pop("start", None), caption.pop("end", None)
+            if _is_number(start) and _is_number(end):
+                caption["startMs"] = round(start * 1000)
+                caption["endMs"] = round(end * 1000)
+                converted += 1
+            else:
+                caption["startMs"] = caption["endMs"] = None
+
+        start_ms, end_ms = caption.get("startMs"), caption.get("endMs")
+        if not _is_number(start_ms) or not _is_number(end_ms):
+            error(f"caption {number}: missing or invalid 'startMs'/'endMs'")
+            continue
+        if start_ms < 0:
+            error(f"caption {number}: negative start ({start_ms} ms)")
+        if end_ms < start_ms:
+            error(f"caption {number}: ends before it starts ({start_ms}-{end_ms} ms)")
+        if previous_start is not None and start_ms < previous_start:
+            error(f"caption {number}: starts at {start_ms} ms, before the previous caption ({previous_start} ms)")
+        previous_start = start_ms
+
+        caption.setdefault("timestampMs", start_ms)
+        caption.setdefault("confidence", None)
+        captions.append(caption)
+
+    return captions, converted, errors
+
+
+class CaptionLoader:
+    """
+    Loads caption files into validated, normalized form with a hash-keyed cache
+
+    Results are kept in memory and on disk (cache_dir/<hash>.json for the
+    normalized captions, <hash>.meta.json for the validation result), so adding
+    a file again - even after a restart - doesn't parse it again. Safe to use
+    from several threads at once.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._memory = {}
+
+    def _paths(self, content_hash):
+        name = f"{content_hash}_v{NORMALIZE_VERSION}"
+        return (os.path.join(self.cache_dir, f"{name}.json"),
+                os.path.join(self.cache_dir, f"{name}.meta.json"))
+
+    def _write_json(self, path, data, indent=None):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _unreadable(error):
+        """Validation result for a file that couldn't be read (not cached)"""
+        return {"count": 0, "converted": 0, "end_ms": 0, "error_count": 1,
+                "errors": [f"could not read the file: {error}"], "normalized": False,
+                "unreadable": True}
+
+    def _validate(self, path, content_hash):
+        """Parse and validate a file, storing the outcome in the disk cache"""
+        normalized_path, meta_path = self._paths(content_hash)
+        try:
+            with open(path, encoding="utf-8-sig") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            captions, converted, errors = [], 0, [f"not valid JSON: {e}"]
+        except UnicodeDecodeError as e:
+            captions, converted, errors = [], 0, [f"not UTF-8 text: {e}"]
+        except OSError as e:
+            return self._unreadable(e)
+        else:
+            captions, converted, errors = normalize_captions(data)
+
+        meta = {
+            "count": len(captions),
+            "converted": converted,
+            "end_ms": max((c["endMs"] for c in captions), default=0),
+            "error_count": len(errors),
+            "errors": errors[:MAX_REPORTED_ERRORS],
+            "normalized": bool(captions) and not errors and captions != data,
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if meta["normalized"]:
+                self._write_json(normalized_path, captions, indent=2)
+            self._write_json(meta_path, meta)
+        except OSError:
+            # Caching is an optimisation - an unwritable cache only costs time
+            if meta["normalized"]:
+                raise
+        return meta
+
+    def load(self, path, audio_duration_ms=None):
+        """
+        Validate a caption file against the audio it belongs to
+
+        Args:
+            path: Caption JSON file
+            audio_duration_ms: Audio length, to check that captions fit (None = skip)
+
+        Returns:
+            dict: caption_file (file to render with - the normalized copy when
+                anything was converted), count, converted, end_ms, errors,
+                cached
+        """
+        try:
+            content_hash = hash_file(path)
+        except OSError as e:
+            meta = dict(self._unreadable(e), cached=False, caption_file=path)
+            meta.pop("unreadable")
+            return meta
+        normalized_path, meta_path = self._paths(content_hash)
+        cached = True
+        with self._lock:
+            meta = self._memory.get(content_hash)
+        if meta is None:
+            try:
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta.get("normalized") and not os.path.isfile(normalized_path):
+                    meta = None
+            except (OSError, ValueError):
+                meta = None
+        if meta is None:
+            meta = self._validate(path, content_hash)
+            cached = False
+        if not meta.get("unreadable"):
+            with self._lock:
+                self._memory[content_hash] = meta
+
+        result = dict(meta, errors=list(meta["errors"]), cached=cached,
+                      caption_file=normalized_path if meta["normalized"] else path)
+        result.pop("unreadable", None)
+        if meta["error_count"] > MAX_REPORTED_ERRORS:
+            result["errors"].append(f"... and {meta['error_count'] - MAX_REPORTED_ERRORS} more")
+        if not meta["errors"] and meta["count"] == 0:
+            result["errors"].append("caption file is empty")
+        if audio_duration_ms is not None and meta["end_ms"] > audio_duration_ms + END_SLACK_MS:
+            result["errors"].append(f"captions run to {meta['end_ms'] / 1000:.1f}s but the audio is only "
+                                    f"{audio_duration_ms / 1000:.1f}s long")
+        return result
@@ -6,7 +6,7 @@ You can customize these settings to change the behavior of the GUI.
 
 # GUI Window Settings
 WINDOW_WIDTH = 700
-WINDOW_HEIGHT = 700
+WINDOW_HEIGHT = 760
 WINDOW_TITLE = "TikTok Faceless Video Generator"
 
 # File Extensions
@@ -31,11 +31,47 @@ DEFAULT_CAPTION_NAME = "Untitled.json"
 
 # Logging
 ENABLE_DETAILED_LOGGING = True
+LOG_MAX_LINES = 2000  # Lines kept in the on-screen log (older lines stay in the log file)
+LOG_FLUSH_INTERVAL_MS = 100  # How often queued log lines are drawn
+LOG_FILE_MAX_MB = 5  # Full log in creator/logs/video_generator.log, rotated at this size
+LOG_FILE_BACKUPS = 3  # Rotated log files kept
 
 # Render Settings
 CONFIRM_BEFORE_RENDER = True
 AUTO_CLEANUP_AFTER_SAVE = True
-MAX_AUDIO_CAPTION_PAIRS = 4  # Maximum number of audio/caption pairs for multi-video generation
+
+# Captions
+CAPTION_LOAD_WORKERS = 2  # Background threads validating added caption files
+
+# Transcription (audio added without a caption file is transcribed with sub.mjs)
+TRANSCRIBE_WORKERS = 1  # Transcriptions run at once, overlapping with rendering
+TRANSCRIBE_THREADS = 0  # Whisper threads per transcription (0 = whisper.cpp default)
+
+# Image Preparation
+IMAGE_PREP_WORKERS = 0  # Processes used for FG/BG separation (0 = all CPU cores)
+PRESCALE_IMAGES = False  # Shrink large images to the video size before separation (JPEGs are re-encoded)
+COMPOSITION_WIDTH = 1080  # Video size set in render.js
+COMPOSITION_HEIGHT = 1920
+COMPOSITION_FPS = 30  # Frame rate set in render.js (for expected frame counts)
+PRESCALE_HEADROOM = 1.25  # Extra resolution kept for the Ken Burns zoom (Video.jsx zooms up to 1.2x)
+
+# Concurrent Rendering
+# Batches run as a pipeline: prepare (images) -> stage (workspace) ->
+# render (once the transcript is ready) -> finalize (save). Each stage has its own workers and passes jobs on
+# through a queue, so one video is prepared while another renders and a third is saved.
+PREPARE_WORKERS = 1  # Image sets prepared at once (each already uses IMAGE_PREP_WORKERS processes)
+STAGE_WORKERS = 2  # Workspaces staged at once
+FINALIZE_WORKERS = 1  # Videos saved at once
+STAGE_QUEUE_SIZE = 2  # Jobs that may wait between two stages (limits staged workspaces on disk)
+MAX_CONCURRENT_RENDERS = 1  # Videos rendered side by side, each in its own workspace
+RENDER_CONCURRENCY = 0  # Remotion browser tabs per render (0 = split CPU cores across renders)
+LONGEST_JOBS_FIRST = True  # With several renders at once, start the longest videos first
+PERSISTENT_RENDER_WORKER = True  # Bundle once per batch in one render-worker.js instead of once per video
+
+# File Staging
+# Tried in order when placing files in a job workspace: "hardlink", "reflink"
+# (copy-on-write clone), "symlink", "copy". Finished videos are moved, not copied.
+STAGING_METHODS = ["hardlink", "reflink", "copy"]
 
 # UI Colors (optional - tkinter uses system theme by default)
 # These are used for status messages
@@ -0,0 +1,150 @@
+"""
+Per-Stage Render Metrics
+Measures wall time, CPU time, child-process peak RSS and bytes read/written for
+each pipeline stage and appends them to a JSON-lines file per batch
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+_BLOCK_SIZE = 512
+
+
+def thread_io():
+    """Logical bytes (rchar, wchar) read/written by the calling thread, or None"""
+    try:
+        with open("/proc/thread-self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def children_usage():
+    """CPU seconds and peak RSS (MB) of finished child processes, or None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * _MAXRSS_UNIT / 1024 / 1024
+
+
+def wait_with_usage(process):
+    """
+    Wait for a Popen process and collect its own resource usage
+
+    Uses os.wait4, so the numbers cover only this process and the children it
+    reaped (npm -> node -> Chromium), even when several renders run at once.
+
+    Returns:
+        tuple: (returncode, usage dict or None where wait4 is unavailable)
+    """
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, {
+        "child_cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "child_peak_rss_mb": round(usage.ru_maxrss * _MAXRSS_UNIT / 1024 / 1024, 1),
+        "read_bytes": usage.ru_inblock * _BLOCK_SIZE,
+        "write_bytes": usage.ru_oublock * _BLOCK_SIZE,
+    }
+
+
+class BatchMetrics:
+    """
+    Collects stage records for one batch and appends each to a JSON-lines file
+
+    Safe to use from several job threads at once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.records = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def record(self, stage, job=None, **values):
+        """Store one stage measurement (job is the 1-based job index, None for batch-wide stages)"""
+        entry = {"time": round(time.time(), 3), "job": job, "stage": stage}
+        entry.update(values)
+        with self._lock:
+            self.records.append(entry)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return entry
+
+    @contextmanager
+    def stage(self, stage, job=None, **values):
+        """
+        Measure the enclosed block as one stage
+
+        Records wall time and the calling thread's CPU time and logical bytes
+        read/written. With children=True the CPU time and peak RSS of child
+        processes reaped during the block (e.g. a process pool) are added; only
+        use it for stages that don't overlap with other jobs' subprocesses.
+        The yielded dict can be filled with extra values before the block ends.
+        """
+        children = values.pop("children", False)
+        extra = dict(values)
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        start_io = thread_io()
+        start_children = children_usage() if children else None
+        try:
+            yield extra
+        finally:
+            extra["wall_s"] = round(time.perf_counter() - start_wall, 3)
+            extra["cpu_s"] = round(time.thread_time() - start_cpu, 3)
+            end_io = thread_io()
+            if start_io and end_io:
+                extra["read_bytes"] = end_io[0] - start_io[0]
+                extra["write_bytes"] = end_io[1] - start_io[1]
+            end_children = children_usage() if children else None
+            if start_children and end_children:
+                extra["child_cpu_s"] = round(end_children[0] - start_children[0], 3)
+                extra["child_peak_rss_mb"] = round(end_children[1], 1)
+            self.record(stage, job, **extra)
+
+    def summary_lines(self, slowest=5):
+        """Per-stage totals plus the slowest individual stages, as printable lines"""
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return []
+
+        by_stage = {}
+        for entry in records:
+            by_stage.setdefault(entry["stage"], []).append(entry)
+
+        lines = [f"{'Stage':<16}{'Count':>6}{'Total s':>10}{'Mean s':>9}{'Max s':>9}"
+                 f"{'CPU s':>9}{'Peak RSS MB':>13}{'Read MB':>9}{'Write MB':>10}"]
+        rows = sorted(by_stage.items(), key=lambda item: -sum(e.get("wall_s", 0) for e in item[1]))
+        for stage, entries in rows:
+            walls = [e.get("wall_s", 0) for e in entries]
+            cpu = sum(e.get("cpu_s", 0) + e.get("child_cpu_s", 0) for e in entries)
+            rss = max((e.get("child_peak_rss_mb", 0) for e in entries), default=0)
+            read_mb = sum(e.get("read_bytes", 0) for e in entries) / 1024 / 1024
+            write_mb = sum(e.get("write_bytes", 0) for e in entries) / 1024 / 1024
+            lines.append(f"{stage:<16}{len(entries):>6}{sum(walls):>10.1f}{sum(walls) / len(walls):>9.1f}"
+                         f"{max(walls):>9.1f}{cpu:>9.1f}{rss:>13.0f}{read_mb:>9.1f}{write_mb:>10.1f}")
+
+        lines.append("")
+        lines.append("Slowest stages:")
+        for entry in sorted(records, key=lambda e: -e.get("wall_s", 0))[:slowest]:
+            job = f"video {entry['job']}" if entry["job"] else "batch"
+            lines.append(f"  {entry.get('wall_s', 0):>8.1f}s  {entry['stage']:<16} {job}")
+        return lines
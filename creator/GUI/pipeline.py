@@ -0,0 +1,1167 @@
+"""
+Video Rendering Pipeline
+Prepares images, stages assets, renders and saves videos without any UI
+Shared by the GUI (video_generator_gui.py) and the headless batch CLI (batch_render.py)
+"""
+
+import os
+import sys
+import shutil
+import queue
+import subprocess
+import json
+import glob
+import math
+from pathlib import Path
+import threading
+import random
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+
+from audio_probe import duration_seconds
+from captions import CaptionLoader
+from render_journal import BatchJournal, job_key
+from render_worker import RenderWorker, PROGRESS, TIMING
+from staging import StagingStats, stage_file, move_file
+from transcribe import Transcriber
+from metrics import BatchMetrics, wait_with_usage
+
+# Try to import config, use defaults if not available
+try:
+    from config import *
+except ImportError:
+    DEFAULT_CAPTION_NAME = "Untitled.json"
+    IMAGE_PREP_WORKERS = 0
+    MAX_CONCURRENT_RENDERS = 1
+    RENDER_CONCURRENCY = 0
+    PERSISTENT_RENDER_WORKER = True
+    STAGING_METHODS = ["hardlink", "reflink", "copy"]
+    TRANSCRIBE_WORKERS = 1
+    TRANSCRIBE_THREADS = 0
+    PREPARE_WORKERS = 1
+    STAGE_WORKERS = 2
+    FINALIZE_WORKERS = 1
+    STAGE_QUEUE_SIZE = 2
+    PRESCALE_IMAGES = False
+    COMPOSITION_WIDTH = 1080
+    COMPOSITION_HEIGHT = 1920
+    COMPOSITION_FPS = 30
+    LONGEST_JOBS_FIRST = True
+    PRESCALE_HEADROOM = 1.25
+
+
+AUDIO_FILE_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac', '.flac')
+IMAGE_FILE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+RENDER_PROGRESS_PREFIX = "RENDER_PROGRESS "
+RENDER_TIMING_PREFIX = "RENDER_TIMING "
+
+
+def parse_render_message(line, prefix):
+    """Return the JSON payload of a render.js machine-readable line with this prefix, else None"""
+    if not line.startswith(prefix):
+        return None
+    try:
+        return json.loads(line[len(prefix):])
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_render_progress(line):
+    """Return the progress dict from a render.js RENDER_PROGRESS line, else None"""
+    return parse_render_message(line, RENDER_PROGRESS_PREFIX)
+
+
+def expand_images(spec):
+    """Expand a directory or glob pattern into a sorted list of image paths"""
+    if os.path.isdir(spec):
+        candidates = [os.path.join(spec, f) for f in os.listdir(spec)]
+    else:
+        candidates = glob.glob(spec)
+    return sorted(p for p in candidates
+                  if os.path.isfile(p) and p.lower().endswith(IMAGE_FILE_EXTENSIONS))
+
+
+def find_audio_caption_pairs(folder):
+    """
+    Pair the audio files in a folder with the caption JSON of the same name (foo.mp3 + foo.json)
+
+    One directory scan; names are matched case-insensitively.
+
+    Returns:
+        tuple: (sorted (audio, caption) pairs, audio files without a caption,
+            caption files without audio)
+    """
+    audio_files, caption_files = {}, {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() in AUDIO_FILE_EXTENSIONS:
+                audio_files.setdefault(stem.lower(), []).append(entry.path)
+            elif ext.lower() == ".json":
+                caption_files[stem.lower()] = entry.path
+
+    pairs, unpaired_audio = [], []
+    for stem, paths in audio_files.items():
+        for path in paths:
+            if stem in caption_files:
+                pairs.append((path, caption_files[stem]))
+            else:
+                unpaired_audio.append(path)
+    unpaired_captions = [path for stem, path in caption_files.items() if stem not in audio_files]
+    return (sorted(pairs, key=lambda pair: pair[0].lower()), sorted(unpaired_audio, key=str.lower),
+            sorted(unpaired_captions, key=str.lower))
+
+
+class JobWorkspace:
+    """Isolated staging area for one video: public/assets/{audio,images} and out/"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.public_path = self.root / "public"
+        self.audio_path = self.public_path / "assets" / "audio"
+        self.images_path = self.public_path / "assets" / "images"
+        self.output_path = self.root / "out"
+        self.video_file = self.output_path / "video.mp4"
+
+        self.audio_path.mkdir(parents=True, exist_ok=True)
+        self.images_path.mkdir(parents=True, exist_ok=True)
+        self.output_path.mkdir(parents=True, exist_ok=True)
+
+    def cleanup(self):
+        """Delete the workspace and everything staged in it"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class JobState:
+    """One job on its way through the batch stages"""
+
+    def __init__(self, idx, job, key, resume, result):
+        self.idx = idx
+        self.job = job
+        self.key = key
+        self.resume_stage, self.entry = resume
+        self.result = result
+        self.audio_name = os.path.basename(job["audio"])
+        self.image_files = tuple(job.get("images") or ())
+        self.caption_file = job.get("caption")
+        self.transcript = None  # Future for the caption file of a job without one
+        self.duration = None  # Audio length in seconds (None = unknown)
+        self.prepared_images = None
+        self.workspace = None
+        self.saved = False
+        self.start_time = time.perf_counter()
+
+    @property
+    def failed(self):
+        return self.result["error"] is not None
+
+    def fail(self, error):
+        """Mark the job failed; later stages skip it"""
+        if not self.failed:
+            self.result["error"] = error
+
+
+class BatchContext:
+    """State shared by the stages of one batch"""
+
+    def __init__(self, total_jobs, output_dir, journal, image_sets):
+        self.total_jobs = total_jobs
+        self.output_dir = output_dir
+        self.journal = journal
+        self.image_sets = image_sets  # image files -> states of the jobs using them
+        self.prepared_sets = {}  # image files -> prepared file list or error message
+        self._set_locks = {}
+        self._lock = threading.Lock()
+
+    def set_lock(self, image_files):
+        """Lock held while an image set is prepared, so it is prepared once"""
+        with self._lock:
+            return self._set_locks.setdefault(image_files, threading.Lock())
+
+
+_END_OF_STAGE = object()
+
+
+def run_stages(items, stages, queue_size, on_error=None):
+    """
+    Push items through a chain of stages running side by side
+
+    Every stage is (name, workers, func) and gets its own worker threads reading
+    from a bounded queue, so an item can be in one stage while the next item is
+    in the previous one. Items enter every stage in the order given, even when a
+    stage with several workers finishes them out of order, and each item passes
+    through every stage; func(item) should skip items it can't handle. When
+    func raises, on_error(item, name, exception) is called and the item moves on.
+    """
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+
+    def work(position, name, func, done):
+        source = queues[position]
+        target = queues[position + 1] if position + 1 < len(stages) else None
+        while True:
+            entry = source.get()
+            if entry is _END_OF_STAGE:
+                source.put(entry)  # Let the other workers of this stage see it too
+                return
+            try:
+                func(entry[1])
+            except Exception as e:
+                if on_error:
+                    on_error(entry[1], name, e)
+            if target is not None:
+                done.hand_on(entry, target)
+
+    stage_threads = []
+    for position, (name, workers, func) in enumerate(stages):
+        done = _InOrder()
+        threads = [threading.Thread(target=work, args=(position, name, func, done), daemon=True,
+                                    name=f"{name}-{n + 1}")
+                   for n in range(max(1, workers))]
+        for thread in threads:
+            thread.start()
+        stage_threads.append(threads)
+
+    for entry in enumerate(items):
+        queues[0].put(entry)
+    queues[0].put(_END_OF_STAGE)
+
+    # A stage ends once all its workers are done; then the next stage is told
+    for position, threads in enumerate(stage_threads):
+        for thread in threads:
+            thread.join()
+        if position + 1 < len(stages):
+            queues[position + 1].put(_END_OF_STAGE)
+
+
+class _InOrder:
+    """Reorder buffer: passes (sequence, item) entries on in sequence order"""
+
+    def __init__(self):
+        self.next = 0
+        self.waiting = {}
+        self._lock = threading.Lock()
+
+    def hand_on(self, entry, target):
+        with self._lock:
+            self.waiting[entry[0]] = entry
+            while self.next in self.waiting:
+                target.put(self.waiting.pop(self.next))
+                self.next += 1
+
+
+class VideoPipeline:
+    """
+    Runs batches of render jobs
+
+    A job is a dict with "audio", "caption" and "images" (list of image paths).
+    Jobs sharing the same images are separated into FG/BG only once.
+
+    Args:
+        project_root: The creator folder (holds render.js and package.json)
+        log: Called with each log line, from any thread (default: print)
+        progress_callback: Called as progress_callback(job_index, progress) for every
+            RENDER_PROGRESS line, from the job's thread
+        job_done_callback: Called as job_done_callback(job_index) when a job finishes
+    """
+
+    def __init__(self, project_root=None, log=None, progress_callback=None, job_done_callback=None):
+        self.project_root = Path(project_root) if project_root else Path(__file__).parent.parent
+        self.assets_path = self.project_root / "public" / "assets"
+        self.audio_path = self.assets_path / "audio"
+        self.images_path = self.assets_path / "images"
+        self.output_path = self.project_root / "out"
+        self.bg_music_path = self.assets_path / "bg"
+
+        # Images are separated into FG/BG once per batch and reused by every video
+        self.prepared_images_path = self.project_root / "temp" / "prepared_images"
+
+        # Each video is staged and rendered in its own workspace under here
+        self.jobs_path = self.project_root / "temp" / "jobs"
+
+        # Workers per batch stage (render uses max_concurrent_renders) and how
+        # many jobs may wait between two stages
+        self.prepare_workers = PREPARE_WORKERS
+        self.stage_workers = STAGE_WORKERS
+        self.finalize_workers = FINALIZE_WORKERS
+        self.stage_queue_size = STAGE_QUEUE_SIZE
+
+        self.max_concurrent_renders = MAX_CONCURRENT_RENDERS
+        self.render_concurrency = RENDER_CONCURRENCY
+        self.longest_jobs_first = LONGEST_JOBS_FIRST
+
+        # Audio lengths read from file headers, keyed by (path, size, mtime)
+        self._durations = {}
+
+        # One render-worker.js per batch bundles the project once for all videos
+        # (None outside a batch, or when disabled and every render runs render.js)
+        self.persistent_render_worker = PERSISTENT_RENDER_WORKER
+        self.render_worker = None
+        self.image_prep_workers = IMAGE_PREP_WORKERS
+        self.prescale_images = PRESCALE_IMAGES
+        self.composition_size = (COMPOSITION_WIDTH, COMPOSITION_HEIGHT)
+        self.composition_fps = COMPOSITION_FPS
+        self.prescale_headroom = PRESCALE_HEADROOM
+        self.staging_methods = tuple(STAGING_METHODS)
+
+        # Validated, normalized caption files, cached by file hash
+        self.caption_loader = CaptionLoader()
+
+        # Jobs without a caption file are transcribed while other jobs render
+        self.transcribe_workers = TRANSCRIBE_WORKERS
+        self.transcriber = Transcriber(self.project_root, threads=TRANSCRIBE_THREADS, log=self.log)
+
+        # Bytes staged by link vs. copy, and videos moved into place
+        self.staging_stats = StagingStats()
+
+        # Set by run_batch when unfinished jobs left workspaces worth resuming from
+        self.keep_workspaces = False
+
+        # Per-stage timings of the current batch (logs/metrics/batch_*.jsonl)
+        self.metrics_path = self.project_root / "logs" / "metrics"
+        self.metrics = None
+
+        self._log = log or self._print_log
+        self.progress_callback = progress_callback
+        self.job_done_callback = job_done_callback
+
+        # Last 10% step logged per job, so progress lines stay readable
+        self._logged_steps = {}
+        self._print_lock = threading.Lock()
+
+    def _print_log(self, message):
+        with self._print_lock:
+            print(message, flush=True)
+
+    def log(self, message):
+        """Send a message to the log callback"""
+        self._log(message)
+
+    def measure(self, stage, job=None, **values):
+        """Context manager recording one stage in the batch metrics (no-op outside a batch)"""
+        if self.metrics is None:
+            return nullcontext({})
+        return self.metrics.stage(stage, job, **values)
+
+    def load_caption(self, audio_file, caption_file):
+        """
+        Validate a caption file against its audio (see CaptionLoader.load)
+
+        Returns:
+            dict: errors (empty when usable) and caption_file, the file to render with
+        """
+        duration = self.audio_duration(audio_file) if audio_file else None
+        return self.caption_loader.load(caption_file, None if duration is None else duration * 1000)
+
+    def audio_duration(self, audio_file):
+        """Length of an audio file in seconds from its headers (None = unknown)"""
+        try:
+            stat = os.stat(audio_file)
+        except OSError:
+            return None
+        key = (os.path.abspath(audio_file), stat.st_size, stat.st_mtime_ns)
+        if key not in self._durations:
+            self._durations[key] = duration_seconds(audio_file)
+        return self._durations[key]
+
+    def expected_frames(self, seconds):
+        """Frames render.js will render for audio of this length (it defaults to 10s)"""
+        return max(1, math.ceil((seconds or 10) * self.composition_fps))
+
+    def transcribe_audio(self, job_index, audio_file):
+        """
+        Transcribe a job's audio (or reuse the cached transcript) and validate it
+
+        Returns:
+            str: Caption file to render with
+
+        Raises:
+            Exception: Transcription failed or produced unusable captions
+        """
+        with self.measure("transcribe", job_index):
+            caption_file = self.transcriber.transcribe(audio_file)
+        caption = self.load_caption(audio_file, caption_file)
+        if caption["errors"]:
+            raise ValueError(f"transcript is invalid: {caption['errors'][0]}")
+        self.log(f"Transcript ready for {os.path.basename(audio_file)}: {caption['count']} captions")
+        return caption["caption_file"]
+
+    def get_random_bg_music(self):
+        """Get a random background music file from the bg folder"""
+        try:
+            # Get all audio files from bg folder
+            bg_files = [f for f in self.bg_music_path.glob('*')
+                       if f.suffix.lower() in AUDIO_FILE_EXTENSIONS and f.is_file()]
+
+            if not bg_files:
+                self.log("Warning: No background music files found in assets/bg folder")
+                return None
+
+            # Select random file
+            selected_bg = random.choice(bg_files)
+            self.log(f"Randomly selected background music: {selected_bg.name}")
+            return selected_bg
+        except Exception as e:
+            self.log(f"Error selecting random background music: {str(e)}")
+            return None
+
+    def clear_assets_folders(self):
+        """Clear all files in assets/audio and assets/images folders"""
+        try:
+            # Clear audio folder
+            for file in self.audio_path.glob('*'):
+                if file.is_file():
+                    file.unlink()
+
+            # Clear images folder
+            for file in self.images_path.glob('*'):
+                if file.is_file():
+                    file.unlink()
+
+            self.log("Cleared assets folders")
+        except Exception as e:
+            self.log(f"Error clearing assets: {str(e)}")
+
+    def prepare_images(self, image_files, dest_path=None):
+        """Separate each image into FG/BG once for the whole batch
+
+        Returns:
+            list: Paths of the prepared files, in render order
+        """
+        dest_path = Path(dest_path) if dest_path else self.prepared_images_path
+        if dest_path.exists():
+            shutil.rmtree(dest_path, ignore_errors=True)
+        dest_path.mkdir(parents=True, exist_ok=True)
+
+        prepared = []
+        if not image_files:
+            return prepared
+
+        self.log(f"Processing {len(image_files)} images for FG/BG separation...")
+        start_time = time.perf_counter()
+
+        # Import bg_simple processor
+        gui_dir = Path(__file__).parent
+        sys.path.insert(0, str(gui_dir))
+
+        try:
+            import bg_simple
+        except ImportError as e:
+            self.log(f"Warning: Could not import bg_simple module: {e}")
+            self.log("Copying images without FG/BG separation...")
+            # Fallback: just stage the images as they are
+            for idx, img_file in enumerate(image_files, start=1):
+                ext = os.path.splitext(img_file)[1]
+                dest = dest_path / f"image_{idx}{ext}"
+                stage_file(img_file, dest, self.staging_methods, self.staging_stats)
+                prepared.append(dest)
+            self.log(f"Copied {len(image_files)} images")
+            return prepared
+
+        cache_before = self.get_cache_stats(bg_simple)
+        prescale_image = self.load_prescaler()
+
+        # Inputs are named image_1.ext, image_2.ext, ... in the temp location
+        temp_inputs = [dest_path / f"image_{idx}{os.path.splitext(img_file)[1]}"
+                       for idx, img_file in enumerate(image_files, start=1)]
+        source_names = {str(t): os.path.basename(f) for t, f in zip(temp_inputs, image_files)}
+
+        # Cached results are found by the original files, before anything is downscaled
+        cache_keys = self.image_cache_keys(bg_simple, image_files, prescale_image is not None)
+        results = [None] * len(image_files)
+        for idx, (temp_input, cache_key) in enumerate(zip(temp_inputs, cache_keys)):
+            if cache_key is None:
+                continue
+            try:
+                results[idx] = bg_simple.lookup_cached(str(temp_input), str(dest_path), cache_key)
+            except Exception as e:
+                self.log(f"  ⚠ Separation cache unavailable: {e}")
+                cache_keys = [None] * len(image_files)
+                break
+            if results[idx]:
+                self.log(f"  ✓ {source_names[str(temp_input)]} -> {os.path.basename(results[idx][0])}, "
+                         f"{os.path.basename(results[idx][1])} (cached)")
+        todo = [idx for idx, result in enumerate(results) if not result]
+
+        # Then put originals (or downscaled copies) of the rest in the temp location
+        self.stage_image_inputs([image_files[idx] for idx in todo], [temp_inputs[idx] for idx in todo],
+                                prescale_image)
+
+        def on_progress(done, total, input_path, result, error, stats):
+            name = source_names[input_path]
+            if error:
+                self.log(f"  [{done}/{total}] ⚠ {name}: {error}")
+            else:
+                details = bg_simple.describe_stats(stats)
+                self.log(f"  [{done}/{total}] ✓ {name} -> "
+                         f"{os.path.basename(result[0])}, {os.path.basename(result[1])}"
+                         + (f" ({details})" if details else ""))
+
+        # Process with bg_simple across all cores to generate FG and BG
+        processed = bg_simple.process_images(
+            [temp_inputs[idx] for idx in todo],
+            str(dest_path),
+            workers=self.image_prep_workers,
+            progress_callback=on_progress,
+            cache_keys=[cache_keys[idx] for idx in todo]
+        )
+        for idx, result in zip(todo, processed):
+            results[idx] = result
+
+        for temp_input, (fg_file, bg_file) in zip(temp_inputs, results):
+            if fg_file and bg_file:
+                # Remove the temporary original file (cache hits never staged one)
+                if temp_input.exists():
+                    temp_input.unlink()
+                prepared.extend([Path(fg_file), Path(bg_file)])
+            else:
+                self.log(f"  ⚠ Failed to process {temp_input.name}, keeping original")
+                prepared.append(temp_input)
+
+        elapsed = time.perf_counter() - start_time
+        self.log(f"Completed processing {len(image_files)} images in {elapsed:.1f}s")
+
+        cache_after = self.get_cache_stats(bg_simple)
+        if cache_before and cache_after:
+            hits = cache_after["hits"] - cache_before["hits"]
+            misses = cache_after["misses"] - cache_before["misses"]
+            self.log(f"Separation cache: {hits} hit(s), {misses} miss(es)")
+        return prepared
+
+    def load_prescaler(self):
+        """prescale.prescale_image when prescale_images is set and it imports, else None"""
+        if not self.prescale_images:
+            return None
+        try:
+            from prescale import prescale_image
+        except ImportError as e:
+            self.log(f"Warning: Could not import prescale module: {e}")
+            return None
+        return prescale_image
+
+    def image_cache_keys(self, bg_simple, image_files, prescaled):
+        """Separation cache key per original image (None where caching is off or fails)
+
+        Keys hash the original file plus, when prescaled, the prescale settings,
+        so a cached result is found without downscaling the image first.
+        """
+        try:
+            if bg_simple.get_cache() is None:
+                return [None] * len(image_files)
+        except Exception as e:
+            self.log(f"  ⚠ Separation cache unavailable: {e}")
+            return [None] * len(image_files)
+        extra = {"prescale": [*self.composition_size, self.prescale_headroom]} if prescaled else None
+
+        def key_for(path):
+            try:
+                return bg_simple.cache_key_for(path, extra)
+            except OSError:
+                return None
+
+        workers = min(self.image_prep_workers or os.cpu_count() or 1, len(image_files))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(key_for, image_files))
+
+    def stage_image_inputs(self, image_files, temp_inputs, prescale_image=None):
+        """Downscale images larger than the video needs into temp_inputs, linking the rest
+
+        With prescale_image (see load_prescaler), images are fitted to
+        composition_size (with prescale_headroom for the Ken Burns zoom) in
+        parallel before separation.
+        """
+        if not image_files:
+            return
+
+        def stage_one(src, dest):
+            if prescale_image is not None:
+                try:
+                    scaled = prescale_image(src, dest, *self.composition_size, self.prescale_headroom)
+                    if scaled:
+                        return scaled
+                except Exception as e:
+                    self.log(f"  ⚠ Could not downscale {os.path.basename(src)}: {e}")
+            stage_file(src, dest, self.staging_methods, self.staging_stats)
+            return None
+
+        start_time = time.perf_counter()
+        workers = min(self.image_prep_workers or os.cpu_count() or 1, len(image_files))
+        # Without prescaling the inputs are only linked, so the time is recorded as such
+        with self.measure("prescale_images" if prescale_image else "stage_images") as stage:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(stage_one, image_files, temp_inputs))
+            scaled = [result for result in results if result]
+            source_pixels = sum(result[0] for result in scaled)
+            output_pixels = sum(result[1] for result in scaled)
+            if prescale_image:
+                stage.update(images=len(scaled), source_mp=round(source_pixels / 1e6, 2),
+                             output_mp=round(output_pixels / 1e6, 2))
+            else:
+                stage.update(images=len(image_files))
+
+        if scaled:
+            width, height = self.composition_size
+            self.log(f"Downscaled {len(scaled)}/{len(image_files)} images to fit {width}x{height} "
+                     f"(x{self.prescale_headroom} headroom): {source_pixels / 1e6:.1f} MP -> "
+                     f"{output_pixels / 1e6:.1f} MP, ~{source_pixels / output_pixels:.1f}x less "
+                     f"separation work, in {time.perf_counter() - start_time:.1f}s")
+
+    def get_cache_stats(self, bg_simple):
+        """Return bg_simple's result cache counters, or None if unavailable"""
+        try:
+            cache = bg_simple.get_cache()
+            return cache.stats() if cache is not None else None
+        except Exception:
+            return None
+
+    def create_job_workspace(self, job_index):
+        """Create an isolated workspace for one video of the batch"""
+        self.jobs_path.mkdir(parents=True, exist_ok=True)
+        return JobWorkspace(tempfile.mkdtemp(prefix=f"job_{job_index}_", dir=self.jobs_path))
+
+    def copy_files_to_assets(self, audio_file, caption_file, prepared_images=None, workspace=None,
+                             background_music=True):
+        """Stage one job's files in the assets folders
+
+        prepared_images is a list returned by prepare_images(). With a JobWorkspace
+        the files are staged there instead of the shared public/assets folders.
+        background_music=False leaves the background music out (e.g. when only
+        a caption is added to a staged workspace).
+        Files are linked rather than copied where the filesystem allows
+        (see STAGING_METHODS).
+        """
+        audio_path = workspace.audio_path if workspace else self.audio_path
+        images_path = workspace.images_path if workspace else self.images_path
+        before = self.staging_stats.snapshot()
+        try:
+            # Stage audio file
+            if audio_file:
+                dest = audio_path / os.path.basename(audio_file)
+                method = stage_file(audio_file, dest, self.staging_methods, self.staging_stats)
+                self.log(f"Staged audio ({method}) to: {dest}")
+
+            # Stage random background music
+            random_bg = self.get_random_bg_music() if background_music else None
+            if random_bg:
+                dest = audio_path / f"bgmusic{random_bg.suffix}"
+                method = stage_file(random_bg, dest, self.staging_methods, self.staging_stats)
+                self.log(f"Staged background music ({method}) to: {dest}")
+
+            # Stage the prepared FG/BG images
+            if prepared_images:
+                for prepared_file in prepared_images:
+                    stage_file(prepared_file, images_path / prepared_file.name,
+                               self.staging_methods, self.staging_stats)
+                self.log(f"Staged {len(prepared_images)} prepared image files to assets")
+
+            # Stage caption file - always use "Untitled.json" to match Video.jsx expectation
+            if caption_file:
+                dest = audio_path / DEFAULT_CAPTION_NAME
+                method = stage_file(caption_file, dest, self.staging_methods, self.staging_stats)
+                self.log(f"Staged caption ({method}) to: {dest}")
+
+            self.log(f"Staging I/O: {self.staging_stats.describe(since=before)}")
+            return True
+        except Exception as e:
+            self.log(f"Error copying files: {str(e)}")
+            return False
+
+    def run_render(self, workspace=None, job_index=None, duration=None):
+        """Run the Node.js render process (against a JobWorkspace if given)
+
+        duration (seconds, from the audio headers) spares the renderer from
+        reading the audio file again.
+
+        Output is streamed into the log line by line while the process runs and
+        RENDER_PROGRESS lines are reported through progress_callback instead.
+        """
+        if workspace and self.render_worker is not None:
+            rendered = self.render_in_worker(workspace, job_index, duration)
+            if rendered is not None:
+                return rendered
+            self.log("Render worker unavailable, falling back to a separate render process...")
+
+        try:
+            self.log("Starting render process...")
+
+            command = ["npm", "run", "render"]
+            if workspace:
+                command += ["--", "--workspace", str(workspace.root)]
+                concurrency = self.get_render_concurrency()
+                if concurrency:
+                    command += ["--concurrency", str(concurrency)]
+                if duration:
+                    command += ["--duration", f"{duration:.3f}"]
+
+            # Run npm render command (npm is a .cmd script on Windows, so it needs the shell)
+            process = subprocess.Popen(
+                command,
+                cwd=str(self.project_root),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                shell=(os.name == "nt")
+            )
+
+            # Drain stderr on its own thread so neither pipe can fill up and block
+            def pump_stderr():
+                for line in process.stderr:
+                    if line.strip():
+                        self.log(f"Error: {line.rstrip()}")
+
+            stderr_thread = threading.Thread(target=pump_stderr, daemon=True)
+            stderr_thread.start()
+
+            start_time = time.perf_counter()
+            for line in process.stdout:
+                line = line.rstrip()
+                progress = parse_render_progress(line)
+                timing = parse_render_message(line, RENDER_TIMING_PREFIX)
+                if progress is not None:
+                    self.report_progress(job_index or 1, progress)
+                elif timing is not None:
+                    self.record_render_timing(job_index, timing)
+                elif line.strip():
+                    self.log(line)
+
+            returncode, usage = wait_with_usage(process)
+            stderr_thread.join()
+            if self.metrics is not None:
+                self.metrics.record("render", job_index, returncode=returncode,
+                                    wall_s=round(time.perf_counter() - start_time, 3), **(usage or {}))
+
+            if returncode == 0:
+                self.log("Render completed successfully!")
+                return True
+            else:
+                self.log(f"Render failed with code {returncode}")
+                return False
+
+        except Exception as e:
+            self.log(f"Error during render: {str(e)}")
+            return False
+
+    def render_in_worker(self, workspace, job_index, duration=None):
+        """Render a workspace with the batch's render worker (None if it isn't running)"""
+        self.log("Rendering with the batch render worker...")
+        start_time = time.perf_counter()
+        rendered = self.render_worker.render(job_index, workspace.root, self.get_render_concurrency(), duration)
+        if rendered is None:
+            return None
+        if self.metrics is not None:
+            self.metrics.record("render", job_index, returncode=0 if rendered else 1, worker=True,
+                                wall_s=round(time.perf_counter() - start_time, 3))
+        self.log("Render completed successfully!" if rendered else "Render failed in the render worker")
+        return rendered
+
+    def start_render_worker(self):
+        """Launch render-worker.js for a batch; it bundles while images are prepared"""
+        worker = RenderWorker(self.project_root, log=self.log, on_message=self.on_worker_message)
+        try:
+            worker.start()
+        except OSError as e:
+            self.log(f"Could not start the render worker ({e}), rendering each video separately")
+            return None
+        self.log("Started render worker (bundles the project once for the batch)")
+        return worker
+
+    def stop_render_worker(self):
+        """End the batch's render worker and record its resource usage"""
+        worker, self.render_worker = self.render_worker, None
+        if worker is None:
+            return
+        returncode, usage = worker.stop()
+        if self.metrics is not None:
+            self.metrics.record("render_worker", returncode=returncode, **(usage or {}))
+
+    def on_worker_message(self, kind, payload):
+        """Route a render worker's progress and timing lines to their job"""
+        job_index = payload.get("job")
+        if kind == PROGRESS:
+            self.report_progress(job_index or 1, payload)
+        elif kind == TIMING:
+            self.record_render_timing(job_index, payload)
+
+    def record_render_timing(self, job_index, timing):
+        """Store a RENDER_TIMING payload (bundle, compositions, frames) in the batch metrics"""
+        if self.metrics is not None:
+            self.metrics.record(timing.get("stage", "unknown"), job_index,
+                                wall_s=round(float(timing.get("seconds", 0)), 3))
+
+    def report_progress(self, job_index, progress):
+        """Log a job's render progress every 10% and pass it to progress_callback"""
+        fraction = min(1.0, max(0.0, float(progress.get("progress", 0))))
+        step = int(fraction * 10)
+        if step > self._logged_steps.get(job_index, -1):
+            self._logged_steps[job_index] = step
+            self.log(f"  Video {job_index}: {fraction * 100:.0f}% "
+                     f"({progress.get('renderedFrames', 0)}/{progress.get('totalFrames', 0)} frames)")
+        if self.progress_callback:
+            self.progress_callback(job_index, progress)
+
+    def get_render_concurrency(self):
+        """Browser tabs per render, split across concurrent renders unless configured"""
+        if self.render_concurrency:
+            return self.render_concurrency
+        if self.max_concurrent_renders > 1:
+            return max(1, (os.cpu_count() or 1) // self.max_concurrent_renders)
+        return None
+
+    def output_file_for(self, audio_filename, output_dir):
+        """Final video path for an audio file: <output_dir>/<audio name>.mp4"""
+        base_name = os.path.splitext(os.path.basename(audio_filename))[0]
+        return Path(output_dir) / f"{base_name}.mp4"
+
+    def save_video_with_name(self, audio_filename, output_dir, workspace=None):
+        """Save the rendered video with a specific name based on audio file
+
+        The rendered video is moved rather than copied. Across filesystems it is
+        copied under a temporary name and renamed into place, so an interrupted
+        save never leaves a truncated file under the final name.
+
+        Returns:
+            Path: The saved video, or None on failure
+        """
+        video_file = workspace.video_file if workspace else self.output_path / "video.mp4"
+
+        if not video_file.exists():
+            self.log("Error: Rendered video not found!")
+            return None
+
+        save_path = self.output_file_for(audio_filename, output_dir)
+
+        try:
+            move_file(video_file, save_path, self.staging_stats)
+            self.log(f"Video saved to: {save_path}")
+            return save_path
+        except Exception as e:
+            self.log(f"Error saving video: {str(e)}")
+            return None
+
+    def cleanup_temp_files(self):
+        """Clean up temporary files and clear assets"""
+        try:
+            # Remove temporary remotion entry files
+            for file in self.project_root.glob("remotion_entry_*.jsx"):
+                try:
+                    file.unlink()
+                    self.log(f"Removed temp file: {file.name}")
+                except Exception:
+                    pass
+
+            # Clear assets folders
+            self.clear_assets_folders()
+
+            # Remove the batch's prepared images
+            if self.prepared_images_path.exists():
+                shutil.rmtree(self.prepared_images_path, ignore_errors=True)
+                self.log("Removed prepared images")
+
+            # Remove any job workspaces left behind, unless unfinished jobs can resume from them
+            if self.jobs_path.exists():
+                if self.keep_workspaces:
+                    self.log("Kept workspaces of unfinished jobs so the batch can be resumed")
+                else:
+                    shutil.rmtree(self.jobs_path, ignore_errors=True)
+                    self.log("Removed job workspaces")
+
+            # Clear the out folder
+            video_file = self.output_path / "video.mp4"
+            if video_file.exists():
+                try:
+                    video_file.unlink()
+                    self.log("Removed rendered video from out folder")
+                except Exception:
+                    pass
+
+            self.log("Cleanup completed")
+        except Exception as e:
+            self.log(f"Error during cleanup: {str(e)}")
+
+    def run_batch(self, jobs, output_dir):
+        """Prepare, stage, render and save every job as a pipeline
+
+        Each job passes through four stages - prepare (FG/BG images), stage
+        (workspace), render (after its transcript, if any) and finalize (save) - that each have their own
+        worker threads and hand jobs on through bounded queues, so one video is
+        prepared while another renders and a third is saved.
+
+        Progress is journaled in output_dir, so running the same batch again after
+        a crash skips finished videos and resumes the rest at their first
+        incomplete stage. The journal is removed once every job has succeeded.
+
+        Returns:
+            list: One result dict per job, in input order (see job_result)
+        """
+        total_jobs = len(jobs)
+        self._logged_steps = {}
+        self.staging_stats = StagingStats()
+        self.metrics = BatchMetrics(str(self.metrics_path / f"batch_{datetime.now():%Y%m%d_%H%M%S}.jsonl"))
+
+        journal = BatchJournal(output_dir)
+        states = []
+        for idx, job in enumerate(jobs, start=1):
+            key = job_key(job, self.output_file_for(job["audio"], output_dir))
+            states.append(JobState(idx, job, key, journal.resume_stage(key), self.job_result(idx, job)))
+        # Audio lengths come from the file headers: frames to expect, and the render order
+        for state in states:
+            state.duration = self.audio_duration(state.job["audio"])
+            length = f"{state.duration:.1f}s" if state.duration else "unknown length"
+            self.log(f"  Video {state.idx}/{total_jobs}: {state.audio_name} - {length}, "
+                     f"{self.expected_frames(state.duration)} frames")
+        order = states
+        if self.longest_jobs_first and self.max_concurrent_renders > 1:
+            # A long video started last would otherwise render alone at the end
+            order = sorted(states, key=lambda state: -(state.duration or 0))
+            if order != states:
+                self.log("Rendering longest videos first: " + ", ".join(str(state.idx) for state in order))
+
+        resumed = sum(1 for state in states if state.resume_stage)
+        if resumed:
+            done = sum(1 for state in states if state.resume_stage == "saved")
+            self.log(f"Resuming interrupted batch: {done} video(s) already saved, "
+                     f"{resumed - done} partly done")
+
+        # Audio without captions is transcribed in the background, overlapping with
+        # image preparation and with rendering of the jobs ahead of it. Transcripts are
+        # queued in render order, so they finish in the order the renders need them.
+        transcribe_pool = None
+        to_transcribe = [state for state in order if state.resume_stage is None and not state.job.get("caption")]
+        if to_transcribe:
+            workers = max(1, self.transcribe_workers)
+            self.log(f"Transcribing {len(to_transcribe)} audio file(s) without captions "
+                     f"({workers} at a time, alongside rendering)")
+            transcribe_pool = ThreadPoolExecutor(max_workers=workers)
+            for state in to_transcribe:
+                state.transcript = transcribe_pool.submit(self.transcribe_audio, state.idx, state.job["audio"])
+
+        # Separate every distinct image set once; all videos using it reuse the result.
+        # Jobs resumed past staging already have their images in their workspace.
+        image_sets = {}
+        for state in states:
+            if state.resume_stage is None:
+                image_sets.setdefault(state.image_files, []).append(state)
+        batch = BatchContext(total_jobs, output_dir, journal, image_sets)
+
+        stages = [
+            ("prepare", self.prepare_workers, lambda state: self.prepare_job(state, batch)),
+            ("stage", self.stage_workers, lambda state: self.stage_job(state, batch)),
+            ("render", self.max_concurrent_renders, lambda state: self.render_stage(state, batch)),
+            ("finalize", self.finalize_workers, lambda state: self.finalize_job(state, batch)),
+        ]
+        if self.max_concurrent_renders > 1:
+            self.log(f"Rendering up to {min(self.max_concurrent_renders, total_jobs)} videos at a time")
+
+        def on_error(state, stage, error):
+            self.log(f"Unexpected error in the {stage} stage of video {state.idx}: {str(error)}")
+            state.fail(f"{stage} failed: {error}")
+
+        # Started up front so bundling overlaps with preparing the first images
+        if self.persistent_render_worker and any(state.resume_stage not in ("rendered", "saved")
+                                                 for state in states):
+            self.render_worker = self.start_render_worker()
+
+        try:
+            run_stages(order, stages, self.stage_queue_size, on_error)
+        finally:
+            self.stop_render_worker()
+            if transcribe_pool:
+                transcribe_pool.shutdown()
+        results = [state.result for state in states]
+
+        self.log(f"File staging for the batch: {self.staging_stats.describe()}")
+
+        # Where the batch spent its time
+        self.log(f"\n{'='*60}")
+        self.log("Stage timings:")
+        for line in self.metrics.summary_lines():
+            self.log(line)
+        self.log(f"Metrics written to: {self.metrics.path}")
+
+        self.keep_workspaces = not all(result["status"] == "ok" for result in results)
+        if not self.keep_workspaces:
+            journal.remove()
+        return results
+
+    def job_result(self, idx, job):
+        """
+        Result dict of a job: index, audio, caption, images, status ("ok" or
+        "failed"), output, error, resumed_from and seconds
+        """
+        return {
+            "index": idx,
+            "audio": str(job.get("audio")),
+            "caption": str(job.get("caption")) if job.get("caption") else None,
+            "images": [str(p) for p in job.get("images") or ()],
+            "status": "failed",
+            "output": None,
+            "error": None,
+            "resumed_from": None,
+            "seconds": 0.0,
+        }
+
+    def prepare_job(self, state, batch):
+        """Prepare stage: FG/BG images (once per image set)"""
+        if state.resume_stage:
+            return
+
+        prepared = batch.prepared_sets.get(state.image_files)
+        if prepared is None:
+            prepared = self.prepare_image_set(state.image_files, batch)
+        if isinstance(prepared, str):
+            state.fail(prepared)
+            return
+        state.prepared_images = prepared
+
+    def prepare_image_set(self, image_files, batch):
+        """Separate one image set (first job needing it only)
+
+        Returns:
+            list or str: The prepared files, or an error message
+        """
+        with batch.set_lock(image_files):
+            if image_files in batch.prepared_sets:
+                return batch.prepared_sets[image_files]
+
+            set_jobs = batch.image_sets.get(image_files, [])
+            set_index = list(batch.image_sets).index(image_files) + 1
+            dest_path = self.prepared_images_path if len(batch.image_sets) == 1 else \
+                self.prepared_images_path / f"set_{set_index}"
+            self.log(f"\n{'='*60}")
+            self.log(f"Preparing images for {len(set_jobs)} video(s)...")
+            self.log(f"{'='*60}")
+            prep_start = time.perf_counter()
+            try:
+                with self.measure("prepare_images", images=len(image_files)):
+                    prepared = self.prepare_images(list(image_files), dest_path)
+            except Exception as e:
+                self.log(f"Error preparing images: {str(e)}")
+                prepared = f"image preparation failed: {e}"
+            else:
+                prep_time = time.perf_counter() - prep_start
+                if len(set_jobs) > 1 and image_files:
+                    self.log(f"Images prepared once in {prep_time:.1f}s - saved ~{prep_time * (len(set_jobs) - 1):.1f}s "
+                             f"of repeated separation across {len(set_jobs)} videos")
+            batch.prepared_sets[image_files] = prepared
+            return prepared
+
+    def stage_job(self, state, batch):
+        """Stage stage: a fresh workspace with the job's files, or the journaled one"""
+        if state.failed:
+            return
+        self.log(f"\n{'='*60}")
+        self.log(f"Processing video {state.idx}/{batch.total_jobs}: {state.audio_name}")
+        self.log(f"{'='*60}")
+        state.result["resumed_from"] = state.resume_stage
+
+        if state.resume_stage == "saved":
+            return
+        if state.resume_stage:
+            state.workspace = JobWorkspace(state.entry["workspace"])
+            self.log(f"Resuming {state.audio_name} after the '{state.resume_stage}' stage in {state.workspace.root}")
+            return
+
+        # Step 1: Create a fresh workspace for this video
+        self.log(f"Step 1: Creating workspace for {state.audio_name}...")
+        try:
+            state.workspace = self.create_job_workspace(state.idx)
+        except Exception as e:
+            self.log(f"Failed to create workspace for {state.audio_name}: {str(e)}")
+            state.fail(f"could not create workspace: {e}")
+            return
+
+        # Step 2: Copy files for this specific job
+        self.log(f"Step 2: Copying files to workspace for {state.audio_name}...")
+        with self.measure("stage_files", state.idx):
+            staged = self.copy_files_to_assets(state.job["audio"], state.caption_file,
+                                               state.prepared_images, state.workspace)
+        if not staged:
+            self.log(f"Failed to copy files for {state.audio_name}, skipping...")
+            state.fail("could not stage files")
+            return
+        # A job being transcribed is journaled once its caption is staged too
+        if state.transcript is None:
+            batch.journal.record(state.key, "prepared", workspace=str(state.workspace.root))
+
+    def stage_transcript(self, state, batch):
+        """Wait for the transcript of a job without captions and stage it
+
+        Done just before rendering, so the prepare and stage workers move on to
+        the next jobs meanwhile.
+
+        Returns:
+            bool: False when transcription failed (the job is marked failed)
+        """
+        if not state.transcript.done():
+            self.log(f"Waiting for the transcript of {state.audio_name}...")
+        try:
+            with self.measure("wait_transcript", state.idx):
+                state.caption_file = state.transcript.result()
+        except Exception as e:
+            self.log(f"Transcription failed for {state.audio_name}: {str(e)}")
+            state.fail(f"transcription failed: {e}")
+            return False
+        state.result["caption"] = state.caption_file
+        if not self.copy_files_to_assets(None, state.caption_file, workspace=state.workspace,
+                                         background_music=False):
+            state.fail("could not stage the transcript")
+            return False
+        batch.journal.record(state.key, "prepared", workspace=str(state.workspace.root))
+        return True
+
+    def render_stage(self, state, batch):
+        """Render stage: run render.js in the job's workspace"""
+        if state.failed or state.resume_stage in ("rendered", "saved"):
+            return
+        if state.transcript is not None and not self.stage_transcript(state, batch):
+            return
+        # Step 3: Run render
+        self.log(f"Step 3: Running render for {state.audio_name}...")
+        if not self.run_render(state.workspace, state.idx, state.duration):
+            self.log(f"Render failed for {state.audio_name}, skipping...")
+            state.fail("render failed")
+            return
+        batch.journal.record(state.key, "rendered")
+
+    def finalize_job(self, state, batch):
+        """Finalize stage: save the video, record it and clean up (runs for every job)"""
+        try:
+            if state.resume_stage == "saved":
+                self.log(f"✓ Already saved in an earlier run: {state.entry['output']}")
+                state.result["status"] = "ok"
+                state.result["output"] = state.entry["output"]
+                state.saved = True
+                return
+            if state.failed:
+                return
+
+            # Step 4: Save video with audio filename
+            self.log(f"Step 4: Saving video as {os.path.splitext(state.audio_name)[0]}.mp4...")
+            with self.measure("save", state.idx):
+                save_path = self.save_video_with_name(state.job["audio"], batch.output_dir, state.workspace)
+            if not save_path:
+                self.log(f"Failed to save video for {state.audio_name}")
+                state.fail("could not save video")
+                return
+            batch.journal.record(state.key, "saved", output=str(save_path))
+            state.saved = True
+
+            self.log(f"✓ Successfully rendered and saved video {state.idx}/{batch.total_jobs}")
+            state.result["status"] = "ok"
+            state.result["output"] = str(save_path)
+        finally:
+            # A finished job removes its workspace right away; an unfinished one
+            # keeps it so a later run can resume from the journaled stage
+            if state.workspace and state.saved:
+                state.workspace.cleanup()
+            state.result["seconds"] = round(time.perf_counter() - state.start_time, 3)
+            if self.job_done_callback:
+                self.job_done_callback(state.idx)
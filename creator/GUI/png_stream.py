@@ -0,0 +1,138 @@
+"""
+Streaming PNG Writer
+Encodes a PNG a block of rows at a time with zlib, so an image never has to be
+held in memory as a whole to be saved (see MEMORY_BUDGET_MB in bg_simple.py)
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {3: 2, 4: 6}  # channels -> PNG colour type (RGB, RGBA)
+
+# Compressed data is written in IDAT chunks of about this size
+IDAT_CHUNK_SIZE = 256 * 1024
+# Raw bytes filtered at a time (filtering needs ~15x this in temporary arrays)
+FILTER_BLOCK_SIZE = 256 * 1024
+
+
+def _chunk(chunk_type, data):
+    return (struct.pack(">I", len(data)) + chunk_type + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+
+def filter_rows(rows, prior, bpp):
+    """
+    Apply the PNG filter that suits each row best (smallest sum of absolute values)
+
+    Args:
+        rows: (n, stride) uint8 raw scanlines
+        prior: (stride,) uint8 scanline above the first row (zeros for the first block)
+        bpp: Bytes per pixel
+
+    Returns:
+        numpy.ndarray: (n, stride + 1) uint8, filter type byte followed by the filtered row
+    """
+    # uint8 arithmetic wraps modulo 256, as the PNG filters are defined
+    up = np.vstack((prior[np.newaxis], rows[:-1]))
+    left = np.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+    upper_left = np.zeros_like(rows)
+    upper_left[:, bpp:] = up[:, :-bpp]
+    average = (left >> 1) + (up >> 1) + (left & up & 1)
+
+    # Paeth predictor: whichever of left, up, upper-left is closest to left + up - upper-left
+    d_up = up.astype(np.int16) - upper_left
+    d_left = left.astype(np.int16) - upper_left
+    pa, pb, pc = np.abs(d_up), np.abs(d_left), np.abs(d_up + d_left)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upper_left))
+
+    candidates = np.stack((rows, rows - left, rows - up, rows - average, rows - paeth))
+    # libpng's heuristic: bytes taken as signed, the smallest total magnitude wins
+    scores = np.minimum(candidates, -candidates).sum(axis=2, dtype=np.uint32)
+    best = np.argmin(scores, axis=0)
+
+    out = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = best
+    out[:, 1:] = candidates[best, np.arange(rows.shape[0])]
+    return out
+
+
+class PngStreamWriter:
+    """
+    Writes an 8-bit RGB or RGBA PNG from blocks of rows, top to bottom
+
+        with PngStreamWriter(path, width, height, 4) as png:
+            for block in blocks:
+                png.write(block)  # (rows, width, 4) uint8
+    """
+
+    def __init__(self, path, width, height, channels, compress_level=6):
+        if channels not in COLOR_TYPES:
+            raise ValueError(f"PngStreamWriter supports 3 or 4 channels, not {channels}")
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._prior = np.zeros(width * channels, dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        self._file.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8,
+                                                      COLOR_TYPES[channels], 0, 0, 0)))
+
+    def _flush(self, force=False):
+        if self._pending and (force or self._pending_size >= IDAT_CHUNK_SIZE):
+            self._file.write(_chunk(b"IDAT", b"".join(self._pending)))
+            self._pending, self._pending_size = [], 0
+
+    def _add(self, data):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+            self._flush()
+
+    def write(self, block):
+        """Append a (rows, width, channels) uint8 block below the rows written so far"""
+        if block.shape[1:] != (self.width, self.channels):
+            raise ValueError(f"Expected rows of {self.width}x{self.channels}, got {block.shape[1:]}")
+        if self.rows_written + block.shape[0] > self.height:
+            raise ValueError("More rows written than the image height")
+        if not block.shape[0]:
+            return
+        rows = np.ascontiguousarray(block, dtype=np.uint8).reshape(block.shape[0], -1)
+        step = max(1, FILTER_BLOCK_SIZE // rows.shape[1])
+        for start in range(0, rows.shape[0], step):
+            part = rows[start:start + step]
+            self._add(self._compressor.compress(filter_rows(part, self._prior, self.channels).tobytes()))
+            self._prior = part[-1].copy()
+        self.rows_written += block.shape[0]
+
+    def close(self):
+        """Finish the file; raises ValueError when fewer rows than the height were written"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"PNG incomplete: {self.rows_written} of {self.height} rows written")
+            self._add(self._compressor.flush())
+            self._flush(force=True)
+            self._file.write(_chunk(b"IEND", b""))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            self._file = None
+        return False
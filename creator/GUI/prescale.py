@@ -0,0 +1,85 @@
+"""
+Image Pre-Scaling
+Shrinks source images to the size they are shown at in the video (plus zoom
+headroom) before FG/BG separation, so the mask and encode work isn't spent on
+pixels the renderer scales away
+"""
+
+import os
+
+import cv2
+from PIL import Image
+
+# Video.jsx zooms up to 1.2x (Ken Burns) and shakes a few pixels on top of that
+DEFAULT_HEADROOM = 1.25
+
+# EXIF orientations that swap width and height when applied
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_ORIENTATION = 0x0112
+
+JPEG_QUALITY = 95
+PNG_COMPRESS_LEVEL = 1  # The file is read once by bg_simple, so favour speed
+WEBP_QUALITY = 95
+
+
+def image_size(path):
+    """Displayed (width, height) from the file header, honouring EXIF rotation"""
+    with Image.open(path) as img:
+        width, height = img.size
+        if img.getexif().get(_EXIF_ORIENTATION) in _ROTATED_ORIENTATIONS:
+            width, height = height, width
+    return width, height
+
+
+def fit_size(width, height, target_width, target_height, headroom=DEFAULT_HEADROOM):
+    """
+    Smallest size that still covers target_width x target_height (objectFit:
+    cover) at headroom times the zoom, or None when the image is already smaller
+    """
+    scale = max(target_width / width, target_height / height) * headroom
+    if scale >= 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _write_params(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+    if ext == ".png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESS_LEVEL]
+    if ext == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY]
+    return []
+
+
+def prescale_image(src, dest, target_width, target_height, headroom=DEFAULT_HEADROOM):
+    """
+    Write a downscaled copy of src to dest, in the same format
+
+    Returns:
+        tuple: (source_pixels, output_pixels), or None when src is already small
+            enough or can't be read (dest is not written)
+    """
+    try:
+        width, height = image_size(src)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    if fit_size(width, height, target_width, target_height, headroom) is None:
+        return None
+
+    # imread applies the EXIF rotation too, so the output needs no orientation tag
+    img = cv2.imread(src, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    height, width = img.shape[:2]
+    size = fit_size(width, height, target_width, target_height, headroom)
+    if size is None:
+        return None
+
+    resized = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    if os.path.lexists(dest):
+        os.unlink(dest)
+    if not cv2.imwrite(str(dest), resized, _write_params(str(dest))):
+        raise OSError(f"could not write {dest}")
+    return width * height, size[0] * size[1]
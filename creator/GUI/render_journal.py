@@ -0,0 +1,139 @@
+"""
+Batch Render Journal
+Records how far each job of a batch got (prepared, rendered, saved) so an
+interrupted batch resumes at the first incomplete stage instead of starting over
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+
+JOURNAL_NAME = ".render_journal.json"
+
+# Stages in pipeline order
+STAGES = ("prepared", "rendered", "saved")
+
+
+def _file_signature(path):
+    """Path, size and modification time - changes whenever the file is replaced or edited"""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+        return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [os.path.abspath(path), None, None]
+
+
+def job_key(job, output_file):
+    """Identify a job by its inputs and output file"""
+    payload = {
+        "audio": _file_signature(job.get("audio")),
+        "caption": _file_signature(job.get("caption")),
+        "images": [_file_signature(p) for p in job.get("images") or ()],
+        "output": os.path.abspath(output_file),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_valid_mp4(path):
+    """
+    Cheap completeness check for an MP4 file
+
+    Walks the top-level boxes: the file must start with ftyp, contain a moov box
+    and the boxes must add up to the file size (a truncated write fails this).
+    """
+    try:
+        size = os.path.getsize(path)
+        seen = set()
+        with open(path, "rb") as f:
+            offset = 0
+            while offset < size:
+                f.seek(offset)
+                header = f.read(16)
+                if len(header) < 8:
+                    return False
+                box_size, box_type = struct.unpack(">I4s", header[:8])
+                if box_size == 1:
+                    if len(header) < 16:
+                        return False
+                    box_size = struct.unpack(">Q", header[8:16])[0]
+                elif box_size == 0:
+                    box_size = size - offset  # Box runs to the end of the file
+                if box_size < 8:
+                    return False
+                if offset == 0 and box_type != b"ftyp":
+                    return False
+                seen.add(box_type)
+                offset += box_size
+        return offset == size and b"moov" in seen
+    except OSError:
+        return False
+
+
+class BatchJournal:
+    """
+    Per-output-directory record of job stages, written atomically after every change
+
+    Safe to use from several job threads at once.
+    """
+
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / JOURNAL_NAME
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries = json.load(f).get("jobs", {})
+        except (OSError, ValueError, AttributeError):
+            self._entries = {}
+
+    def _write(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"jobs": self._entries}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def record(self, key, stage, **details):
+        """Mark a job as having completed stage, with optional details (workspace, output)"""
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            entry.update(details)
+            entry["stage"] = stage
+            self._write()
+
+    def resume_stage(self, key):
+        """
+        Last completed stage of a job whose results are still on disk
+
+        Returns:
+            tuple: (stage or None, entry dict)
+        """
+        with self._lock:
+            entry = dict(self._entries.get(key, {}))
+        stage = entry.get("stage")
+        if stage == "saved" and is_valid_mp4(entry.get("output", "")):
+            return "saved", entry
+        workspace = entry.get("workspace")
+        if not workspace or not os.path.isdir(workspace):
+            return None, entry
+        if stage in ("rendered", "saved") and \
+                is_valid_mp4(os.path.join(workspace, "out", "video.mp4")):
+            return "rendered", entry
+        if stage in STAGES:
+            return "prepared", entry
+        return None, entry
+
+    def remove(self):
+        """Delete the journal once the whole batch has finished"""
+        with self._lock:
+            self._entries = {}
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
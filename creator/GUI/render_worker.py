@@ -0,0 +1,175 @@
+"""
+Persistent Render Worker
+Keeps one render-worker.js process alive for a whole batch, so the Remotion
+project is bundled (and Chrome started) once instead of once per video
+"""
+
+import json
+import os
+import subprocess
+import threading
+
+from metrics import wait_with_usage
+
+WORKER_SCRIPT = "render-worker.js"
+
+# Machine-readable lines printed by render-worker.js, each followed by JSON
+READY = "RENDER_WORKER_READY"
+DONE = "RENDER_DONE"
+PROGRESS = "RENDER_PROGRESS"
+TIMING = "RENDER_TIMING"
+MESSAGE_KINDS = (READY, DONE, PROGRESS, TIMING)
+
+
+def parse_message(line):
+    """Split a worker line into (kind, payload), or (None, None) for plain log output"""
+    kind, _, rest = line.partition(" ")
+    if kind not in MESSAGE_KINDS:
+        return None, None
+    try:
+        payload = json.loads(rest)
+    except ValueError:
+        return None, None
+    return (kind, payload) if isinstance(payload, dict) else (None, None)
+
+
+class _PendingRender:
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = None
+        self.error = None
+
+
+class RenderWorker:
+    """
+    Client for render-worker.js
+
+    Several threads may call render() at once; the worker renders their jobs
+    side by side in the same browser. Job ids must be unique per worker.
+
+    Args:
+        project_root: The creator folder (holds render-worker.js)
+        log: Called with each plain output line
+        on_message: Called as on_message(kind, payload) for RENDER_PROGRESS and
+            RENDER_TIMING lines; payload["job"] is the job id (absent for the
+            one-off "bundle" timing)
+    """
+
+    def __init__(self, project_root, log=None, on_message=None):
+        self.project_root = project_root
+        self._log = log or print
+        self._on_message = on_message
+        self.process = None
+        self.bundle = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._closed = False
+        self._threads = []
+
+    def start(self):
+        """Launch the worker; bundling runs in the background until the first render waits for it"""
+        self.process = subprocess.Popen(
+            ["node", WORKER_SCRIPT],
+            cwd=str(self.project_root),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1
+        )
+        self._threads = [threading.Thread(target=self._read_stdout, daemon=True),
+                         threading.Thread(target=self._read_stderr, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def alive(self):
+        return self.process is not None and not self._closed
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            line = line.rstrip()
+            kind, payload = parse_message(line)
+            if kind == READY:
+                self.bundle = payload.get("bundle")
+                self._ready.set()
+            elif kind == DONE:
+                with self._lock:
+                    pending = self._pending.pop(payload.get("job"), None)
+                if pending is not None:
+                    pending.ok = bool(payload.get("ok"))
+                    pending.error = payload.get("error")
+                    pending.done.set()
+            elif kind is not None:
+                if self._on_message:
+                    self._on_message(kind, payload)
+            elif line.strip():
+                self._log(line)
+
+        # The worker exited: nothing more can be rendered with it
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        self._ready.set()
+        for job in pending.values():
+            job.error = "render worker exited"
+            job.done.set()
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            if line.strip():
+                self._log(f"Error: {line.rstrip()}")
+
+    def render(self, job, workspace, concurrency=None, duration_seconds=None):
+        """
+        Render a job workspace to <workspace>/out/video.mp4 and wait for it
+
+        Returns:
+            bool or None: Whether the render succeeded, or None when the worker
+                is not running (failed to bundle or crashed) and the job should be
+                rendered another way
+        """
+        self._ready.wait()
+        request = {"job": job, "workspace": os.path.abspath(str(workspace))}
+        if concurrency:
+            request["concurrency"] = concurrency
+        if duration_seconds:
+            request["durationSeconds"] = duration_seconds
+
+        pending = _PendingRender()
+        with self._lock:
+            if self._closed:
+                return None
+            self._pending[job] = pending
+            try:
+                self.process.stdin.write(json.dumps(request) + "\n")
+                self.process.stdin.flush()
+            except (OSError, ValueError):
+                del self._pending[job]
+                return None
+        pending.done.wait()
+        if pending.error:
+            self._log(f"Render failed: {pending.error}")
+        return pending.ok
+
+    def stop(self):
+        """
+        Let running renders finish and end the worker
+
+        Returns:
+            tuple: (returncode, usage dict or None) as from metrics.wait_with_usage
+        """
+        if self.process is None:
+            return None, None
+        with self._lock:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        returncode, usage = wait_with_usage(self.process)
+        for thread in self._threads:
+            thread.join()
+        return returncode, usage
@@ -0,0 +1,96 @@
+"""
+Audio Transcription
+Creates caption files for audio that has none by running sub.mjs (whisper.cpp)
+and caches every transcript by audio content, so no file is transcribed twice
+"""
+
+import hashlib
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+from bg_cache import hash_file
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tiktok-faceless", "transcripts")
+
+# Transcripts also depend on the Whisper model and language set here
+WHISPER_CONFIG_NAME = "whisper-config.mjs"
+
+# Lines of sub.mjs output kept for the error message of a failed transcription
+ERROR_TAIL_LINES = 5
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+class Transcriber:
+    """
+    Transcribes audio files into Remotion caption JSON with a content-keyed cache
+
+    Safe to use from several threads at once; the same audio is never
+    transcribed by two threads in parallel.
+    """
+
+    def __init__(self, project_root, cache_dir=DEFAULT_CACHE_DIR, threads=0, log=None):
+        self.project_root = Path(project_root)
+        self.cache_dir = cache_dir
+        self.threads = threads
+        self._log = log or print
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def cache_key(self, audio_file):
+        """Audio content hash combined with the Whisper settings"""
+        digest = hashlib.sha256(hash_file(audio_file).encode("utf-8"))
+        try:
+            digest.update((self.project_root / WHISPER_CONFIG_NAME).read_bytes())
+        except OSError:
+            pass
+        return digest.hexdigest()
+
+    def cached_transcript(self, audio_file):
+        """Path of the cached transcript for audio_file, or None"""
+        path = os.path.join(self.cache_dir, f"{self.cache_key(audio_file)}.json")
+        return path if os.path.isfile(path) else None
+
+    def transcribe(self, audio_file):
+        """
+        Return a caption file for audio_file, transcribing it unless it is cached
+
+        Raises:
+            TranscriptionError: sub.mjs failed
+        """
+        key = self.cache_key(audio_file)
+        dest = os.path.join(self.cache_dir, f"{key}.json")
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if os.path.isfile(dest):
+                self._log(f"Using cached transcript for {os.path.basename(audio_file)}")
+                return dest
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            command = ["npm", "run", "create-subtitles", "--", "--output", dest]
+            if self.threads:
+                command += ["--threads", str(self.threads)]
+            command.append(os.path.abspath(audio_file))
+
+            self._log(f"Transcribing {os.path.basename(audio_file)}...")
+            # npm is a .cmd script on Windows, so it needs the shell
+            process = subprocess.run(
+                command,
+                cwd=str(self.project_root),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                shell=(os.name == "nt")
+            )
+            if process.returncode != 0 or not os.path.isfile(dest):
+                tail = [line for line in process.stdout.splitlines() if line.strip()][-ERROR_TAIL_LINES:]
+                raise TranscriptionError(f"sub.mjs exited with code {process.returncode}"
+                                         + (": " + " | ".join(tail) if tail else ""))
+            return dest
@@ -2,11 +2,16 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import shutil
-import subprocess
-import json
 from pathlib import Path
 import threading
-import random
+import time
+import queue
+import logging
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import VideoPipeline, find_audio_caption_pairs
+from virtual_listbox import VirtualListbox
 
 # Try to import config, use defaults if not available
 try:
@@ -14,7 +19,7 @@ try:
 except ImportError:
     # Default settings if config.py is not found
     WINDOW_WIDTH = 700
-    WINDOW_HEIGHT = 700
+    WINDOW_HEIGHT = 760
     WINDOW_TITLE = "TikTok Faceless Video Generator"
     AUDIO_EXTENSIONS = [("Audio Files", "*.mp3 *.wav *.m4a *.aac *.flac"), ("All Files", "*.*")]
     IMAGE_EXTENSIONS = [("Image Files", "*.jpg *.jpeg *.png *.webp"), ("All Files", "*.*")]
@@ -31,7 +36,45 @@ except ImportError:
     LOG_TEXT_HEIGHT = 8
     CONFIRM_BEFORE_RENDER = True
     AUTO_CLEANUP_AFTER_SAVE = True
-    MAX_AUDIO_CAPTION_PAIRS = 4
+    CAPTION_LOAD_WORKERS = 2
+    IMAGE_PREP_WORKERS = 0
+    MAX_CONCURRENT_RENDERS = 1
+    RENDER_CONCURRENCY = 0
+    LOG_MAX_LINES = 2000
+    LOG_FLUSH_INTERVAL_MS = 100
+    LOG_FILE_MAX_MB = 5
+    LOG_FILE_BACKUPS = 3
+
+
+def create_file_logger(log_file, max_mb, backups):
+    """
+    Logger that writes to a rotating file from a background thread
+
+    Returns:
+        tuple: (logger, QueueListener) - call listener.stop() on exit to flush
+    """
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, file_handler)
+    listener.start()
+    
+    logger = logging.getLogger("video_generator")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers = [logging.handlers.QueueHandler(records)]
+    return logger, listener
+
+
+def format_eta(seconds):
+    """Format a number of seconds as m:ss (or h:mm:ss)"""
+    seconds = int(max(0, seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
 
 
 class VideoGeneratorGUI:
@@ -43,10 +86,24 @@ class VideoGeneratorGUI:
         
         # Get the project root directory (parent of GUI folder)
         self.project_root = Path(__file__).parent.parent
-        self.assets_path = self.project_root / "public" / "assets"
-        self.audio_path = self.assets_path / "audio"
-        self.images_path = self.assets_path / "images"
-        self.output_path = self.project_root / "out"
+        
+        # Log lines from any thread are queued and drawn in batches by the Tk loop;
+        # the complete log goes to a rotating file
+        self.log_queue = queue.SimpleQueue()
+        # UI updates requested by worker threads, run by the Tk loop (see call_in_ui)
+        self.ui_queue = queue.SimpleQueue()
+        self.log_file = self.project_root / "logs" / "video_generator.log"
+        self.file_logger, self.log_listener = create_file_logger(
+            self.log_file, LOG_FILE_MAX_MB, LOG_FILE_BACKUPS)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Image prep, staging, rendering and saving live in the UI-independent pipeline
+        self.pipeline = VideoPipeline(self.project_root, log=self.log,
+                                      progress_callback=self.on_render_progress,
+                                      job_done_callback=self.finish_job_progress)
+        self.audio_path = self.pipeline.audio_path
+        self.images_path = self.pipeline.images_path
+        self.output_path = self.pipeline.output_path
         
         # Ensure directories exist
         self.audio_path.mkdir(parents=True, exist_ok=True)
@@ -55,11 +112,22 @@ class VideoGeneratorGUI:
         
         # Variables to store file paths - now supporting multiple audio/caption pairs
         self.audio_caption_pairs = []  # List of tuples: (audio_file, caption_file)
+        
+        # Caption files are parsed and validated off the UI thread; files that
+        # needed converting are rendered from their normalized copy
+        self.caption_executor = ThreadPoolExecutor(max_workers=CAPTION_LOAD_WORKERS)
+        self.pending_captions = 0
+        self.normalized_captions = {}  # caption_file -> file to render with
+        self.folder_batches = []  # Folder imports still being checked (see clear_all_pairs)
         self.image_files = []
         self.is_rendering = False
         
-        # Path to background music folder
-        self.bg_music_path = self.assets_path / "bg"
+        # Render progress per job index, updated from worker threads
+        self.progress_lock = threading.Lock()
+        self.progress_changed = threading.Event()  # Bars are redrawn on the next drain
+        self.job_progress = {}
+        self.total_jobs = 0
+        self.batch_start_time = None
         
         self.setup_ui()
         
@@ -74,7 +142,7 @@ class VideoGeneratorGUI:
         title_label.grid(row=0, column=0, columnspan=3, pady=(0, 20))
         
         # Audio/Caption Pairs Section
-        pairs_frame = ttk.LabelFrame(main_frame, text=f"Audio/Caption Pairs (Max {MAX_AUDIO_CAPTION_PAIRS})", padding="10")
+        pairs_frame = ttk.LabelFrame(main_frame, text="Audio/Caption Pairs", padding="10")
         pairs_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         
         self.pairs_label = ttk.Label(pairs_frame, text="No audio/caption pairs added", 
@@ -85,27 +153,24 @@ class VideoGeneratorGUI:
                                   command=self.add_audio_caption_pair)
         add_pair_btn.grid(row=0, column=1)
         
+        add_folder_btn = ttk.Button(pairs_frame, text="Add Folder", 
+                                    command=self.add_pairs_from_folder)
+        add_folder_btn.grid(row=0, column=2, padx=(5, 0))
+        
         clear_pairs_btn = ttk.Button(pairs_frame, text="Clear All", 
                                       command=self.clear_all_pairs)
-        clear_pairs_btn.grid(row=0, column=2, padx=(5, 0))
-        
-        # Pairs list
-        pairs_list_frame = ttk.Frame(pairs_frame)
-        pairs_list_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), 
-                               pady=(10, 0))
-        
-        self.pairs_listbox = tk.Listbox(pairs_list_frame, height=6)
-        self.pairs_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        clear_pairs_btn.grid(row=0, column=3, padx=(5, 0))
         
-        pairs_scrollbar = ttk.Scrollbar(pairs_list_frame, orient=tk.VERTICAL, 
-                                        command=self.pairs_listbox.yview)
-        pairs_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.pairs_listbox.config(yscrollcommand=pairs_scrollbar.set)
+        # Pairs list - only the visible rows are drawn, so it stays fast with thousands of pairs
+        self.pairs_listbox = VirtualListbox(pairs_frame, self.pair_row, height=6)
+        self.pairs_listbox.grid(row=1, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), 
+                                pady=(10, 0))
+        self.pairs_listbox.bind_listbox("<Delete>", lambda event: self.remove_selected_pair())
         
         # Remove selected pair button
         remove_pair_btn = ttk.Button(pairs_frame, text="Remove Selected", 
                                       command=self.remove_selected_pair)
-        remove_pair_btn.grid(row=2, column=0, columnspan=3, pady=(5, 0))
+        remove_pair_btn.grid(row=2, column=0, columnspan=4, pady=(5, 0))
         
         pairs_frame.columnconfigure(0, weight=1)
         
@@ -148,9 +213,17 @@ class VideoGeneratorGUI:
                                         foreground=COLOR_READY)
         self.progress_label.pack()
         
-        self.progress_bar = ttk.Progressbar(progress_frame, mode='indeterminate')
+        # Whole batch
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
         self.progress_bar.pack(fill=tk.X, pady=(10, 0))
         
+        # Current video
+        self.job_progress_label = ttk.Label(progress_frame, text="")
+        self.job_progress_label.pack(pady=(5, 0))
+        
+        self.job_progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        self.job_progress_bar.pack(fill=tk.X, pady=(5, 0))
+        
         # Render Button
         self.render_btn = ttk.Button(main_frame, text="Render Video", 
                                      command=self.render_video, 
@@ -175,20 +248,63 @@ class VideoGeneratorGUI:
         
         self.log("Application started successfully")
         self.log(f"Project root: {self.project_root}")
+        self.log(f"Full log: {self.log_file}")
+        self.drain_log_queue()
     
     def log(self, message):
-        """Add a message to the log"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add a message to the log (safe to call from any thread)"""
+        self.log_queue.put(message)
+        self.file_logger.info(message)
+    
+    def call_in_ui(self, func, *args):
+        """Run func(*args) on the UI thread (safe to call from any thread)"""
+        self.ui_queue.put((func, args))
+    
+    def drain_log_queue(self):
+        """
+        Append queued log lines to the log widget in one batch, then redraw the
+        progress bars and run queued UI calls (UI thread, on a timer)
+        """
+        lines = []
+        try:
+            while True:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if lines:
+            # Only the newest LOG_MAX_LINES are shown; the rest is in the log file
+            lines = lines[-LOG_MAX_LINES:]
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            line_count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+            self.log_text.see(tk.END)
+        
+        if self.progress_changed.is_set():
+            self.progress_changed.clear()
+            self.refresh_progress()
+        
+        try:
+            while True:
+                func, args = self.ui_queue.get_nowait()
+                try:
+                    func(*args)
+                except Exception as e:
+                    self.log(f"UI update failed: {str(e)}")
+        except queue.Empty:
+            pass
+        
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.drain_log_queue)
+    
+    def on_close(self):
+        """Flush the log file and close the window"""
+        self.caption_executor.shutdown(wait=False)
+        self.log_listener.stop()
+        self.root.destroy()
     
     def add_audio_caption_pair(self):
         """Add a new audio/caption pair"""
-        if len(self.audio_caption_pairs) >= MAX_AUDIO_CAPTION_PAIRS:
-            messagebox.showwarning("Limit Reached", 
-                                  f"Maximum {MAX_AUDIO_CAPTION_PAIRS} audio/caption pairs allowed!")
-            return
-        
         # Browse for audio file
         audio_file = filedialog.askopenfilename(
             title="Select Audio File",
@@ -203,51 +319,172 @@ class VideoGeneratorGUI:
             filetypes=CAPTION_EXTENSIONS
         )
         if not caption_file:
-            messagebox.showwarning("Caption Required", 
-                                  "Caption file is required for each audio file!")
+            if not messagebox.askyesno("No Caption File",
+                                       "No caption file selected.\n\n"
+                                       "Transcribe this audio automatically while rendering?"):
+                return
+            self.add_pair(audio_file, None)
             return
         
-        # Validate caption file
+        # Validate every caption in the background; the pair is added when that finishes
+        self.pending_captions += 1
+        self.update_pairs_label()
+        self.log(f"Checking caption file: {os.path.basename(caption_file)}")
+        future = self.caption_executor.submit(self.pipeline.load_caption, audio_file, caption_file)
+        future.add_done_callback(
+            lambda f: self.call_in_ui(self.finish_add_pair, audio_file, caption_file, f))
+    
+    def check_caption_result(self, caption_file, future, verbose=True):
+        """Log a caption validation result (UI thread); returns its errors, empty when usable"""
+        caption_name = os.path.basename(caption_file)
         try:
-            with open(caption_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Check if it's an array (correct format)
-            if not isinstance(data, list):
-                messagebox.showwarning("Format Warning", 
-                    "Caption file should be a JSON array, not an object.\n\n"
-                    "See CAPTION_TROUBLESHOOTING.md for correct format.")
-                self.log("Warning: Caption file is not an array")
-            
-            # Check for correct field names
-            if data and len(data) > 0:
-                first_item = data[0]
-                if 'start' in first_item or 'end' in first_item:
-                    messagebox.showwarning("Format Warning",
-                        "Caption file uses 'start'/'end' but should use 'startMs'/'endMs'.\n\n"
-                        "See CAPTION_TROUBLESHOOTING.md for correct format.")
-                    self.log("Warning: Caption uses 'start'/'end' instead of 'startMs'/'endMs'")
-                elif 'startMs' in first_item and 'endMs' in first_item:
-                    self.log(f"Caption format validated: {len(data)} captions found")
-        except json.JSONDecodeError as e:
-            messagebox.showerror("Invalid File", 
-                f"The selected file is not a valid JSON file.\n\nError: {str(e)}")
-            self.log(f"Error: Invalid JSON file - {str(e)}")
+            caption = future.result()
+        except Exception as e:
+            caption = {"errors": [str(e)]}
+        
+        if caption["errors"]:
+            for error in caption["errors"]:
+                self.log(f"Error: {caption_name}: {error}")
+            return caption["errors"]
+        
+        if caption["converted"]:
+            self.log(f"Converted {caption['converted']} captions from 'start'/'end' seconds to 'startMs'/'endMs'"
+                     f" ({caption_name})")
+        if verbose:
+            self.log(f"Caption format validated: {caption['count']} captions found"
+                     f"{' (cached)' if caption['cached'] else ''}")
+        self.normalized_captions[caption_file] = caption["caption_file"]
+        return []
+    
+    def finish_add_pair(self, audio_file, caption_file, future):
+        """Add a pair once its caption file has been validated (UI thread)"""
+        self.pending_captions -= 1
+        errors = self.check_caption_result(caption_file, future)
+        if errors:
+            self.update_pairs_label()
+            messagebox.showerror("Invalid Caption File",
+                f"{os.path.basename(caption_file)} can't be used:\n\n" + "\n".join(errors) +
+                "\n\nSee CAPTION_TROUBLESHOOTING.md for correct format.")
             return
         
-        # Add the pair
-        self.audio_caption_pairs.append((audio_file, caption_file))
+        self.add_pair(audio_file, caption_file)
+    
+    def add_pairs_from_folder(self):
+        """Add every audio file in a folder, paired with the caption JSON of the same name"""
+        folder = filedialog.askdirectory(title="Select Folder with Audio and Caption Files")
+        if not folder:
+            return
         
-        # Update listbox
-        audio_name = os.path.basename(audio_file)
-        caption_name = os.path.basename(caption_file)
-        self.pairs_listbox.insert(tk.END, f"{len(self.audio_caption_pairs)}. Audio: {audio_name} | Caption: {caption_name}")
+        try:
+            pairs, unpaired_audio, unpaired_captions = find_audio_caption_pairs(folder)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read folder: {e}")
+            return
         
-        # Update label
-        self.pairs_label.config(text=f"{len(self.audio_caption_pairs)} pair(s) added", 
-                                foreground=COLOR_SELECTED)
+        if unpaired_captions:
+            self.log(f"Skipped {len(unpaired_captions)} caption file(s) without audio of the same name")
+        if unpaired_audio and messagebox.askyesno(
+                "Audio Without Captions",
+                f"{len(unpaired_audio)} audio file(s) have no caption file of the same name.\n\n"
+                "Transcribe them automatically while rendering?"):
+            pairs = sorted(pairs + [(audio_file, None) for audio_file in unpaired_audio],
+                           key=lambda pair: pair[0].lower())
+        
+        # Audio already in the list (e.g. the same folder added twice) is skipped
+        added = {os.path.normcase(os.path.abspath(audio_file)) for audio_file, _ in self.audio_caption_pairs}
+        new_pairs = [pair for pair in pairs if os.path.normcase(os.path.abspath(pair[0])) not in added]
+        if len(new_pairs) < len(pairs):
+            self.log(f"Skipped {len(pairs) - len(new_pairs)} audio file(s) that are already in the list")
+        if not new_pairs:
+            messagebox.showinfo("Nothing to Add",
+                                "No new audio files with a caption file of the same name found in this folder.")
+            return
         
-        self.log(f"Added pair {len(self.audio_caption_pairs)}: {audio_name} + {caption_name}")
+        # Captions are validated in parallel; pairs are added in folder order as they pass
+        self.log(f"Adding {len(new_pairs)} pair(s) from {folder}...")
+        batch = {"pairs": new_pairs, "checked": [None] * len(new_pairs), "next": 0, "added": 0, "failed": [],
+                 "futures": [], "cancelled": False}
+        self.folder_batches.append(batch)
+        for index, (audio_file, caption_file) in enumerate(new_pairs):
+            if caption_file is None:
+                batch["checked"][index] = True
+                continue
+            self.pending_captions += 1
+            future = self.caption_executor.submit(self.pipeline.load_caption, audio_file, caption_file)
+            batch["futures"].append(future)
+            future.add_done_callback(
+                lambda f, index=index: self.call_in_ui(self.finish_folder_pair, batch, index, f))
+        self.add_checked_pairs(batch)
+    
+    def finish_folder_pair(self, batch, index, future):
+        """Record the caption check of one folder pair (UI thread)"""
+        self.pending_captions -= 1
+        if batch["cancelled"]:
+            self.update_pairs_label()
+            return
+        audio_file, caption_file = batch["pairs"][index]
+        errors = self.check_caption_result(caption_file, future, verbose=False)
+        batch["checked"][index] = not errors
+        if errors:
+            batch["failed"].append(os.path.basename(caption_file))
+        self.add_checked_pairs(batch)
+    
+    def add_checked_pairs(self, batch):
+        """Add the folder pairs whose captions (and all before them) have been checked"""
+        if batch["cancelled"]:
+            return
+        pairs, checked = batch["pairs"], batch["checked"]
+        start = batch["next"]
+        while batch["next"] < len(pairs) and checked[batch["next"]] is not None:
+            if checked[batch["next"]]:
+                self.add_pair(*pairs[batch["next"]], verbose=False)
+                batch["added"] += 1
+            batch["next"] += 1
+        self.update_pairs_label()
+        if batch["next"] < len(pairs) or start == len(pairs):
+            return
+        self.folder_batches.remove(batch)
+        
+        self.log(f"Added {batch['added']} pair(s) from the folder ({len(self.audio_caption_pairs)} in the list)")
+        if batch["failed"]:
+            shown = "\n".join(batch["failed"][:10])
+            more = f"\n...and {len(batch['failed']) - 10} more" if len(batch["failed"]) > 10 else ""
+            messagebox.showerror("Invalid Caption Files",
+                f"{len(batch['failed'])} caption file(s) can't be used and were skipped:\n\n{shown}{more}"
+                "\n\nSee the log for details and CAPTION_TROUBLESHOOTING.md for correct format.")
+    
+    def add_pair(self, audio_file, caption_file, verbose=True):
+        """Append a pair to the list (caption_file None = transcribe while rendering)"""
+        self.audio_caption_pairs.append((audio_file, caption_file))
+        self.pairs_listbox.append_rows(1)
+        if verbose:
+            self.update_pairs_label()
+            caption_name = os.path.basename(caption_file) if caption_file else "auto transcript"
+            self.log(f"Added pair {len(self.audio_caption_pairs)}: {os.path.basename(audio_file)} + {caption_name}")
+    
+    def pair_row(self, index):
+        """Listbox line for the pair at index (drawn only while visible)"""
+        return self.pair_text(index + 1, *self.audio_caption_pairs[index])
+    
+    def pair_text(self, number, audio_file, caption_file):
+        """Listbox line for a pair"""
+        caption_name = os.path.basename(caption_file) if caption_file else "(auto transcribe)"
+        seconds = self.pipeline.audio_duration(audio_file)
+        length = f"{seconds:.1f}s, {self.pipeline.expected_frames(seconds)} frames" if seconds else "length unknown"
+        return f"{number}. Audio: {os.path.basename(audio_file)} ({length}) | Caption: {caption_name}"
+    
+    def update_pairs_label(self):
+        """Show how many pairs are added (and how many captions are still being checked)"""
+        if self.pending_captions:
+            self.pairs_label.config(text=f"{len(self.audio_caption_pairs)} pair(s) added, "
+                                         f"checking {self.pending_captions} caption file(s)...",
+                                    foreground=COLOR_PROCESSING)
+        elif self.audio_caption_pairs:
+            self.pairs_label.config(text=f"{len(self.audio_caption_pairs)} pair(s) added", 
+                                    foreground=COLOR_SELECTED)
+        else:
+            self.pairs_label.config(text="No audio/caption pairs added", 
+                                    foreground=COLOR_UNSELECTED)
     
     def remove_selected_pair(self):
         """Remove selected pair from the list"""
@@ -259,32 +496,25 @@ class VideoGeneratorGUI:
         index = selection[0]
         audio_file, caption_file = self.audio_caption_pairs[index]
         
-        # Remove from list
+        # Remove from list; the listbox redraws only its visible rows
         del self.audio_caption_pairs[index]
-        
-        # Update listbox
-        self.pairs_listbox.delete(0, tk.END)
-        for i, (audio, caption) in enumerate(self.audio_caption_pairs, start=1):
-            audio_name = os.path.basename(audio)
-            caption_name = os.path.basename(caption)
-            self.pairs_listbox.insert(tk.END, f"{i}. Audio: {audio_name} | Caption: {caption_name}")
+        self.pairs_listbox.remove_row(index)
         
         # Update label
-        if self.audio_caption_pairs:
-            self.pairs_label.config(text=f"{len(self.audio_caption_pairs)} pair(s) added", 
-                                    foreground=COLOR_SELECTED)
-        else:
-            self.pairs_label.config(text="No audio/caption pairs added", 
-                                    foreground=COLOR_UNSELECTED)
+        self.update_pairs_label()
         
         self.log(f"Removed pair: {os.path.basename(audio_file)}")
     
     def clear_all_pairs(self):
-        """Clear all audio/caption pairs"""
+        """Clear all audio/caption pairs, dropping folder imports still being checked"""
+        for batch in self.folder_batches:
+            batch["cancelled"] = True
+            for future in batch["futures"]:
+                future.cancel()
+        self.folder_batches = []
         self.audio_caption_pairs = []
-        self.pairs_listbox.delete(0, tk.END)
-        self.pairs_label.config(text="No audio/caption pairs added", 
-                                foreground=COLOR_UNSELECTED)
+        self.pairs_listbox.clear()
+        self.update_pairs_label()
         self.log("Cleared all audio/caption pairs")
     
     def browse_audio(self):
@@ -295,26 +525,6 @@ class VideoGeneratorGUI:
         """Clear selected audio (deprecated - kept for compatibility)"""
         pass
     
-    def get_random_bg_music(self):
-        """Get a random background music file from the bg folder"""
-        try:
-            # Get all audio files from bg folder
-            audio_extensions = ['.mp3', '.wav', '.m4a', '.aac', '.flac']
-            bg_files = [f for f in self.bg_music_path.glob('*') 
-                       if f.suffix.lower() in audio_extensions and f.is_file()]
-            
-            if not bg_files:
-                self.log("Warning: No background music files found in assets/bg folder")
-                return None
-            
-            # Select random file
-            selected_bg = random.choice(bg_files)
-            self.log(f"Randomly selected background music: {selected_bg.name}")
-            return selected_bg
-        except Exception as e:
-            self.log(f"Error selecting random background music: {str(e)}")
-            return None
-    
     def browse_images(self):
         """Browse for multiple images"""
         filenames = filedialog.askopenfilenames(
@@ -345,135 +555,60 @@ class VideoGeneratorGUI:
         """Clear selected caption (deprecated - kept for compatibility)"""
         pass
     
-    def clear_assets_folders(self):
-        """Clear all files in assets/audio and assets/images folders"""
-        try:
-            # Clear audio folder
-            for file in self.audio_path.glob('*'):
-                if file.is_file():
-                    file.unlink()
-            
-            # Clear images folder
-            for file in self.images_path.glob('*'):
-                if file.is_file():
-                    file.unlink()
-            
-            self.log("Cleared assets folders")
-        except Exception as e:
-            self.log(f"Error clearing assets: {str(e)}")
+    def on_render_progress(self, job_index, progress):
+        """Record a job's frame progress (any thread); the bars are redrawn on the UI thread"""
+        now = time.perf_counter()
+        rendered = progress.get("renderedFrames", 0)
+        with self.progress_lock:
+            state = self.job_progress.setdefault(job_index, {
+                "first_time": now, "first_frames": rendered,
+            })
+            state["fraction"] = min(1.0, max(0.0, float(progress.get("progress", 0))))
+            state["rendered"] = rendered
+            state["total_frames"] = progress.get("totalFrames", 0)
+            elapsed = now - state["first_time"]
+            state["fps"] = (rendered - state["first_frames"]) / elapsed if elapsed > 0 else 0.0
+        self.progress_changed.set()
     
-    def copy_files_to_assets(self, audio_file, caption_file):
-        """Copy selected files to assets folders for a specific audio/caption pair"""
-        try:
-            # Copy audio file
-            if audio_file:
-                dest = self.audio_path / os.path.basename(audio_file)
-                shutil.copy2(audio_file, dest)
-                self.log(f"Copied audio to: {dest}")
-            
-            # Copy random background music
-            random_bg = self.get_random_bg_music()
-            if random_bg:
-                dest = self.audio_path / f"bgmusic{random_bg.suffix}"
-                shutil.copy2(random_bg, dest)
-                self.log(f"Copied background music to: {dest}")
-            
-            # Process and copy images with FG/BG separation (only if images exist)
-            if self.image_files:
-                self.log(f"Processing {len(self.image_files)} images for FG/BG separation...")
-                
-                # Import bg_simple processor
-                import sys
-                gui_dir = Path(__file__).parent
-                sys.path.insert(0, str(gui_dir))
-                
-                try:
-                    from bg_simple import process_image
-                    
-                    for idx, img_file in enumerate(self.image_files, start=1):
-                        self.log(f"Processing image {idx}/{len(self.image_files)}: {os.path.basename(img_file)}")
-                        
-                        # Get file extension
-                        ext = os.path.splitext(img_file)[1]
-                        base_name = f"image_{idx}"
-                        
-                        # First copy original to temp location
-                        temp_input = self.images_path / f"{base_name}{ext}"
-                        shutil.copy2(img_file, temp_input)
-                        
-                        # Process with bg_simple to generate FG and BG
-                        fg_file, bg_file = process_image(
-                            str(temp_input), 
-                            str(self.images_path),
-                            verbose=False
-                        )
-                        
-                        if fg_file and bg_file:
-                            self.log(f"  ✓ Generated {os.path.basename(fg_file)} and {os.path.basename(bg_file)}")
-                            # Remove the temporary original file
-                            temp_input.unlink()
-                        else:
-                            self.log(f"  ⚠ Failed to process, keeping original")
-                    
-                    self.log(f"Completed processing {len(self.image_files)} images")
-                    
-                except ImportError as e:
-                    self.log(f"Warning: Could not import bg_simple module: {e}")
-                    self.log("Copying images without FG/BG separation...")
-                    # Fallback: just copy images normally
-                    for idx, img_file in enumerate(self.image_files, start=1):
-                        ext = os.path.splitext(img_file)[1]
-                        dest = self.images_path / f"image_{idx}{ext}"
-                        shutil.copy2(img_file, dest)
-                    self.log(f"Copied {len(self.image_files)} images to assets")
-            
-            # Copy caption file - always use "Untitled.json" to match Video.jsx expectation
-            if caption_file:
-                dest = self.audio_path / "Untitled.json"
-                shutil.copy2(caption_file, dest)
-                self.log(f"Copied caption to: {dest}")
-            
-            return True
-        except Exception as e:
-            self.log(f"Error copying files: {str(e)}")
-            messagebox.showerror("Error", f"Failed to copy files: {str(e)}")
-            return False
+    def finish_job_progress(self, job_index):
+        """Mark a job as finished (successful or not) for the batch progress"""
+        with self.progress_lock:
+            self.job_progress.setdefault(job_index, {"first_time": 0, "first_frames": 0})
+            self.job_progress[job_index]["fraction"] = 1.0
+            self.job_progress[job_index]["done"] = True
+        self.progress_changed.set()
     
-    def run_render(self):
-        """Run the Node.js render process"""
-        try:
-            self.log("Starting render process...")
-            
-            # Run npm render command
-            result = subprocess.run(
-                ["npm", "run", "render"],
-                cwd=str(self.project_root),
-                capture_output=True,
-                text=True,
-                shell=True
-            )
-            
-            # Log output
-            if result.stdout:
-                for line in result.stdout.split('\n'):
-                    if line.strip():
-                        self.log(line)
-            
-            if result.stderr:
-                for line in result.stderr.split('\n'):
-                    if line.strip():
-                        self.log(f"Error: {line}")
-            
-            if result.returncode == 0:
-                self.log("Render completed successfully!")
-                return True
-            else:
-                self.log(f"Render failed with code {result.returncode}")
-                return False
-                
-        except Exception as e:
-            self.log(f"Error during render: {str(e)}")
-            return False
+    def refresh_progress(self):
+        """Update the batch and per-video progress bars (UI thread only)"""
+        with self.progress_lock:
+            jobs = {idx: dict(state) for idx, state in self.job_progress.items()}
+        if not self.total_jobs:
+            return
+        
+        # Batch: average fraction over all jobs, ETA from the rate so far
+        batch_fraction = sum(state.get("fraction", 0) for state in jobs.values()) / self.total_jobs
+        done_count = sum(1 for state in jobs.values() if state.get("done"))
+        batch_text = f"Batch: {done_count}/{self.total_jobs} videos done ({batch_fraction * 100:.0f}%)"
+        if self.batch_start_time and 0 < batch_fraction < 1:
+            elapsed = time.perf_counter() - self.batch_start_time
+            batch_text += f" · ETA {format_eta(elapsed * (1 - batch_fraction) / batch_fraction)}"
+        self.progress_bar["value"] = batch_fraction * 100
+        self.progress_label.config(text=batch_text, foreground=COLOR_PROCESSING)
+        
+        # Current video: lowest-numbered job still rendering
+        active = [idx for idx, state in jobs.items() if not state.get("done")]
+        if not active:
+            self.job_progress_bar["value"] = 0
+            self.job_progress_label.config(text="")
+            return
+        idx = min(active)
+        state = jobs[idx]
+        job_text = f"Video {idx}/{self.total_jobs}: {state.get('rendered', 0)}/{state.get('total_frames', 0)} frames"
+        if state.get("fps"):
+            remaining = state.get("total_frames", 0) - state.get("rendered", 0)
+            job_text += f" · {state['fps']:.1f} fps · ETA {format_eta(remaining / state['fps'])}"
+        self.job_progress_bar["value"] = state.get("fraction", 0) * 100
+        self.job_progress_label.config(text=job_text)
     
     def save_video(self):
         """Allow user to save the rendered video"""
@@ -503,54 +638,6 @@ class VideoGeneratorGUI:
                 return False
         return False
     
-    def save_video_with_name(self, audio_filename, output_dir):
-        """Save the rendered video with a specific name based on audio file"""
-        video_file = self.output_path / "video.mp4"
-        
-        if not video_file.exists():
-            self.log("Error: Rendered video not found!")
-            return False
-        
-        # Generate output filename from audio filename (without extension)
-        base_name = os.path.splitext(os.path.basename(audio_filename))[0]
-        output_filename = f"{base_name}.mp4"
-        save_path = Path(output_dir) / output_filename
-        
-        try:
-            shutil.copy2(video_file, save_path)
-            self.log(f"Video saved to: {save_path}")
-            return True
-        except Exception as e:
-            self.log(f"Error saving video: {str(e)}")
-            return False
-    
-    def cleanup_temp_files(self):
-        """Clean up temporary files and clear assets"""
-        try:
-            # Remove temporary remotion entry files
-            for file in self.project_root.glob("remotion_entry_*.jsx"):
-                try:
-                    file.unlink()
-                    self.log(f"Removed temp file: {file.name}")
-                except Exception:
-                    pass
-            
-            # Clear assets folders
-            self.clear_assets_folders()
-            
-            # Clear the out folder
-            video_file = self.output_path / "video.mp4"
-            if video_file.exists():
-                try:
-                    video_file.unlink()
-                    self.log("Removed rendered video from out folder")
-                except Exception:
-                    pass
-            
-            self.log("Cleanup completed")
-        except Exception as e:
-            self.log(f"Error during cleanup: {str(e)}")
-    
     def render_video(self):
         """Main render function"""
         if self.is_rendering:
@@ -558,6 +645,10 @@ class VideoGeneratorGUI:
             return
         
         # Validate inputs
+        if self.pending_captions:
+            messagebox.showwarning("Busy", "Caption files are still being checked, please wait a moment.")
+            return
+        
         if not self.audio_caption_pairs:
             messagebox.showwarning("Missing Files", 
                                   "Please add at least one audio/caption pair!")
@@ -589,7 +680,12 @@ class VideoGeneratorGUI:
         self.is_rendering = True
         self.render_btn.config(state=tk.DISABLED)
         self.progress_label.config(text="Rendering in progress...", foreground=COLOR_PROCESSING)
-        self.progress_bar.start(PROGRESS_BAR_SPEED)
+        self.progress_bar["value"] = 0
+        self.job_progress_bar["value"] = 0
+        with self.progress_lock:
+            self.job_progress = {}
+        self.total_jobs = len(self.audio_caption_pairs)
+        self.batch_start_time = None
         
         # Run rendering in separate thread
         thread = threading.Thread(target=self.render_thread)
@@ -599,47 +695,19 @@ class VideoGeneratorGUI:
         """Thread function for rendering multiple videos"""
         try:
             total_pairs = len(self.audio_caption_pairs)
-            successful_renders = 0
             
-            # Process each audio/caption pair
-            for idx, (audio_file, caption_file) in enumerate(self.audio_caption_pairs, start=1):
-                audio_name = os.path.basename(audio_file)
-                self.log(f"\n{'='*60}")
-                self.log(f"Processing video {idx}/{total_pairs}: {audio_name}")
-                self.log(f"{'='*60}")
-                
-                # Step 1: Clear old assets
-                self.log(f"Step 1: Clearing old assets...")
-                self.clear_assets_folders()
-                
-                # Step 2: Copy files for this specific pair
-                self.log(f"Step 2: Copying files to assets...")
-                if not self.copy_files_to_assets(audio_file, caption_file):
-                    self.log(f"Failed to copy files for {audio_name}, skipping...")
-                    continue
-                
-                # Step 3: Run render
-                self.log(f"Step 3: Running render for {audio_name}...")
-                success = self.run_render()
-                
-                if not success:
-                    self.log(f"Render failed for {audio_name}, skipping...")
-                    continue
-                
-                # Step 4: Save video with audio filename
-                self.log(f"Step 4: Saving video as {os.path.splitext(audio_name)[0]}.mp4...")
-                if self.save_video_with_name(audio_file, self.output_dir):
-                    successful_renders += 1
-                    self.log(f"✓ Successfully rendered and saved video {idx}/{total_pairs}")
-                else:
-                    self.log(f"Failed to save video for {audio_name}")
-                
-                # Clean up assets for next iteration
-                self.clear_assets_folders()
+            # Prepare images once, then render each pair in its own workspace
+            self.batch_start_time = time.perf_counter()
+            jobs = [{"audio": audio_file,
+                     "caption": self.normalized_captions.get(caption_file, caption_file),
+                     "images": list(self.image_files)}
+                    for audio_file, caption_file in self.audio_caption_pairs]
+            results = self.pipeline.run_batch(jobs, self.output_dir)
+            successful_renders = sum(1 for result in results if result["status"] == "ok")
             
             # Step 5: Final cleanup
             self.log("\nStep 5: Final cleanup...")
-            self.cleanup_temp_files()
+            self.pipeline.cleanup_temp_files()
             
             # Summary
             self.log(f"\n{'='*60}")
@@ -648,29 +716,29 @@ class VideoGeneratorGUI:
             self.log(f"{'='*60}")
             
             # Clear UI selections
-            self.root.after(0, self.clear_all_selections)
+            self.call_in_ui(self.clear_all_selections)
             
             # Show completion message
             if successful_renders == total_pairs:
-                self.root.after(0, lambda: messagebox.showinfo("Success", 
+                self.call_in_ui(messagebox.showinfo, "Success",
                     f"All {total_pairs} videos rendered successfully!\n\n"
-                    f"Saved to: {self.output_dir}"))
-                self.finish_render(True)
+                    f"Saved to: {self.output_dir}")
+                self.call_in_ui(self.finish_render, True)
             elif successful_renders > 0:
-                self.root.after(0, lambda: messagebox.showwarning("Partial Success", 
+                self.call_in_ui(messagebox.showwarning, "Partial Success",
                     f"Rendered {successful_renders} out of {total_pairs} videos.\n\n"
                     f"Check the log for details.\n\n"
-                    f"Saved to: {self.output_dir}"))
-                self.finish_render(True)
+                    f"Saved to: {self.output_dir}")
+                self.call_in_ui(self.finish_render, True)
             else:
-                self.root.after(0, lambda: messagebox.showerror("Failed", 
+                self.call_in_ui(messagebox.showerror, "Failed",
                     "No videos were successfully rendered.\n\n"
-                    "Check the log for details."))
-                self.finish_render(False)
+                    "Check the log for details.")
+                self.call_in_ui(self.finish_render, False)
             
         except Exception as e:
             self.log(f"Unexpected error: {str(e)}")
-            self.finish_render(False)
+            self.call_in_ui(self.finish_render, False)
     
     def clear_all_selections(self):
         """Clear all UI selections after rendering"""
@@ -684,9 +752,11 @@ class VideoGeneratorGUI:
     def finish_render(self, success):
         """Finish rendering and update UI"""
         self.is_rendering = False
-        self.progress_bar.stop()
+        self.job_progress_label.config(text="")
+        self.job_progress_bar["value"] = 0
         
         if success:
+            self.progress_bar["value"] = 100
             self.progress_label.config(text="Render completed successfully!", 
                                       foreground=COLOR_READY)
         else:
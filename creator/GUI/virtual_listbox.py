@@ -0,0 +1,125 @@
+"""
+Virtual Listbox
+A Tk listbox for long lists: only the visible rows exist as listbox items and
+are drawn on demand, so adding, removing or renumbering items costs the same
+with ten items or ten thousand
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    Listbox with a scrollbar over count rows, whose text comes from row_text(index)
+
+    The caller owns the data; after changing it call append_rows, remove_row,
+    clear or refresh. Single selection, by absolute row index.
+    """
+
+    def __init__(self, parent, row_text, height=6, **listbox_options):
+        super().__init__(parent)
+        self.row_text = row_text
+        self.height = height
+        self.count = 0
+        self.top = 0  # First visible row
+        self.selected = None
+
+        self.listbox = tk.Listbox(self, height=height, exportselection=False, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_mouse_wheel)  # Windows / macOS
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1))  # X11
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1))
+        self.listbox.bind("<Up>", lambda event: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self.move_selection(-self.height))
+        self.listbox.bind("<Next>", lambda event: self.move_selection(self.height))
+        self.redraw()
+
+    def bind_listbox(self, sequence, func):
+        """Bind an event on the inner listbox (e.g. "<Delete>")"""
+        self.listbox.bind(sequence, func)
+
+    def redraw(self):
+        """Draw the visible rows, the selection and the scrollbar"""
+        end = min(self.top + self.height, self.count)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *[self.row_text(i) for i in range(self.top, end)])
+        if self.selected is not None and self.top <= self.selected < end:
+            self.listbox.selection_set(self.selected - self.top)
+        if self.count:
+            self.scrollbar.set(self.top / self.count, end / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    refresh = redraw
+
+    def scroll_to(self, top):
+        self.top = max(0, min(top, self.count - self.height))
+        self.redraw()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+        return "break"
+
+    def see(self, index):
+        """Scroll just enough for row index to be visible"""
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + self.height:
+            self.scroll_to(index - self.height + 1)
+
+    def yview(self, *args):
+        """Scrollbar command ("moveto", fraction) or ("scroll", n, "units"|"pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]) * (self.height if args[2] == "pages" else 1))
+
+    def on_mouse_wheel(self, event):
+        steps = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self.scroll(steps or (1 if event.delta < 0 else -1))
+
+    def on_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def move_selection(self, rows):
+        if self.count:
+            current = self.selected if self.selected is not None else self.top - (1 if rows > 0 else 0)
+            self.selected = max(0, min(current + rows, self.count - 1))
+            self.see(self.selected)
+            self.redraw()
+        return "break"
+
+    def curselection(self):
+        """Selected row index as a tuple, like Listbox.curselection"""
+        return () if self.selected is None else (self.selected,)
+
+    def append_rows(self, rows=1):
+        """rows items were added at the end; redraws only when they are visible"""
+        self.count += rows
+        if self.count - rows < self.top + self.height:
+            self.redraw()
+        else:
+            self.scrollbar.set(self.top / self.count, (self.top + self.height) / self.count)
+
+    def remove_row(self, index):
+        """Item index was removed; the selection moves to the item that took its place"""
+        self.count -= 1
+        if self.selected is not None and self.selected > index:
+            self.selected -= 1
+        elif self.selected == index:
+            self.selected = min(index, self.count - 1) if self.count else None
+        self.scroll_to(self.top)
+
+    def clear(self):
+        """All items were removed"""
+        self.count = self.top = 0
+        self.selected = None
+        self.redraw()
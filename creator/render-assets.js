@@ -0,0 +1,78 @@
+import path from "path";
+import fs from "fs";
+
+// Asset discovery shared by render.js (one video per process) and
+// render-worker.js (one bundle for many videos)
+
+export const FPS = 30;
+
+// Collect images and sort by numeric suffix (image_1.jpg, image_2.jpg...)
+// urlBase is the folder of the images relative to the served public folder
+export const listImages = (imagesDir, urlBase) => {
+  if (!fs.existsSync(imagesDir)) return [];
+  return fs.readdirSync(imagesDir)
+    .filter((f) => /\.(jpg|jpeg|png|webp)$/i.test(f) && f !== "placeholder.png")
+    .sort((a, b) => {
+      // Extract number from patterns like: image_1.jpg, image_1_FG.png, image_1_BG.png, 1.jpg, etc.
+      const matchA = a.match(/_(\d+)(?:_(?:FG|BG))?\./) || a.match(/^(\d+)\./);
+      const matchB = b.match(/_(\d+)(?:_(?:FG|BG))?\./) || b.match(/^(\d+)\./);
+      const na = parseInt((matchA || [])[1] || "0", 10);
+      const nb = parseInt((matchB || [])[1] || "0", 10);
+      return na - nb;
+    })
+    // Use relative paths from public folder for staticFile()
+    .map((f) => `${urlBase}/${f}`);
+};
+
+// First audio file in audioDir (background music excluded), absolute path or ""
+export const findAudio = (audioDir) => {
+  if (!fs.existsSync(audioDir)) return "";
+  const auds = fs.readdirSync(audioDir)
+    .filter((f) => /\.(mp3|wav|m4a|aac|flac)$/i.test(f))
+    .filter((f) => !f.startsWith('bgmusic')); // Exclude background music files
+  return auds.length > 0 ? path.join(audioDir, auds[0]) : "";
+};
+
+// Audio length in seconds, 10s when it can't be read
+export const readDurationSeconds = async (audioAbsolute) => {
+  let seconds = 0;
+  try {
+    const mm = await import("music-metadata");
+    const meta = await mm.parseFile(audioAbsolute);
+    seconds = meta.format.duration || 0;
+    if (!seconds || Number.isNaN(seconds)) {
+      console.warn("⚠️ Couldn't read audio duration, defaulting to 10s");
+      seconds = 10;
+    }
+  } catch (err) {
+    console.warn("⚠️ Error reading audio metadata:", err.message);
+    seconds = 10;
+  }
+  if (!Number.isFinite(seconds) || seconds <= 0) {
+    console.warn("⚠️ Invalid audio duration detected, defaulting to 10s");
+    seconds = 10;
+  }
+  return seconds;
+};
+
+// Machine-readable stage timings for the GUI's metrics
+export const reportTiming = (stage, startedAt, extra = {}) => {
+  console.log("RENDER_TIMING " + JSON.stringify({ stage, seconds: (Date.now() - startedAt) / 1000, ...extra }));
+};
+
+// Machine-readable progress lines for the GUI, throttled to a few per second
+export const progressReporter = (totalFrames, extra = {}) => {
+  let lastProgressAt = 0;
+  return ({ renderedFrames, encodedFrames, progress }) => {
+    const now = Date.now();
+    if (now - lastProgressAt < 500 && progress < 1) return;
+    lastProgressAt = now;
+    console.log("RENDER_PROGRESS " + JSON.stringify({
+      renderedFrames,
+      encodedFrames,
+      totalFrames,
+      progress,
+      ...extra,
+    }));
+  };
+};
@@ -0,0 +1,136 @@
+import path from "path";
+import fs from "fs";
+import os from "os";
+import readline from "readline";
+import { bundle } from "@remotion/bundler";
+import { renderMedia, selectComposition, openBrowser } from "@remotion/renderer";
+import { listImages, findAudio, readDurationSeconds, reportTiming, progressReporter } from "./render-assets.js";
+
+// Long-lived renderer: bundles src/WorkerRoot.jsx and opens Chrome once, then
+// renders one video per request read from stdin, so a batch of N videos pays
+// for one bundle instead of N.
+//
+// Request (one JSON object per line):
+//   {"job": 3, "workspace": "<dir>", "concurrency": 4, "durationSeconds": 31.2}
+//   concurrency and durationSeconds are optional (duration is read from the audio)
+// Output lines, all tagged with the job:
+//   RENDER_PROGRESS {...}, RENDER_TIMING {...}, RENDER_DONE {"job", "ok", "output"|"error"}
+// RENDER_WORKER_READY {...} is printed once the bundle is ready. Requests are
+// rendered concurrently; closing stdin lets running renders finish, then exits.
+
+const entryPoint = path.join(process.cwd(), "src/WorkerRoot.jsx");
+
+// Workspaces are linked in under public/jobs/<job> of the bundle, so the bundle
+// itself starts from an empty public folder instead of copying one workspace
+const emptyPublicDir = fs.mkdtempSync(path.join(os.tmpdir(), "render-worker-public-"));
+
+const reply = (prefix, payload) => {
+  console.log(`${prefix} ${JSON.stringify(payload)}`);
+};
+
+const renderJob = async (serveUrl, browser, request) => {
+  const job = request.job;
+  const workspaceDir = path.resolve(request.workspace);
+  const publicDir = path.join(workspaceDir, "public");
+  const outPath = path.join(workspaceDir, "out/video.mp4");
+  const base = `jobs/${job}`;
+  const linkPath = path.join(serveUrl, "public", "jobs", String(job));
+
+  try {
+    fs.mkdirSync(path.dirname(linkPath), { recursive: true });
+    fs.rmSync(linkPath, { force: true, recursive: true });
+    // Junctions need no admin rights on Windows; the type is ignored elsewhere
+    fs.symlinkSync(publicDir, linkPath, "junction");
+
+    const images = listImages(path.join(publicDir, "assets/images"), `${base}/assets/images`);
+    if (images.length === 0) {
+      console.warn(`⚠️ [job ${job}] No images found. Video will render black screen.`);
+    }
+    const audioAbsolute = findAudio(path.join(publicDir, "assets/audio"));
+    let durationSeconds = request.durationSeconds;
+    if (!Number.isFinite(durationSeconds) || durationSeconds <= 0) {
+      if (audioAbsolute) {
+        durationSeconds = await readDurationSeconds(audioAbsolute);
+      } else {
+        console.warn(`⚠️ [job ${job}] No audio found. Video will be silent and default to 10s.`);
+        durationSeconds = 10;
+      }
+    }
+
+    const inputProps = {
+      images,
+      audio: audioAbsolute ? `${base}/assets/audio/${path.basename(audioAbsolute)}` : "",
+      durationSeconds,
+      assetsDir: `${base}/assets`,
+    };
+
+    const compositionStart = Date.now();
+    const composition = await selectComposition({
+      serveUrl,
+      id: "Video",
+      inputProps,
+      puppeteerInstance: browser,
+    });
+    reportTiming("compositions", compositionStart, { job });
+
+    console.log(`🎬 [job ${job}] Rendering ${composition.durationInFrames} frames (${images.length} images, ${durationSeconds.toFixed(1)}s)...`);
+    fs.mkdirSync(path.dirname(outPath), { recursive: true });
+    const framesStart = Date.now();
+    await renderMedia({
+      serveUrl,
+      composition,
+      codec: "h264",
+      outputLocation: outPath,
+      inputProps,
+      puppeteerInstance: browser,
+      ...(request.concurrency ? { concurrency: request.concurrency } : {}),
+      onProgress: progressReporter(composition.durationInFrames, { job }),
+    });
+    reportTiming("frames", framesStart, { job });
+
+    reply("RENDER_DONE", { job, ok: true, output: outPath });
+  } catch (err) {
+    console.error(`❌ [job ${job}] Render failed:`, err);
+    reply("RENDER_DONE", { job, ok: false, error: String(err && err.message ? err.message : err) });
+  } finally {
+    try {
+      fs.rmSync(linkPath, { force: true });
+    } catch (err) {
+      // ignore
+    }
+  }
+};
+
+(async () => {
+  let browser = null;
+  try {
+    console.log("📦 Bundling project once for the whole batch...");
+    const bundleStart = Date.now();
+    const serveUrl = await bundle({ entryPoint, publicDir: emptyPublicDir });
+    reportTiming("bundle", bundleStart);
+    browser = await openBrowser("chrome");
+    reply("RENDER_WORKER_READY", { bundle: serveUrl });
+
+    const running = new Set();
+    const lines = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+    for await (const line of lines) {
+      if (!line.trim()) continue;
+      let request;
+      try {
+        request = JSON.parse(line);
+      } catch (err) {
+        console.error("❌ Ignoring malformed request:", line);
+        continue;
+      }
+      const task = renderJob(serveUrl, browser, request).finally(() => running.delete(task));
+      running.add(task);
+    }
+    await Promise.allSettled([...running]);
+  } catch (err) {
+    console.error("❌ Render worker failed:", err);
+    process.exitCode = 1;
+  } finally {
+    if (browser) await browser.close({ silent: true }).catch(() => {});
+    fs.rmSync(emptyPublicDir, { recursive: true, force: true });
+  }
+})();
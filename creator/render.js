@@ -2,29 +2,29 @@ import path from "path";
 import fs from "fs";
 import { bundle } from "@remotion/bundler";
 import { renderMedia, getCompositions } from "@remotion/renderer";
-
-const imagesDir = path.join(process.cwd(), "public/assets/images");
-const audioDir = path.join(process.cwd(), "public/assets/audio");
+import { FPS, listImages, findAudio, readDurationSeconds, reportTiming, progressReporter } from "./render-assets.js";
+
+// Optional arguments: node render.js [--workspace <dir>] [--concurrency <n>] [--duration <seconds>]
+// A workspace holds its own public/assets/{audio,images} and out/ folders so
+// several renders can run side by side without sharing files.
+const argValue = (name) => {
+  const index = process.argv.indexOf(name);
+  return index !== -1 ? process.argv[index + 1] : undefined;
+};
+const workspaceDir = argValue("--workspace") ? path.resolve(argValue("--workspace")) : process.cwd();
+const renderConcurrency = argValue("--concurrency") ? parseInt(argValue("--concurrency"), 10) : null;
+// Audio length already read by the caller, so the audio isn't parsed again
+const knownDuration = argValue("--duration") ? parseFloat(argValue("--duration")) : null;
+
+const publicDir = path.join(workspaceDir, "public");
+const imagesDir = path.join(publicDir, "assets/images");
+const audioDir = path.join(publicDir, "assets/audio");
 const placeholderImage = path.join(process.cwd(), "public/assets/placeholder.png");
-const outPath = path.join(process.cwd(), "out/video.mp4");
-const fps = 30;
+const outPath = path.join(workspaceDir, "out/video.mp4");
+const fps = FPS;
 
 // Collect images and sort by numeric suffix (image_1.jpg, image_2.jpg...)
-let images = [];
-if (fs.existsSync(imagesDir)) {
-  images = fs.readdirSync(imagesDir)
-    .filter((f) => /\.(jpg|jpeg|png|webp)$/i.test(f) && f !== "placeholder.png")
-    .sort((a, b) => {
-      // Extract number from patterns like: image_1.jpg, image_1_FG.png, image_1_BG.png, 1.jpg, etc.
-      const matchA = a.match(/_(\d+)(?:_(?:FG|BG))?\./) || a.match(/^(\d+)\./);
-      const matchB = b.match(/_(\d+)(?:_(?:FG|BG))?\./) || b.match(/^(\d+)\./);
-      const na = parseInt((matchA || [])[1] || "0", 10);
-      const nb = parseInt((matchB || [])[1] || "0", 10);
-      return na - nb;
-    })
-    // Use relative paths from public folder for staticFile()
-    .map((f) => `assets/images/${f}`);
-}
+const images = listImages(imagesDir, "assets/images");
 
 // Use placeholder if no images
 if (images.length === 0) {
@@ -37,45 +37,19 @@ if (images.length === 0) {
 }
 
 // Pick first audio and read duration (exclude bgmusic files)
-let audio = ""; // absolute path to pass into Remotion
-let audioAbsolute = ""; // absolute path used for metadata reading
+let audio = ""; // path relative to the public folder to pass into Remotion
 let audioDurationSeconds = 0;
-if (fs.existsSync(audioDir)) {
-  const auds = fs.readdirSync(audioDir)
-    .filter((f) => /\.(mp3|wav|m4a|aac|flac)$/i.test(f))
-    .filter((f) => !f.startsWith('bgmusic')); // Exclude background music files
-  if (auds.length > 0) {
-    audioAbsolute = path.join(audioDir, auds[0]);
-  }
-}
+const audioAbsolute = findAudio(audioDir); // absolute path used for metadata reading
 if (!audioAbsolute) {
   console.warn("⚠️ No audio found. Video will be silent and default to 10s.");
   audioDurationSeconds = 10;
   audio = ""; // Keep empty for no audio
 } else {
-  try {
-    const mm = await import("music-metadata");
-    const meta = await mm.parseFile(audioAbsolute);
-    audioDurationSeconds = meta.format.duration || 0;
-    if (!audioDurationSeconds || Number.isNaN(audioDurationSeconds)) {
-      console.warn("⚠️ Couldn't read audio duration, defaulting to 10s");
-      audioDurationSeconds = 10;
-    }
-    // Use relative path from public folder for staticFile()
-    const audioFileName = path.basename(audioAbsolute);
-    audio = `assets/audio/${audioFileName}`;
-  } catch (err) {
-    console.warn("⚠️ Error reading audio metadata:", err.message);
-    audioDurationSeconds = 10;
-    const audioFileName = path.basename(audioAbsolute);
-    audio = `assets/audio/${audioFileName}`;
-  }
-}
-
-// Validate duration and compute frames
-if (!Number.isFinite(audioDurationSeconds) || audioDurationSeconds <= 0) {
-  console.warn("⚠️ Invalid audio duration detected, defaulting to 10s");
-  audioDurationSeconds = 10;
+  audioDurationSeconds = Number.isFinite(knownDuration) && knownDuration > 0
+    ? knownDuration
+    : await readDurationSeconds(audioAbsolute);
+  // Use relative path from public folder for staticFile()
+  audio = `assets/audio/${path.basename(audioAbsolute)}`;
 }
 
 const totalFrames = Math.max(1, Math.ceil(audioDurationSeconds * fps));
@@ -111,19 +85,23 @@ export const RemotionRoot = () => {
 registerRoot(RemotionRoot);
 `;
 
-const tempEntry = path.join(process.cwd(), `remotion_entry_${Date.now()}.jsx`);
+const tempEntry = path.join(process.cwd(), `remotion_entry_${Date.now()}_${process.pid}.jsx`);
 fs.writeFileSync(tempEntry, entryTemplate, "utf8");
 
 (async () => {
   try {
     console.log("📦 Bundling project with computed duration...");
-    const bundleLocation = await bundle({ entryPoint: tempEntry });
+    const bundleStart = Date.now();
+    const bundleLocation = await bundle({ entryPoint: tempEntry, publicDir });
+    reportTiming("bundle", bundleStart);
     console.log("✅ Bundle ready:", bundleLocation);
 
     // List compositions in the bundle to verify values
     let comps = [];
+    const compositionsStart = Date.now();
     try {
       comps = await getCompositions(bundleLocation);
+      reportTiming("compositions", compositionsStart);
       console.log("📋 Compositions found:", comps.map((c) => ({ id: c.id, durationInFrames: c.durationInFrames, fps: c.fps, width: c.width, height: c.height })) );
       console.log("📦 Full composition object:", comps[0]);
     } catch (err) {
@@ -169,11 +147,18 @@ fs.writeFileSync(tempEntry, entryTemplate, "utf8");
       inputProps,
       frameRange: [0, Math.max(0, compDuration - 1)],
       everyNthFrame: 1,
+      ...(renderConcurrency ? { concurrency: renderConcurrency } : {}),
     };
 
     console.log("🔧 renderMedia options:", renderOptions);
 
-    await renderMedia(renderOptions);
+    const framesStart = Date.now();
+    await renderMedia({
+      ...renderOptions,
+      onProgress: progressReporter(compDuration),
+    });
+
+    reportTiming("frames", framesStart);
 
     console.log("✅ Render done! File saved at:", outPath);
   } catch (err) {
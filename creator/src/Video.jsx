@@ -113,9 +113,12 @@ const ContinuousImageDisplay = ({ images, frameDurations, durationInFrames, fps
   // Remove extension from base name if it was added
   baseName = baseName.replace(extension, '');
   
-  // Construct both image paths
-  const bgImage = `${baseName}_BG${extension}`;
-  const fgImage = `${baseName}_FG${extension}`;
+  // Construct both image paths - the layers may use different formats (e.g. a WebP
+  // foreground over the original JPEG), so prefer the file that is in the image list
+  const findLayer = (layer) =>
+    images.find((src) => src.startsWith(`${baseName}_${layer}.`)) || `${baseName}_${layer}${extension}`;
+  const bgImage = findLayer('BG');
+  const fgImage = findLayer('FG');
   
   // *** KEN BURNS EFFECT CALCULATION ***
   let kenBurnsPanX = 0;
@@ -450,7 +453,8 @@ const PanningImage = ({ src, duration, imageIndex }) => {
   );
 };
 
-export const Video = ({ images = [], audio = "", durationSeconds = 10 }) => {
+// assetsDir: folder (relative to public/) holding audio/Untitled.json and audio/bgmusic.*
+export const Video = ({ images = [], audio = "", durationSeconds = 10, assetsDir = "assets" }) => {
   const { fps, durationInFrames } = useVideoConfig();
   const [subtitles, setSubtitles] = useState([]);
   const [handle] = useState(() => delayRender());
@@ -468,7 +472,7 @@ export const Video = ({ images = [], audio = "", durationSeconds = 10 }) => {
   const fetchSubtitles = useCallback(async () => {
     try {
       await loadFont();
-      const res = await fetch(staticFile("assets/audio/Untitled.json"));
+      const res = await fetch(staticFile(`${assetsDir}/audio/Untitled.json`));
       const data = await res.json();
       
       // Convert your format to Remotion's expected format
@@ -486,7 +490,7 @@ export const Video = ({ images = [], audio = "", durationSeconds = 10 }) => {
       console.log("No captions file found or error loading captions:", e);
       continueRender(handle);
     }
-  }, [handle]);
+  }, [handle, assetsDir]);
 
   // Check if background music exists
   const checkBgMusic = useCallback(async () => {
@@ -495,10 +499,10 @@ export const Video = ({ images = [], audio = "", durationSeconds = 10 }) => {
       const formats = ['.mp3', '.wav', '.m4a', '.aac', '.flac'];
       for (const format of formats) {
         try {
-          const url = staticFile(`assets/audio/bgmusic${format}`);
+          const url = staticFile(`${assetsDir}/audio/bgmusic${format}`);
           const response = await fetch(url, { method: 'HEAD' });
           if (response.ok) {
-            setBgMusicFile(`assets/audio/bgmusic${format}`);
+            setBgMusicFile(`${assetsDir}/audio/bgmusic${format}`);
             console.log(`Background music found: bgmusic${format}`);
             return;
           }
@@ -510,7 +514,7 @@ export const Video = ({ images = [], audio = "", durationSeconds = 10 }) => {
     } catch (e) {
       console.log("Error checking background music:", e);
     }
-  }, []);
+  }, [assetsDir]);
 
   useEffect(() => {
     fetchSubtitles();
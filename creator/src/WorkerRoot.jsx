@@ -0,0 +1,33 @@
+import { registerRoot, Composition } from "remotion";
+import { Video } from "./Video";
+
+// Entry bundled once by render-worker.js. Unlike the entry render.js generates,
+// nothing job specific is baked in: the length of each video comes from the
+// durationSeconds input prop.
+const fps = 30;
+const width = 1080;
+const height = 1920;
+
+export const WorkerRoot = () => {
+  return (
+    <Composition
+      id="Video"
+      component={Video}
+      fps={fps}
+      width={width}
+      height={height}
+      durationInFrames={fps * 10}
+      defaultProps={{
+        images: [],
+        audio: "",
+        durationSeconds: 10,
+        assetsDir: "assets",
+      }}
+      calculateMetadata={({ props }) => ({
+        durationInFrames: Math.max(1, Math.ceil(props.durationSeconds * fps)),
+      })}
+    />
+  );
+};
+
+registerRoot(WorkerRoot);
@@ -5,8 +5,11 @@ import {
   writeFileSync,
   lstatSync,
   mkdirSync,
+  mkdtempSync,
   readdirSync,
+  renameSync,
 } from "node:fs";
+import os from "node:os";
 import path from "path";
 import {
   WHISPER_LANG,
@@ -38,14 +41,10 @@ const extractToTempAudioFile = (fileToTranscribe, tempOutFile) => {
   }
 };
 
-const subFile = async (filePath, fileName, folder) => {
-  const outPath = path.join(
-    process.cwd(),
-    "public",
-    folder,
-    fileName.replace(/\.(wav|mp3|m4a|flac|ogg)$/, ".json"),
-  );
+// Whisper threads (--threads N), so transcription can share the CPU with renders
+let whisperThreads = 0;
 
+const transcribeToCaptions = async (filePath) => {
   const whisperCppOutput = await transcribe({
     inputPath: filePath,
     model: WHISPER_MODEL,
@@ -56,11 +55,24 @@ const subFile = async (filePath, fileName, folder) => {
     translateToEnglish: false,
     language: WHISPER_LANG,
     splitOnWord: true,
+    ...(whisperThreads > 0 ? { additionalArgs: ["--threads", String(whisperThreads)] } : {}),
   });
 
   const { captions } = toCaptions({
     whisperCppOutput,
   });
+  return captions;
+};
+
+const subFile = async (filePath, fileName, folder) => {
+  const outPath = path.join(
+    process.cwd(),
+    "public",
+    folder,
+    fileName.replace(/\.(wav|mp3|m4a|flac|ogg)$/, ".json"),
+  );
+
+  const captions = await transcribeToCaptions(filePath);
   writeFileSync(
     outPath,
     JSON.stringify(captions, null, 2),
@@ -133,15 +145,53 @@ const processDirectory = async (directory) => {
 await installWhisperCpp({ to: WHISPER_PATH, version: WHISPER_VERSION });
 await downloadWhisperModel({ folder: WHISPER_PATH, model: WHISPER_MODEL });
 
+// Transcribe one audio file (any path) into the given caption file:
+//   node sub.mjs --output <captions.json> [--threads N] <audio file>
+// The caption file only appears once transcription has finished.
+const transcribeToFile = async (audioPath, outPath) => {
+  const tempDir = mkdtempSync(path.join(os.tmpdir(), "sub-"));
+  try {
+    const tempWav = path.join(tempDir, "audio_16khz.wav");
+    console.log("Converting audio to 16kHz WAV format...");
+    extractToTempAudioFile(audioPath, tempWav);
+    const captions = await transcribeToCaptions(tempWav);
+    writeFileSync(`${outPath}.part`, JSON.stringify(captions, null, 2));
+    renameSync(`${outPath}.part`, outPath);
+    console.log(`Transcribed ${captions.length} captions to ${outPath}`);
+  } finally {
+    rmSync(tempDir, { recursive: true, force: true });
+  }
+};
+
+const args = process.argv.slice(2);
+let outputFile = null;
+for (const name of ["--output", "--threads"]) {
+  const i = args.indexOf(name);
+  if (i !== -1) {
+    if (name === "--output") outputFile = path.resolve(args[i + 1]);
+    else whisperThreads = Number(args[i + 1]) || 0;
+    args.splice(i, 2);
+  }
+}
+
+if (outputFile) {
+  if (args.length !== 1) {
+    console.error("Usage: node sub.mjs --output <captions.json> [--threads N] <audio file>");
+    process.exit(1);
+  }
+  await transcribeToFile(path.resolve(args[0]), outputFile);
+  process.exit(0);
+}
+
 // Read arguments for filename if given else process all files in the directory
-const hasArgs = process.argv.length > 2;
+const hasArgs = args.length > 0;
 
 if (!hasArgs) {
   await processDirectory(path.join(process.cwd(), "public"));
   process.exit(0);
 }
 
-for (const arg of process.argv.slice(2)) {
+for (const arg of args) {
   const fullPath = path.join(process.cwd(), arg);
   const stat = lstatSync(fullPath);
 